@@ -0,0 +1,319 @@
+"""Card image assets shared by the simulator and the deck editor.
+
+ThumbnailCache keeps pre-resized copies of every card-img/<id>.png in
+cache/thumbnails/<variant>/<id>.png, so the apps never decode and resize the
+full-size source again once a variant exists. Each thumbnail stores the
+source file's mtime and size; a changed source is re-rendered on next use.
+
+CardPack goes one step further for large card pools: cache/cards.pack holds
+the raw RGBA pixels of the board and list variants of every card behind a single
+offset index, and is memory-mapped so a sprite is one slice of the mapping
+instead of one file open and PNG decode per card. Cards that are not in the
+pack, or whose source changed since it was built, come from the thumbnails.
+
+    python ShuffleMyriad_Assets.py build    # render all variants ahead of time
+    python ShuffleMyriad_Assets.py pack     # build cache/cards.pack from them
+    python ShuffleMyriad_Assets.py clean    # delete the cache
+"""
+import argparse
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, PngImagePlugin
+
+CARD_IMG_DIR = "card-img"
+THUMBNAIL_DIR = os.path.join("cache", "thumbnails")
+CARD_PACK_PATH = os.path.join("cache", "cards.pack")
+STAMP_KEY = "ShuffleMyriad-Source"
+
+# variant -> (size, rotated 90 degrees)
+THUMBNAIL_VARIANTS = {
+    "board": ((78, 111), False),
+    "board_rotated": ((111, 78), True),
+    "preview": ((390, 555), False),
+    "list": ((26, 37), False),
+}
+# Previews are 850 KiB each as raw RGBA, so only the small sprites are packed by default
+PACK_VARIANTS = ("board", "board_rotated", "list")
+PACK_MAGIC = b"SMPACK1\n"
+PACK_HEADER = struct.Struct("<8sQQ") # magic, index offset, index length
+PACK_ALIGN = 64
+
+
+def render_variant(source, variant):
+    size, rotated = THUMBNAIL_VARIANTS[variant]
+    if rotated:
+        source = source.rotate(90, expand=True)
+    return source.resize(size, Image.Resampling.LANCZOS)
+
+
+class CardPack:
+    """Read-only view of a cards.pack file.
+
+    Layout: header, then each card's variants as raw RGBA rows at PACK_ALIGN
+    boundaries, then a JSON index
+    {"variants": {variant: [w, h]}, "cards": {card_id: [stamp, {variant: offset}]}}.
+    """
+    def __init__(self, path, file, mapping, index):
+        self.path = path
+        self._file = file
+        self._mapping = mapping
+        self._view = memoryview(mapping)
+        self.sizes = {variant: tuple(size) for variant, size in index["variants"].items()}
+        self.cards = index["cards"]
+
+    @classmethod
+    def open(cls, path=CARD_PACK_PATH):
+        """Maps the pack, or returns None if there is none or it cannot be read."""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_offset, index_length = PACK_HEADER.unpack_from(mapping, 0)
+            if magic != PACK_MAGIC:
+                raise ValueError("not a card pack")
+            index = json.loads(mapping[index_offset:index_offset + index_length])
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Warning: Ignoring card pack {path}: {e}")
+            f.close()
+            return None
+        return cls(path, f, mapping, index)
+
+    def __contains__(self, card_id):
+        return card_id in self.cards
+
+    def get(self, card_id, variant, stamp):
+        """Returns an image sharing memory with the mapping, or None if the card or variant is not packed or the stamp differs."""
+        entry = self.cards.get(card_id)
+        if entry is None or entry[0] != stamp:
+            return None
+        offset = entry[1].get(variant)
+        if offset is None:
+            return None
+        width, height = self.sizes[variant]
+        data = self._view[offset:offset + width * height * 4]
+        return Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, 1)
+
+    def close(self):
+        """Only safe once no image returned by get is in use."""
+        self._view.release()
+        self._mapping.close()
+        self._file.close()
+
+
+def build_pack(thumbnails, path=CARD_PACK_PATH, card_ids=None, variants=PACK_VARIANTS, progress=None):
+    """Writes a pack of the given variants from the thumbnail cache. Returns the number of cards packed."""
+    card_ids = thumbnails.card_ids() if card_ids is None else list(card_ids)
+    cards = {}
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(temp_path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, 0, 0))
+        for done, card_id in enumerate(card_ids, 1):
+            stamp = thumbnails.source_stamp(card_id)
+            try:
+                images = thumbnails.get_many(card_id, variants) if stamp else None
+            except Exception as e:
+                print(f"Error packing {card_id}: {e}")
+                images = None
+            if images:
+                offsets = {}
+                for variant in variants:
+                    f.write(b"\0" * (-f.tell() % PACK_ALIGN))
+                    offsets[variant] = f.tell()
+                    f.write(images[variant].convert("RGBA").tobytes())
+                cards[card_id] = [stamp, offsets]
+            if progress:
+                progress(done, len(card_ids))
+        index = json.dumps({"variants": {variant: THUMBNAIL_VARIANTS[variant][0] for variant in variants},
+                            "cards": cards}, separators=(",", ":")).encode("utf-8")
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(PACK_HEADER.pack(PACK_MAGIC, index_offset, len(index)))
+    try:
+        os.replace(temp_path, path)
+    except PermissionError:
+        # Windows refuses to replace a file that a running app has memory-mapped
+        os.remove(temp_path)
+        raise PermissionError(f"{path} is in use; close the simulator and the deck editor and try again") from None
+    return len(cards)
+
+
+class ThumbnailCache:
+    """Pre-resized card images on disk, keyed by card id and variant. Safe to use from worker threads.
+
+    Variants found fresh in the card pack (if one exists at pack_path) are served from it.
+    """
+    def __init__(self, source_dir=CARD_IMG_DIR, cache_dir=THUMBNAIL_DIR, pack_path=CARD_PACK_PATH):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.pack = CardPack.open(pack_path) if pack_path else None
+        self.write_failed = False
+
+    def source_path(self, card_id):
+        return os.path.join(self.source_dir, f"{card_id}.png")
+
+    def cache_path(self, card_id, variant):
+        return os.path.join(self.cache_dir, variant, f"{card_id}.png")
+
+    def source_stamp(self, card_id):
+        """mtime and size of the source image, or None if it does not exist."""
+        try:
+            stat = os.stat(self.source_path(card_id))
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def get(self, card_id, variant):
+        """Returns the variant as a loaded PIL image, or None if the card has no source image."""
+        images = self.get_many(card_id, (variant,))
+        return images[variant] if images else None
+
+    def get_many(self, card_id, variants):
+        """Returns {variant: image} or None if the card has no source image. The source is decoded at most once."""
+        stamp = self.source_stamp(card_id)
+        if stamp is None:
+            return None
+        images = {}
+        stale = []
+        for variant in variants:
+            image = self.pack.get(card_id, variant, stamp) if self.pack else None
+            if image is None:
+                image = self._read_cached(card_id, variant, stamp)
+            if image is None:
+                stale.append(variant)
+            else:
+                images[variant] = image
+        if stale:
+            images.update(self._render(card_id, stale, stamp))
+        return images
+
+    def refresh(self, card_id, variants=tuple(THUMBNAIL_VARIANTS)):
+        """Renders the variants that are missing or stale; fresh ones are only checked, not decoded."""
+        stamp = self.source_stamp(card_id)
+        if stamp is None:
+            return
+        stale = [variant for variant in variants if self._read_cached(card_id, variant, stamp, decode=False) is None]
+        if stale:
+            self._render(card_id, stale, stamp)
+
+    def _render(self, card_id, variants, stamp):
+        with Image.open(self.source_path(card_id)) as source:
+            source.load()
+            images = {variant: render_variant(source, variant) for variant in variants}
+        for variant, image in images.items():
+            self._write_cached(card_id, variant, stamp, image)
+        return images
+
+    def _read_cached(self, card_id, variant, stamp, decode=True):
+        try:
+            image = Image.open(self.cache_path(card_id, variant))
+        except OSError:
+            return None
+        try:
+            if image.info.get(STAMP_KEY) == stamp:
+                if not decode:
+                    image.close()
+                    return True
+                image.load() # Also releases the file handle
+                return image
+        except OSError:
+            pass # Truncated by an interrupted write; rendered again
+        image.close()
+        return None
+
+    def _write_cached(self, card_id, variant, stamp, image):
+        if self.write_failed:
+            return
+        path = self.cache_path(card_id, variant)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        info = PngImagePlugin.PngInfo()
+        info.add_text(STAMP_KEY, stamp)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(temp_path, "PNG", pnginfo=info, compress_level=1)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # A read-only install still works, it just resizes every time
+            print(f"Warning: Thumbnail cache disabled, could not write {path}: {e}")
+            self.write_failed = True
+
+    def card_ids(self):
+        try:
+            names = os.listdir(self.source_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.lower().endswith(".png"))
+
+    def build(self, card_ids=None, variants=tuple(THUMBNAIL_VARIANTS), workers=4, progress=None):
+        """Renders every missing or stale variant. Returns the number of card ids processed."""
+        card_ids = self.card_ids() if card_ids is None else list(card_ids)
+
+        def build_one(card_id):
+            try:
+                self.refresh(card_id, variants)
+            except Exception as e:
+                print(f"Error building thumbnails for {card_id}: {e}")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for done, _ in enumerate(executor.map(build_one, card_ids), 1):
+                if progress:
+                    progress(done, len(card_ids))
+        return len(card_ids)
+
+    def clean(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        if self.pack:
+            self.pack.close()
+            self.pack = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShuffleMyriad card image cache")
+    parser.add_argument("command", choices=("build", "pack", "clean"))
+    parser.add_argument("--source", default=CARD_IMG_DIR)
+    parser.add_argument("--cache", default=THUMBNAIL_DIR)
+    parser.add_argument("--pack", default=CARD_PACK_PATH)
+    parser.add_argument("--variants", nargs="+", choices=tuple(THUMBNAIL_VARIANTS), default=PACK_VARIANTS,
+                        help="variants stored in the pack")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+
+    # The pack is never read here; it is either rebuilt or deleted
+    cache = ThumbnailCache(args.source, args.cache, pack_path=None)
+    if args.command == "clean":
+        cache.clean()
+        try:
+            if os.path.exists(args.pack):
+                os.remove(args.pack)
+        except PermissionError:
+            print(f"Error: {args.pack} is in use; close the simulator and the deck editor and try again")
+            return 1
+        print(f"Removed {args.cache} and {args.pack}")
+        return 0
+
+    def progress(done, total):
+        if done == total or done % 100 == 0:
+            print(f"\r{done}/{total}", end="", flush=True)
+    count = cache.build(workers=args.workers, progress=progress)
+    print(f"\nThumbnails for {count} cards are up to date in {args.cache}")
+    if args.command == "pack":
+        try:
+            count = build_pack(cache, args.pack, variants=args.variants, progress=progress)
+        except PermissionError as e:
+            print(f"\nError: {e}")
+            return 1
+        print(f"\nPacked {count} cards into {args.pack} ({os.path.getsize(args.pack) // 1024} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
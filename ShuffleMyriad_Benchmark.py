@@ -0,0 +1,352 @@
+"""Benchmarks for the simulator and deck editor hot paths.
+
+Generates synthetic card images, a CardList.csv, a deck and a board save for
+each size, then drives the real entry points (load_deck, load_board,
+draw_cards, the opponent mirror and the editor search) and reports latency
+percentiles and peak Python memory. Without a display it starts Xvfb if it
+is installed; if there is no display at all only the GUI-free core paths run.
+
+    python ShuffleMyriad_Benchmark.py                      # 50, 500 and 5000 cards
+    python ShuffleMyriad_Benchmark.py --sizes 500 --update-baseline
+    python ShuffleMyriad_Benchmark.py --baseline benchmark_baseline.json   # exit 1 on regressions
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from PIL import Image, ImageDraw
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from ShuffleMyriad_Core import GameState, read_board_save
+from ShuffleMyriad_Assets import ThumbnailCache, build_pack
+
+DEFAULT_SIZES = (50, 500, 5000)
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+CARD_SOURCE_SIZE = (195, 277) # Half the preview size keeps generation fast but still needs a resize
+DECK_FILE = os.path.join("deck", "bench.txt")
+SAVE_FILE = os.path.join("save", "bench.jsonl")
+SEARCH_QUERIES = ("", "bench0", "ベンチ", "00042", "1", "zzz")
+
+
+# --- Synthetic assets ---
+def card_ids(size):
+    return [f"bench{i:05d}" for i in range(size)]
+
+
+def _solid_image(size, color, label=None):
+    image = Image.new("RGB", size, color)
+    if label:
+        ImageDraw.Draw(image).text((6, 6), label, fill="white")
+    return image
+
+
+def make_assets(folder, size, seed=0):
+    """Writes card-img/, cache/, resource/, CardList.csv, deck/bench.txt and save/bench.jsonl for size cards."""
+    for sub in ("card-img", "resource", "deck", "save"):
+        os.makedirs(os.path.join(folder, sub), exist_ok=True)
+    rng = random.Random(seed)
+    ids = card_ids(size)
+    ex_ids = set(ids[::15])
+
+    for i, card_id in enumerate(ids):
+        path = os.path.join(folder, "card-img", f"{card_id}.png")
+        if not os.path.exists(path):
+            color = (40 + i * 37 % 200, 40 + i * 91 % 200, 40 + i * 53 % 200)
+            _solid_image(CARD_SOURCE_SIZE, color, card_id).save(path, compress_level=1)
+    resources = {"playmat.png": ((960, 720), "darkgreen"), "reverse.png": ((78, 111), "navy"),
+                 "noimage.png": ((78, 111), "grey"), "unknown.png": ((390, 555), "black")}
+    for name, (image_size, color) in resources.items():
+        path = os.path.join(folder, "resource", name)
+        if not os.path.exists(path):
+            _solid_image(image_size, color).save(path)
+
+    with open(os.path.join(folder, "CardList.csv"), "w", encoding="utf-8") as f:
+        for i, card_id in enumerate(ids):
+            f.write(f"{card_id},ベンチカード{i},{1 if card_id in ex_ids else 0}\n")
+    with open(os.path.join(folder, DECK_FILE), "w", encoding="utf-8") as f:
+        f.writelines(f"{card_id}\n" for card_id in ids if card_id not in ex_ids)
+        f.write("[EX]\n")
+        f.writelines(f"{card_id}\n" for card_id in ids if card_id in ex_ids)
+        f.write("[Resource]\nreverse.png\nplaymat.png\n")
+
+    # Every card on the board, some face down or rotated, plus one marker or chip per ten cards
+    state = GameState(seed=seed)
+    state.load_deck(ids)
+    for card_data in list(state.deck):
+        face_up = rng.random() < 0.8
+        x, y = rng.randrange(0, 960 - 111), rng.randrange(0, 720 - 111)
+        state.commit([state.set_op(card_data, x=x, y=y, face_up=face_up, revealed=face_up),
+                      state.move_op(card_data, "board")], history=False)
+        if rng.random() < 0.2:
+            state.commit([state.rotation_op(card_data, True)], history=False)
+    for i in range(max(1, size // 10)):
+        x, y = rng.randrange(0, 900), rng.randrange(0, 680)
+        if i % 2:
+            state.add_chip(("red", "blue", "green")[i % 3], x, y)
+        else:
+            state.add_marker(x, y, f"+{i}/+{i}")
+    with open(os.path.join(folder, SAVE_FILE), "w", encoding="utf-8") as f:
+        state.save(f)
+
+    # Measure the apps with a warm cache, as after `ShuffleMyriad_Assets.py pack`
+    thumbnails = ThumbnailCache(os.path.join(folder, "card-img"), os.path.join(folder, "cache", "thumbnails"), pack_path=None)
+    thumbnails.build()
+    build_pack(thumbnails, os.path.join(folder, "cache", "cards.pack"))
+
+
+# --- Measurement ---
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples, peak_bytes):
+    samples = sorted(samples)
+    ms = 1000.0
+    return {
+        "n": len(samples),
+        "mean_ms": sum(samples) / len(samples) * ms,
+        "p50_ms": percentile(samples, 0.50) * ms,
+        "p90_ms": percentile(samples, 0.90) * ms,
+        "p99_ms": percentile(samples, 0.99) * ms,
+        "max_ms": samples[-1] * ms,
+        "peak_kb": peak_bytes / 1024,
+    }
+
+
+def measure(fn, repeat, setup=None, settle=None):
+    """Times fn (plus settle, e.g. Tk idle redraws) repeat times, then once more under tracemalloc."""
+    def run():
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        if settle:
+            settle()
+        return time.perf_counter() - start
+
+    samples = [run() for _ in range(repeat)]
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(samples, peak)
+
+
+# --- Scenarios ---
+def bench_core(results, size, repeat):
+    ids = card_ids(size)
+    state = GameState(seed=size)
+    results["core.load_deck"] = measure(lambda: state.load_deck(ids), repeat)
+
+    def load_save():
+        with open(SAVE_FILE, "r", encoding="utf-8") as f:
+            state.load(read_board_save(f))
+    results["core.load_board"] = measure(load_save, repeat)
+    results["core.shuffle"] = measure(lambda: state.shuffle(), repeat, setup=lambda: state.load_deck(ids))
+
+
+def bench_gui(results, size, repeat):
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+    import ShuffleMyriad_Simulator as simulator
+    import ShuffleMyriad_DeckEditor as editor_module
+
+    # Dialogs would block the run; the file dialogs hand back the generated files instead
+    picked = {"path": None}
+    filedialog.askopenfilename = lambda **kwargs: picked["path"]
+    messagebox.showinfo = lambda *args, **kwargs: "ok"
+    messagebox.askyesno = lambda *args, **kwargs: False
+    messagebox.showerror = lambda title, message, **kwargs: print(f"Error dialog: {message}")
+
+    started_at = time.perf_counter()
+    root = tk.Tk()
+    app = simulator.ShuffleMyriadApp(root, started_at)
+
+    def pump(until, timeout=120):
+        deadline = time.perf_counter() + timeout
+        while not until() and time.perf_counter() < deadline:
+            root.update()
+            time.sleep(0.002)
+        return until()
+
+    def images_settled():
+        return not app.image_loads_total and app.resource_future is None
+
+    pump(lambda: app.opponent_window_instance is not None)
+    for stage in ("first interactive frame", "secondary windows open"):
+        recent = app.profiler.recent.get(f"startup:{stage}")
+        if recent:
+            results[f"app.startup.{stage.replace(' ', '_')}"] = summarize(recent, 0)
+    opponent = app.opponent_window_instance
+    settle = root.update_idletasks
+    load_repeat = max(3, repeat // 4)
+
+    picked["path"] = os.path.abspath(DECK_FILE)
+    results["app.load_deck"] = measure(app.load_deck, load_repeat, settle=settle)
+    picked["path"] = os.path.abspath(SAVE_FILE)
+    results["app.load_board"] = measure(app.load_board, load_repeat, settle=settle)
+
+    start = time.perf_counter()
+    if not pump(images_settled):
+        print(f"Warning: card images for {size} cards were still loading after the timeout")
+    results["app.load_board.images_ready"] = summarize([time.perf_counter() - start], 0)
+
+    results["app.draw_cards.idle"] = measure(app.draw_cards, repeat, settle=settle)
+    results["app.draw_cards.full"] = measure(app.draw_cards, repeat, settle=settle,
+                                             setup=app.board_renderer.invalidate_sprites)
+    moving = app.state.on_board[len(app.state.on_board) // 2]
+    step = {"dx": 7}
+
+    def move_one():
+        step["dx"] = -step["dx"]
+        app.state.move_items([moving], step["dx"], 0)
+        app.draw_cards()
+    results["app.draw_cards.move"] = measure(move_one, repeat, settle=settle)
+
+    def full_mirror():
+        opponent.full_sync_needed = True
+    results["opponent._draw_view.full"] = measure(opponent._draw_view, repeat, setup=full_mirror, settle=settle)
+    results["opponent._draw_view.move"] = measure(opponent._draw_view, repeat, setup=move_one, settle=settle)
+
+    editor_window = tk.Toplevel(root)
+    editor = editor_module.DeckEditorApp(editor_window)
+    queries = iter(SEARCH_QUERIES * repeat * 2)
+
+    def search():
+        editor.search_var.set(next(queries))
+        editor._filter_available_cards() # Runs the debounced update now
+    results["editor._filter_available_cards"] = measure(search, repeat, settle=settle)
+
+    app.card_images.executor.shutdown(wait=False)
+    root.destroy()
+
+
+# --- Display ---
+def start_xvfb():
+    """Starts Xvfb on a free display and returns the process, or None if it is not available."""
+    if os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin":
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return None
+    display = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    process = subprocess.Popen([xvfb, f":{display}", "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{display}") and time.time() < deadline:
+        if process.poll() is not None:
+            return None
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{display}"
+    return process
+
+
+def display_available():
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY"))
+
+
+# --- Baseline ---
+def compare_to_baseline(results, baseline, tolerance, floor_ms):
+    """Returns (name, size, baseline p50, current p50) for every clear slowdown."""
+    regressions = []
+    for size, ops in results.items():
+        for name, stats in ops.items():
+            reference = baseline.get(size, {}).get(name)
+            if not reference:
+                continue
+            limit = max(reference["p50_ms"] * (1 + tolerance), reference["p50_ms"] + floor_ms)
+            if stats["p50_ms"] > limit:
+                regressions.append((name, size, reference["p50_ms"], stats["p50_ms"]))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'operation':34} {'cards':>6} {'n':>4} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'peak KiB':>10}")
+    for size, ops in results.items():
+        for name, s in ops.items():
+            print(f"{name:34} {size:>6} {s['n']:>4} {s['p50_ms']:>9.2f} {s['p90_ms']:>9.2f} "
+                  f"{s['p99_ms']:>9.2f} {s['max_ms']:>9.2f} {s['peak_kb']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShuffleMyriad benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=20, help="samples per operation")
+    parser.add_argument("--workdir", help="where synthetic assets are generated and kept between runs")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown, 0.5 = 50%%")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--no-gui", action="store_true", help="only run the GUI-free core benchmarks")
+    args = parser.parse_args(argv)
+
+    xvfb = None if args.no_gui else start_xvfb()
+    gui = not args.no_gui and display_available()
+    if not gui and not args.no_gui:
+        print("Warning: No display and no Xvfb found; running core benchmarks only")
+
+    workdir = os.path.abspath(args.workdir or os.path.join(tempfile.gettempdir(), "shufflemyriad_bench"))
+    results = {}
+    original_dir = os.getcwd()
+    try:
+        for size in args.sizes:
+            folder = os.path.join(workdir, str(size))
+            started = time.perf_counter()
+            make_assets(folder, size)
+            for stale in ("autosave.jsonl", "autosave.journal"):
+                if os.path.exists(os.path.join(folder, "save", stale)):
+                    os.remove(os.path.join(folder, "save", stale))
+            print(f"{size} cards: assets ready in {time.perf_counter() - started:.1f}s ({folder})")
+            # The apps use paths relative to the working directory
+            os.chdir(folder)
+            ops = results[str(size)] = {}
+            bench_core(ops, size, args.repeat)
+            if gui:
+                bench_gui(ops, size, args.repeat)
+            os.chdir(original_dir)
+    finally:
+        os.chdir(original_dir)
+        if xvfb is not None:
+            xvfb.terminate()
+
+    print_results(results)
+    try:
+        import resource
+        print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+    except ImportError:
+        pass
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance, args.floor_ms)
+        for name, size, before, after in regressions:
+            print(f"REGRESSION {name} ({size} cards): p50 {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
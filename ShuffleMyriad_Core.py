@@ -0,0 +1,1128 @@
+import json
+import os
+import random
+import time
+from collections import deque
+from itertools import chain
+
+# Game state shared by the simulator and headless tools. Nothing in this module
+# depends on Tk or PIL, so it can run simulations and batch jobs without a display.
+
+UNDO_LIMIT = 500
+BOARD_WIDTH = 960
+BOARD_HEIGHT = 720
+
+
+def items_bounds(items):
+    if not items:
+        return None
+    min_x = min(item.x for item in items)
+    min_y = min(item.y for item in items)
+    max_x = max(item.x + item.width for item in items)
+    max_y = max(item.y + item.height for item in items)
+    return min_x, min_y, max_x, max_y
+
+
+class SpatialGrid:
+    """Uniform grid over the bounds of board items for hit-testing.
+
+    Every item is stored with its (left, top, right, bottom) bounds and a z
+    value (higher is drawn on top). Point and rectangle queries only look at
+    the grid cells they touch instead of scanning every item.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> set of item keys
+        self.items = {}  # id(ref) -> [ref, bounds, z, cells, generation]
+        self.corners = {}  # (left, top) -> number of items with that top-left corner
+        self.vacated = 0  # Bumped whenever a top-left corner becomes free
+        self.generation = 0
+
+    def _cells_for(self, bounds):
+        left, top, right, bottom = bounds
+        size = self.cell_size
+        return [(column, row)
+                for column in range(int(left) // size, int(right) // size + 1)
+                for row in range(int(top) // size, int(bottom) // size + 1)]
+
+    def begin_sync(self):
+        self.generation += 1
+
+    def update(self, ref, bounds, z):
+        key = id(ref)
+        entry = self.items.get(key)
+        if entry is not None:
+            entry[2] = z
+            entry[4] = self.generation
+            if entry[1] == bounds:
+                return
+            self._unlink(key, entry)
+        cells = self._cells_for(bounds)
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        corner = bounds[:2]
+        self.corners[corner] = self.corners.get(corner, 0) + 1
+        self.items[key] = [ref, bounds, z, cells, self.generation]
+
+    def end_sync(self):
+        # Drops every item that was not updated since begin_sync()
+        for key in [key for key, entry in self.items.items() if entry[4] != self.generation]:
+            self.remove_key(key)
+
+    def remove_key(self, key):
+        entry = self.items.pop(key, None)
+        if entry is not None:
+            self._unlink(key, entry)
+
+    def _unlink(self, key, entry):
+        for cell in entry[3]:
+            keys = self.cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.cells[cell]
+        corner = entry[1][:2]
+        if self.corners.get(corner, 0) > 1:
+            self.corners[corner] -= 1
+        elif self.corners.pop(corner, None) is not None:
+            self.vacated += 1
+
+    def is_corner_taken(self, x, y):
+        return (x, y) in self.corners
+
+    def hit(self, x, y):
+        """Returns the topmost item containing the point, or None."""
+        best, best_z = None, None
+        size = self.cell_size
+        for key in self.cells.get((int(x) // size, int(y) // size), ()):
+            ref, (left, top, right, bottom), z = self.items[key][:3]
+            if left <= x < right and top <= y < bottom and (best_z is None or z > best_z):
+                best, best_z = ref, z
+        return best
+
+    def query_rect(self, x1, y1, x2, y2):
+        """Returns the items touching the rectangle, bottom-most first."""
+        keys = set()
+        for cell in self._cells_for((x1, y1, x2, y2)):
+            keys.update(self.cells.get(cell, ()))
+        found = []
+        for key in keys:
+            ref, (left, top, right, bottom), z = self.items[key][:3]
+            if not (right < x1 or left > x2 or bottom < y1 or top > y2):
+                found.append((z, ref))
+        found.sort(key=lambda pair: pair[0])
+        return [ref for _, ref in found]
+
+
+def fold_into_range(value, low, high):
+    """Reflects value back and forth into [low, high], like a ball bouncing off the edges."""
+    span = high - low
+    if span <= 0:
+        return low
+    offset = (value - low) % (2 * span)
+    return low + (offset if offset <= span else 2 * span - offset)
+
+
+class CascadePlacer:
+    """Deterministic placement of new cards on free cascade slots.
+
+    Slot k of an origin is offset by (10k, 2k) and bounces off the board edges.
+    A slot is free when no card on the board has exactly that top-left corner,
+    which the board SpatialGrid answers with one hash lookup. The last slot used
+    per origin is remembered, so dealing many cards to the same origin does not
+    probe the occupied slots again (amortized O(1) per card). Those hints are
+    only valid while no corner has been vacated; once a card leaves or moves,
+    they are all dropped and the search starts from the origin again, so freed
+    slots are reused.
+    """
+    def __init__(self, index, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT, step=(10, 2)):
+        self.index = index
+        self.board_width = board_width
+        self.board_height = board_height
+        self.step = step
+        self.cursors = {}  # origin -> slot number to try first
+        self.cursors_vacated = index.vacated  # index.vacated when the cursors were valid
+
+    def slot(self, origin, k, width, height):
+        x0, y0 = origin
+        return (fold_into_range(x0 + self.step[0] * k, 0, self.board_width - width),
+                fold_into_range(y0 + self.step[1] * k, 0, self.board_height - height))
+
+    def place(self, card_data, z):
+        """Moves card_data to the first free slot of its current position and indexes it at z."""
+        width, height = (111, 78) if card_data.rotated else (78, 111)
+        card_data.width, card_data.height = width, height
+        x, y = self.free_slot(card_data.x, card_data.y, width, height)
+        card_data.x, card_data.y = x, y
+        self.index.update(card_data, (x, y, x + width, y + height), z)
+
+    def free_slot(self, x, y, width=78, height=111):
+        """Returns the first free slot for a card dropped at (x, y) without touching the index."""
+        origin = self.slot((x, y), 0, width, height)
+        if not self.index.is_corner_taken(*origin):
+            return origin
+
+        if self.cursors_vacated != self.index.vacated:
+            # Slots before a cursor may have been freed since
+            self.cursors.clear()
+            self.cursors_vacated = self.index.vacated
+        k = self.cursors.get(origin, 1)
+        max_slot = k + len(self.index.items) + 1 # Pigeonhole bound on occupied slots
+        while k < max_slot and self.index.is_corner_taken(*self.slot(origin, k, width, height)):
+            k += 1
+        if k == max_slot:
+            print("Warning: No free slot found for card placement. Card may overlap.")
+        # The caller normally takes slot k; if it does not, it is simply probed again next time
+        self.cursors[origin] = k
+        return self.slot(origin, k, width, height)
+
+
+class CardRecord:
+    """One physical card in the deck or on the board.
+
+    Images are not stored here; they are looked up by card id in the shared
+    CardImageStore and sprite cache.
+    """
+    __slots__ = ("id", "uid", "x", "y", "width", "height", "rotated", "face_up", "revealed")
+    type = "card"
+
+    def __init__(self, card_id, uid, x=0, y=0, rotated=False, face_up=True, revealed=True):
+        self.id = card_id
+        self.uid = uid
+        self.x = x
+        self.y = y
+        self.rotated = rotated
+        self.width, self.height = (111, 78) if rotated else (78, 111)
+        self.face_up = face_up
+        self.revealed = revealed
+
+
+class MarkerRecord:
+    """A text marker on the board. Its size follows the text (see layout_marker)."""
+    __slots__ = ("uid", "x", "y", "width", "height", "text", "text_width", "text_height")
+    type = "marker"
+    chip_color = ""
+
+    def __init__(self, uid, x, y, width, height, text=""):
+        self.uid = uid
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.text = text
+        self.text_width = 0
+        self.text_height = 0
+
+
+class ChipRecord(MarkerRecord):
+    """A small colored chip, drawn above the markers."""
+    __slots__ = ("chip_color",)
+    type = "chip"
+
+    def __init__(self, uid, x, y, width, height, text="", chip_color="red"):
+        super().__init__(uid, x, y, width, height, text)
+        self.chip_color = chip_color
+
+
+class Deck:
+    """Cards of a deck in order, top first, keyed by uid.
+
+    The order is a doubly linked list over uids, so taking any copy out of
+    the deck and putting it back next to a known neighbour (insert_after) is
+    O(1), as are the top and bottom. A per-id index answers how many copies
+    of a card are left, and which ones, without scanning. Only numeric
+    positions (insert with a middle index, index) walk the list.
+    """
+    def __init__(self, cards=()):
+        self.reorder(cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        uid = self.head
+        while uid is not None:
+            yield self.cards[uid]
+            uid = self.next[uid]
+
+    def __contains__(self, card_data):
+        return self.cards.get(card_data.uid) is card_data
+
+    def top(self):
+        return None if self.head is None else self.cards[self.head]
+
+    def bottom(self):
+        return None if self.tail is None else self.cards[self.tail]
+
+    def get(self, uid):
+        return self.cards.get(uid)
+
+    def above(self, card_data):
+        """uid of the card directly above card_data, or None if it is the top card."""
+        return self.prev[card_data.uid]
+
+    def count(self, card_id):
+        return len(self.by_id.get(card_id, ()))
+
+    def copies(self, card_id):
+        return list(self.by_id.get(card_id, {}).values())
+
+    def put_top(self, card_data):
+        self.insert_after(None, card_data)
+
+    def put_bottom(self, card_data):
+        self.insert_after(self.tail, card_data)
+
+    def insert_after(self, above_uid, card_data):
+        """Puts card_data directly below the card with uid above_uid, or on top if above_uid is None."""
+        uid = card_data.uid
+        below_uid = self.head if above_uid is None else self.next[above_uid]
+        self.prev[uid], self.next[uid] = above_uid, below_uid
+        if above_uid is None:
+            self.head = uid
+        else:
+            self.next[above_uid] = uid
+        if below_uid is None:
+            self.tail = uid
+        else:
+            self.prev[below_uid] = uid
+        self.cards[uid] = card_data
+        self.by_id.setdefault(card_data.id, {})[uid] = card_data
+
+    def insert(self, index, card_data):
+        if index is None or index >= len(self.cards):
+            self.put_bottom(card_data)
+        elif index <= 0:
+            self.put_top(card_data)
+        else:
+            above_uid = self.head
+            for _ in range(index - 1):
+                above_uid = self.next[above_uid]
+            self.insert_after(above_uid, card_data)
+
+    def remove(self, card_data):
+        uid = card_data.uid
+        del self.cards[uid]
+        above_uid, below_uid = self.prev.pop(uid), self.next.pop(uid)
+        if above_uid is None:
+            self.head = below_uid
+        else:
+            self.next[above_uid] = below_uid
+        if below_uid is None:
+            self.tail = above_uid
+        else:
+            self.prev[below_uid] = above_uid
+        copies = self.by_id[card_data.id]
+        del copies[uid]
+        if not copies:
+            del self.by_id[card_data.id]
+
+    def index(self, card_data):
+        """Position from the top. Walks the deck, so prefer above() for remembering a position."""
+        for index, other in enumerate(self):
+            if other is card_data:
+                return index
+        raise ValueError(f"Card {card_data.uid} is not in the deck")
+
+    def reorder(self, cards):
+        self.cards = {}
+        self.by_id = {} # card id -> {uid: card}
+        self.prev = {} # uid -> uid above, None for the top card
+        self.next = {} # uid -> uid below, None for the bottom card
+        self.head = self.tail = None
+        for card_data in cards:
+            self.put_bottom(card_data)
+
+
+# --- Card list ---
+CARD_LIST_CSV = "CardList.csv"
+
+class CardCatalog:
+    """Card definitions from CardList.csv, one "id,name[,ex]" per line.
+
+    cards maps id -> {"name": name, "ex": "0" or "1"} in file order and
+    ids_by_name maps each name back to its ids, so both directions are one
+    dict lookup. refresh() only re-reads the file when its mtime or size
+    changed, so windows can call it every time they open.
+    """
+    def __init__(self, path=CARD_LIST_CSV):
+        self.path = path
+        self.cards = {}
+        self.ids_by_name = {}
+        self.skipped = [] # Malformed lines of the last read
+        self.stamp = None
+
+    def refresh(self):
+        """Reads the file if it changed since the last read. Returns True if it did; raises OSError if it cannot be read."""
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.stamp:
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._parse(f)
+        self.stamp = stamp
+        return True
+
+    def _parse(self, lines):
+        cards, ids_by_name, skipped = {}, {}, []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(",", 2)
+            if len(parts) < 2:
+                skipped.append(line)
+                continue
+            card_id, name = parts[0].strip(), parts[1].strip()
+            ex = "1" if len(parts) > 2 and parts[2].strip() == "1" else "0"
+            if card_id in cards: # A later line redefines the id
+                previous_ids = ids_by_name[cards[card_id]["name"]]
+                previous_ids.remove(card_id)
+                if not previous_ids:
+                    del ids_by_name[cards[card_id]["name"]]
+            cards[card_id] = {"name": name, "ex": ex}
+            ids_by_name.setdefault(name, []).append(card_id)
+        self.cards, self.ids_by_name, self.skipped = cards, ids_by_name, skipped
+
+    def __contains__(self, card_id):
+        return card_id in self.cards
+
+    def __len__(self):
+        return len(self.cards)
+
+    def name(self, card_id, default=None):
+        props = self.cards.get(card_id)
+        return props["name"] if props else default
+
+    def is_ex(self, card_id):
+        props = self.cards.get(card_id)
+        return props is not None and props["ex"] == "1"
+
+    def ids_for_name(self, name):
+        return self.ids_by_name.get(name, [])
+
+
+# --- Board save files ---
+BOARD_SAVE_FORMAT = "shufflemyriad-board"
+BOARD_SAVE_VERSION = 2 # 2: uids on every record, extra header fields such as life_points
+
+class BoardSave:
+    """Board state read from a save file. Plain values only, no images are touched."""
+    def __init__(self):
+        self.version = 0 # 0 is the legacy "[Resource]" text format
+        self.header = {}
+        self.resources = {}
+        self.deck = []     # deck records, top first
+        self.board = []    # card records, bottom-most first
+        self.markers = []  # marker records
+
+
+def card_record(card_data, kind="card"):
+    record = {"kind": kind, "id": card_data.id, "uid": card_data.uid}
+    if kind == "card":
+        record.update(x=card_data.x, y=card_data.y, rotated=card_data.rotated,
+                      face_up=card_data.face_up, revealed=card_data.revealed)
+    return record
+
+
+def marker_record(marker):
+    return {
+        "kind": "marker", "uid": marker.uid, "type": marker.type, "text": marker.text,
+        "x": marker.x, "y": marker.y, "width": marker.width, "height": marker.height,
+        "chip_color": marker.chip_color,
+    }
+
+
+def write_board_save(file, resources, deck, on_board, markers, **header_fields):
+    """Writes a JSON Lines save: one header record, then one record per deck card, board card and marker."""
+    header = {
+        "format": BOARD_SAVE_FORMAT, "version": BOARD_SAVE_VERSION,
+        "resources": resources,
+        "counts": {"deck": len(deck), "board": len(on_board), "markers": len(markers)},
+    }
+    header.update(header_fields)
+    lines = [header]
+    lines.extend(card_record(card_data, "deck") for card_data in deck)
+    lines.extend(card_record(card_data) for card_data in on_board)
+    lines.extend(marker_record(marker) for marker in markers)
+    for record in lines:
+        file.write(json.dumps(record, ensure_ascii=False))
+        file.write("\n")
+
+
+def read_board_save(file):
+    """Streams a save file into a BoardSave. Both the JSON Lines and the legacy text format are accepted."""
+    lines = (line.strip() for line in file)
+    first = next((line for line in lines if line), "")
+    if not first.startswith("{"):
+        return _read_legacy_board_save(chain([first], lines))
+
+    header = json.loads(first)
+    if header.get("format") != BOARD_SAVE_FORMAT:
+        raise ValueError("盤面データではありません")
+    save = BoardSave()
+    save.header = header
+    save.version = header.get("version", 0)
+    if save.version > BOARD_SAVE_VERSION:
+        raise ValueError(f"未対応のセーブ形式です (version {save.version})")
+    save.resources = header.get("resources", {})
+
+    for line in lines:
+        if not line: continue
+        record = json.loads(line)
+        kind = record.get("kind")
+        if kind == "deck":
+            save.deck.append(record)
+        elif kind == "card":
+            save.board.append(record)
+        elif kind == "marker":
+            save.markers.append(record)
+        # Unknown kinds come from newer minor additions and are skipped
+
+    counts = header.get("counts", {})
+    for name, records in (("deck", save.deck), ("board", save.board), ("markers", save.markers)):
+        if name in counts and counts[name] != len(records):
+            print(f"Warning: save file lists {counts[name]} {name} records but contains {len(records)}")
+    return save
+
+
+def _read_legacy_board_save(lines):
+    save = BoardSave()
+    resource_lines = []
+    section = None
+    for line_content in lines:
+        if not line_content: continue
+        if line_content == "[Resource]": section = "resource"; resource_lines = []; continue
+        elif line_content == "[Deck]": section = "deck"; continue
+        elif line_content == "[Board]": section = "board"; continue
+        elif line_content == "[Markers]": section = "markers"; continue
+
+        if section == "resource":
+            resource_lines.append(line_content)
+        elif section == "deck":
+            save.deck.append({"kind": "deck", "id": line_content})
+        elif section == "board":
+            parts = line_content.split(",")
+            if len(parts) == 6:
+                card_id, x, y, rotated, face_up, revealed = parts
+                save.board.append({
+                    "kind": "card", "id": card_id, "x": int(x), "y": int(y), "rotated": bool(int(rotated)),
+                    "face_up": bool(int(face_up)), "revealed": bool(int(revealed)),
+                })
+        elif section == "markers":
+            parts = line_content.split(",")
+            # The text field was written unescaped, so it is whatever lies between the fixed fields.
+            # Older files had no type and chip color columns; their last field is the numeric height.
+            if len(parts) >= 7 and not parts[-1].lstrip("-").isdigit():
+                marker_type, text = parts[0], ",".join(parts[1:-5])
+                x, y, width, height, chip_color = parts[-5:]
+            elif len(parts) >= 5:
+                marker_type, text = "marker", ",".join(parts[:-4])
+                x, y, width, height = parts[-4:]
+                chip_color = ""
+            else:
+                continue
+            save.markers.append({
+                "kind": "marker", "type": marker_type or "marker", "text": text.replace('\\n', '\n'),
+                "x": int(x), "y": int(y), "width": int(width), "height": int(height),
+                "chip_color": chip_color,
+            })
+
+    if len(resource_lines) >= 1: save.resources["reverse"] = resource_lines[0]
+    if len(resource_lines) >= 2: save.resources["playmat"] = resource_lines[1]
+    return save
+
+
+class BoardJournal:
+    """Autosave made of a snapshot (a normal board save) and an append-only journal.
+
+    Every user action appends one JSON line holding its ops, so keeping the
+    autosave current costs O(change) instead of rewriting the board. After
+    compact_every actions the current state becomes the new snapshot and the
+    journal starts over. Snapshot and journal share a generation stamp, so a
+    crash in the middle of a compaction never replays a journal onto the wrong
+    snapshot.
+    """
+    def __init__(self, folder="save", compact_every=200):
+        self.folder = folder
+        self.snapshot_path = os.path.join(folder, "autosave.jsonl")
+        self.journal_path = os.path.join(folder, "autosave.journal")
+        self.compact_every = compact_every
+        self.file = None
+        self.entries = 0
+
+    @property
+    def active(self):
+        return self.file is not None
+
+    def exists(self):
+        return os.path.exists(self.snapshot_path)
+
+    def read(self):
+        """Returns the snapshot and the op batches journaled after it."""
+        with open(self.snapshot_path, "r", encoding="utf-8") as file:
+            save = read_board_save(file)
+        batches = []
+        if not os.path.exists(self.journal_path):
+            return save, batches
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            lines = (line.strip() for line in file)
+            header = next(lines, "")
+            if not header or json.loads(header).get("generation") != save.header.get("generation"):
+                return save, batches
+            for line in lines:
+                if not line: continue
+                try:
+                    batches.append(json.loads(line)["ops"])
+                except (ValueError, KeyError):
+                    # The last line may be cut short by a crash; everything before it is intact
+                    print(f"Warning: Ignoring incomplete journal entry in {self.journal_path}")
+                    break
+        return save, batches
+
+    def compact(self, write_snapshot):
+        """Writes a new snapshot with write_snapshot(file, generation) and starts an empty journal."""
+        self.close()
+        os.makedirs(self.folder, exist_ok=True)
+        generation = time.time_ns()
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            write_snapshot(file, generation)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.file = open(self.journal_path, "w", encoding="utf-8")
+        self.file.write(json.dumps({"generation": generation}) + "\n")
+        self.file.flush()
+        self.entries = 0
+
+    def append(self, ops):
+        """Journals one action and returns True once a compaction is due."""
+        self.file.write(json.dumps({"ops": ops}, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.entries += 1
+        return self.entries >= self.compact_every
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class RandomStreams:
+    """Named random streams derived from one session seed.
+
+    Event n of a stream always uses random.Random(f"{seed}/{stream}/{n}"), so a
+    result depends only on the seed, the stream and how many events the stream
+    has had. Saves record the seed and the counters, and journaled ops only
+    need the event number to reproduce a shuffle or a die roll.
+    """
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self.counters = {}
+
+    def at(self, stream, count):
+        return random.Random(f"{self.seed}/{stream}/{count}")
+
+    def next_count(self, stream):
+        return self.counters.get(stream, 0)
+
+    def advance(self, stream, count):
+        """Marks event count of stream as used. Never moves a counter back, so undo does not repeat results."""
+        self.counters[stream] = max(self.counters.get(stream, 0), count + 1)
+
+    def next(self, stream):
+        count = self.next_count(stream)
+        self.advance(stream, count)
+        return self.at(stream, count)
+
+    def state(self):
+        return {"seed": self.seed, "counters": dict(self.counters)}
+
+    def restore(self, state):
+        self.seed = state["seed"]
+        self.counters = dict(state.get("counters", {}))
+
+
+class GameState:
+    """Deck, EX deck, board cards, markers and life points, without any GUI.
+
+    Every change is a list of small JSON-able ops passed to commit(), which
+    applies them, records their inverse for undo and appends them to the
+    journal (if any) as one user action. The game actions below (draw,
+    shuffle, rotate, ...) only build ops, so anything they do can be undone,
+    journaled and replayed. Random results come from self.random, so the same
+    seed and the same actions always give the same game.
+    """
+    ZONES = {"deck": "deck", "board": "on_board", "markers": "markers"}
+
+    def __init__(self, journal=None, seed=None, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.deck = Deck()
+        self.ex_deck = Deck()
+        self.on_board = []
+        self.markers = []
+        self.items_by_uid = {} # uid -> card or marker record, for every item in deck, on_board and markers
+        self.next_uid = 1
+        self.life_points = 0
+        self.resources = {"reverse": "reverse.png", "playmat": "playmat.png"}
+        self.journal = journal
+        self.undo_stack = deque(maxlen=UNDO_LIMIT) # (ops, inverse ops) per user action
+        self.redo_stack = []
+        self.card_index = SpatialGrid()
+        self.marker_index = SpatialGrid()
+        self.stack_z = {} # uid -> stacking value of every board card and marker, increasing along its zone list
+        self.card_placer = CascadePlacer(self.card_index, board_width, board_height)
+        self.random = RandomStreams(seed)
+        self.on_life_points_changed = None # Called with the new value after an lp op
+
+    # --- Ops ---
+    def commit(self, ops, history=True):
+        ops = [op for op in ops if op]
+        if not ops:
+            return
+        inverse = [self._apply_op(op) for op in ops]
+        inverse.reverse()
+        if history:
+            self._push_undo(ops, inverse)
+        if self.journal is not None and self.journal.active:
+            try:
+                if self.journal.append(ops):
+                    self.compact_journal()
+            except OSError as e:
+                print(f"Warning: Autosave journal stopped: {e}")
+                self.journal.close()
+
+    def _apply_op(self, op):
+        """Applies one op and returns the op that reverts it."""
+        kind = op["op"]
+        item = None
+        if kind == "set":
+            item = self.items_by_uid[op["uid"]]
+            if item.type == "card":
+                # Clamped in the op itself, so undo, redo and the journal see the position that was shown
+                self._clamp_to_board(op["values"], op["values"].get("width", item.width),
+                                     op["values"].get("height", item.height))
+            inverse = self.set_op(item, **{key: getattr(item, key) for key in op["values"]})
+            for key, value in op["values"].items():
+                setattr(item, key, value)
+            self.reindex(item)
+        elif kind == "move":
+            item = self.items_by_uid[op["uid"]]
+            zone = self.zone_of(item)
+            inverse = dict(self.move_op(item, zone), **self._remove_from_zone(zone, item))
+            self._insert_into_zone(op["zone"], op, item)
+        elif kind == "create":
+            if op["zone"] == "board" and op["item"].get("kind", "card") == "card":
+                self._clamp_to_board(op["item"], *((111, 78) if op["item"].get("rotated") else (78, 111)))
+            item = self.item_from_record(op["item"])
+            inverse = {"op": "remove", "uid": item.uid}
+            self._insert_into_zone(op["zone"], op, item)
+        elif kind == "remove":
+            removed = self.items_by_uid.pop(op["uid"])
+            zone = self.zone_of(removed)
+            record = marker_record(removed) if zone == "markers" else card_record(removed)
+            inverse = {"op": "create", "zone": zone, "index": None, "item": record, **self._remove_from_zone(zone, removed)}
+        elif kind == "order":
+            items = self._zone_items(op["zone"])
+            inverse = {"op": "order", "zone": op["zone"], "uids": [item.uid for item in items]}
+            ordered = [self.items_by_uid[uid] for uid in op["uids"]]
+            if op["zone"] == "deck":
+                self.deck.reorder(ordered)
+            else:
+                setattr(self, self.ZONES[op["zone"]], ordered)
+                self._restack(ordered)
+        elif kind == "shuffle":
+            # Only the stream event is journaled; the order is derived from the seed
+            inverse = {"op": "order", "zone": "deck", "uids": [card_data.uid for card_data in self.deck]}
+            cards = list(self.deck)
+            self.random.at(op["stream"], op["count"]).shuffle(cards)
+            self.random.advance(op["stream"], op["count"])
+            self.deck.reorder(cards)
+        elif kind == "rng":
+            # Dice and coins change nothing on the board; the op only keeps the stream position
+            inverse = op
+            self.random.advance(op["stream"], op["count"])
+        elif kind == "lp":
+            inverse = {"op": "lp", "value": self.life_points}
+            self.life_points = op["value"]
+            if self.on_life_points_changed:
+                self.on_life_points_changed(self.life_points)
+        else:
+            raise ValueError(f"Unknown board operation: {kind}")
+        return inverse
+
+    def _clamp_to_board(self, values, width, height):
+        """Keeps the "x" and "y" entries of values (if present) on the board for a card of that size."""
+        if "x" in values:
+            values["x"] = max(0, min(values["x"], self.board_width - width))
+        if "y" in values:
+            values["y"] = max(0, min(values["y"], self.board_height - height))
+
+    # --- Hit-test indexes ---
+    # Ops only touch the entries of the items they change: a set refreshes bounds, a move,
+    # create or remove (un)indexes one item, and only an order op renumbers its zone.
+    def _index(self, item, z):
+        self.stack_z[item.uid] = z
+        x, y = item.x, item.y
+        bounds = (x, y, x + item.width, y + item.height)
+        if item.type == "card":
+            self.card_index.update(item, bounds, z)
+        else:
+            self.marker_index.update(item, bounds, (item.type == "chip", z)) # Chips always win over markers
+
+    def _unindex(self, item):
+        self.stack_z.pop(item.uid, None)
+        (self.card_index if item.type == "card" else self.marker_index).remove_key(id(item))
+
+    def reindex(self, item):
+        """Refreshes the bounds of a board card or marker, e.g. once a marker's size is known. Deck cards are ignored."""
+        z = self.stack_z.get(item.uid)
+        if z is not None:
+            self._index(item, z)
+
+    def _stack(self, items, index):
+        """Indexes items[index] with a stacking value between its neighbours."""
+        below = self.stack_z[items[index - 1].uid] if index > 0 else None
+        above = self.stack_z[items[index + 1].uid] if index + 1 < len(items) else None
+        if above is None:
+            z = 0 if below is None else below + 1
+        elif below is None:
+            z = above - 1
+        else:
+            z = (below + above) / 2
+            if not below < z < above: # Out of precision after many inserts at one place
+                self._restack(items)
+                return
+        self._index(items[index], z)
+
+    def _restack(self, items):
+        for z, item in enumerate(items):
+            self._index(item, z)
+
+    def _rebuild_indexes(self):
+        self.stack_z = {}
+        for grid, items in ((self.card_index, self.on_board), (self.marker_index, self.markers)):
+            grid.begin_sync()
+            self._restack(items)
+            grid.end_sync()
+
+    def _push_undo(self, ops, inverse):
+        self.redo_stack.clear()
+        if self.undo_stack and all(op["op"] == "lp" for op in ops):
+            last_ops, last_inverse = self.undo_stack[-1]
+            if all(op["op"] == "lp" for op in last_ops):
+                # Typing a number or holding the spinbox is one step, not one per keystroke
+                self.undo_stack[-1] = (ops, last_inverse)
+                return
+        self.undo_stack.append((ops, inverse))
+
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        ops, inverse = self.undo_stack.pop()
+        self.commit(inverse, history=False)
+        self.redo_stack.append((ops, inverse))
+        return True
+
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        ops, inverse = self.redo_stack.pop()
+        self.commit(ops, history=False)
+        self.undo_stack.append((ops, inverse))
+        return True
+
+    def clear_history(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def _zone_items(self, zone):
+        return getattr(self, self.ZONES[zone])
+
+    def zone_of(self, item):
+        if item.type != "card":
+            return "markers"
+        return "deck" if item in self.deck else "board"
+
+    def _insert_into_zone(self, zone, position, item):
+        """Inserts item at position["index"], or in the deck below the card position["after"] if given."""
+        if zone == "deck":
+            if "after" in position:
+                self.deck.insert_after(position["after"], item)
+            else:
+                self.deck.insert(position.get("index"), item)
+            return
+        items = self._zone_items(zone)
+        index = position.get("index")
+        if index is None:
+            items.append(item)
+            index = len(items) - 1
+        else:
+            items.insert(index, item)
+            index = min(index, len(items) - 1)
+        self._stack(items, index)
+
+    def _remove_from_zone(self, zone, item):
+        """Removes item from its zone and returns the position fields of the op that puts it back.
+
+        A deck card is remembered by the uid of the card above it, so pulling any
+        copy out of the deck and undoing that is O(1); board and marker lists
+        use their index.
+        """
+        if zone == "deck":
+            above_uid = self.deck.above(item)
+            self.deck.remove(item)
+            return {"index": None, "after": above_uid}
+        items = self._zone_items(zone)
+        index = items.index(item)
+        del items[index]
+        self._unindex(item)
+        return {"index": index}
+
+    def claim_uid(self, uid=None):
+        if uid is None:
+            uid = self.next_uid
+        self.next_uid = max(self.next_uid, uid + 1)
+        return uid
+
+    def create_card(self, card_id, x=0, y=0, rotated=False, face_up=True, revealed=True, uid=None):
+        card_data = CardRecord(card_id, self.claim_uid(uid), x, y, rotated, face_up, revealed)
+        self.items_by_uid[card_data.uid] = card_data
+        return card_data
+
+    def create_marker(self, record):
+        uid = self.claim_uid(record.get("uid"))
+        if record.get("type") == "chip":
+            marker = ChipRecord(uid, record["x"], record["y"], record["width"], record["height"],
+                                record.get("text", ""), record.get("chip_color") or "red")
+        else:
+            marker = MarkerRecord(uid, record["x"], record["y"], record["width"], record["height"], record.get("text", ""))
+        self.items_by_uid[marker.uid] = marker
+        return marker
+
+    def item_from_record(self, record):
+        if record["kind"] == "marker":
+            return self.create_marker(record)
+        return self.create_card(
+            record["id"], record.get("x", 0), record.get("y", 0), record.get("rotated", False),
+            record.get("face_up", True), record.get("revealed", True), uid=record.get("uid")
+        )
+
+    @staticmethod
+    def set_op(item, **values):
+        return {"op": "set", "uid": item.uid, "values": values}
+
+    @staticmethod
+    def move_op(item, zone, index=None):
+        return {"op": "move", "uid": item.uid, "zone": zone, "index": index}
+
+    def create_op(self, zone, record):
+        record["uid"] = self.claim_uid(record.get("uid"))
+        return {"op": "create", "zone": zone, "index": None, "item": record}
+
+    def rotation_op(self, card_data, rotated):
+        if card_data.rotated == rotated:
+            return None
+        cx = card_data.x + card_data.width / 2
+        cy = card_data.y + card_data.height / 2
+        width, height = (111, 78) if rotated else (78, 111)
+        return self.set_op(card_data, rotated=rotated, width=width, height=height,
+                           x=int(cx - width / 2), y=int(cy - height / 2))
+
+    def deal_ops(self, card_data, x, y, face_up=True):
+        """Ops that take card_data from the deck onto the first free board slot near (x, y)."""
+        x, y = self.card_placer.free_slot(x, y)
+        return [
+            self.set_op(card_data, x=x, y=y, width=78, height=111, rotated=False, face_up=face_up, revealed=face_up),
+            self.move_op(card_data, "board"),
+        ]
+
+    # --- Game actions ---
+    def draw(self, face_up=True, x=600, y=500):
+        """Deals the top card of the deck to the board and returns it, or None if the deck is empty."""
+        card_data = self.deck.top()
+        if card_data is not None:
+            self.commit(self.deal_ops(card_data, x, y, face_up))
+        return card_data
+
+    def take_from_deck(self, card_data, x=600, y=500, face_up=True):
+        self.commit(self.deal_ops(card_data, x, y, face_up))
+        return card_data
+
+    def shuffle(self):
+        self.commit([{"op": "shuffle", "zone": "deck", "stream": "shuffle", "count": self.random.next_count("shuffle")}])
+
+    def roll(self, stream="dice", sides=6):
+        """Rolls 1..sides on stream and journals the result. Not an undo step."""
+        count = self.random.next_count(stream)
+        result = self.random.at(stream, count).randint(1, sides)
+        self.commit([{"op": "rng", "stream": stream, "count": count, "result": result}], history=False)
+        return result
+
+    def roll_dice(self, sides=6):
+        return self.roll("dice", sides)
+
+    def coin_toss(self):
+        """Returns True for heads."""
+        return self.roll("coin", 2) == 1
+
+    def return_to_deck(self, card_data, top=True):
+        if card_data.type != "card" or card_data not in self.on_board:
+            return False
+        self.commit([
+            self.set_op(card_data, face_up=True, rotated=False, revealed=True, width=78, height=111),
+            self.move_op(card_data, "deck", 0 if top else None),
+        ])
+        return True
+
+    def set_face(self, cards, face_up):
+        self.commit([self.set_op(card_data, face_up=face_up, revealed=face_up) for card_data in cards])
+
+    def flip(self, card_data):
+        face_up = not card_data.face_up
+        values = {"face_up": face_up, "revealed": True} if face_up else {"face_up": face_up}
+        self.commit([self.set_op(card_data, **values)])
+
+    def rotate(self, cards):
+        self.commit([self.rotation_op(card_data, not card_data.rotated) for card_data in cards])
+
+    def unrotate(self, cards):
+        self.commit([self.rotation_op(card_data, False) for card_data in cards])
+
+    def gather(self, cards, anchor=None, shuffle=False):
+        """Stacks cards on the center of their bounds, or just above anchor (x, y) if given."""
+        cards = list(cards)
+        if shuffle:
+            count = self.random.next_count("gather")
+            self.random.at("gather", count).shuffle(cards)
+        bounds = items_bounds(cards)
+        if not bounds:
+            return
+        if anchor:
+            center_x, anchor_y = anchor
+        else:
+            min_x, min_y, max_x, max_y = bounds
+            center_x = int((min_x + max_x) / 2)
+            center_y = int((min_y + max_y) / 2)
+
+        ops = []
+        for card_data in cards:
+            target_x = center_x - card_data.width // 2
+            if anchor:
+                target_y = anchor_y - 5 - card_data.height
+            else:
+                target_y = center_y - card_data.height // 2
+            ops.append(self.set_op(card_data, x=max(0, min(target_x, self.board_width - card_data.width)),
+                                   y=max(0, min(target_y, self.board_height - card_data.height))))
+        if shuffle:
+            remaining = [card for card in self.on_board if card not in cards]
+            ops.append({"op": "order", "zone": "board", "uids": [card.uid for card in remaining + cards]})
+            ops.append({"op": "rng", "stream": "gather", "count": count})
+        self.commit(ops)
+
+    def move_items(self, items, dx, dy):
+        """Shifts the items as a group, clamped so the whole group stays on the board."""
+        min_x, min_y, max_x, max_y = items_bounds(items)
+        dx = max(-min_x, min(dx, self.board_width - max_x))
+        dy = max(-min_y, min(dy, self.board_height - max_y))
+        self.commit([self.set_op(item, x=item.x + dx, y=item.y + dy) for item in items])
+
+    def remove(self, item):
+        self.commit([{"op": "remove", "uid": item.uid}])
+
+    def bring_to_front(self, item):
+        self.commit([self.move_op(item, self.zone_of(item))])
+
+    def send_to_back(self, item):
+        self.commit([self.move_op(item, self.zone_of(item), 0)])
+
+    def add_card(self, card_id, x=600, y=500):
+        x, y = self.card_placer.free_slot(x, y)
+        op = self.create_op("board", {"kind": "card", "id": card_id, "x": x, "y": y,
+                                      "rotated": False, "face_up": True, "revealed": True})
+        self.commit([op])
+        return self.items_by_uid[op["item"]["uid"]]
+
+    def add_marker(self, x, y, text=""):
+        op = self.create_op("markers", {"kind": "marker", "type": "marker", "x": x, "y": y,
+                                        "width": 120, "height": 50, "text": text})
+        self.commit([op])
+        return self.items_by_uid[op["item"]["uid"]]
+
+    def add_chip(self, color_name, x, y, size=18):
+        op = self.create_op("markers", {"kind": "marker", "type": "chip", "x": x, "y": y,
+                                        "width": size, "height": size, "text": "", "chip_color": color_name})
+        self.commit([op])
+        return self.items_by_uid[op["item"]["uid"]]
+
+    def set_marker_text(self, marker, text):
+        if text != marker.text and marker.uid in self.items_by_uid:
+            self.commit([self.set_op(marker, text=text)])
+
+    def set_life_points(self, value):
+        if value != self.life_points:
+            self.commit([{"op": "lp", "value": value}])
+
+    def reseed(self, seed):
+        """Starts fresh random streams from seed. Undo history is dropped, since redoing a shuffle
+        would give another order, and the journal gets a new snapshot recording the seed."""
+        self.random = RandomStreams(seed)
+        self.clear_history()
+        self.compact_journal()
+
+    # --- Loading and saving ---
+    def load_deck(self, main_ids, ex_ids=()):
+        """Replaces the deck; EX cards are laid out in rows along the bottom of the board."""
+        self.clear_history()
+        for card_data in self.deck:
+            self.items_by_uid.pop(card_data.uid, None)
+        self.deck = Deck(self.create_card(card_id) for card_id in main_ids)
+        self.ex_deck = Deck(self.create_card(card_id) for card_id in ex_ids)
+
+        x, y = 20, 600
+        for card_data in self.ex_deck:
+            card_data.x, card_data.y = x, y
+            self._insert_into_zone("board", {}, card_data)
+            x += 15
+            if x > 900: x, y = 20, y + 10
+        self.compact_journal()
+
+    def load(self, save, replay=()):
+        """Replaces the whole state with a BoardSave, then replays journaled op batches on top."""
+        self.clear_history()
+        self.items_by_uid = {}
+        self.deck = Deck(self.item_from_record(record) for record in save.deck)
+        for record in save.board:
+            if record.get("kind", "card") == "card":
+                self._clamp_to_board(record, *((111, 78) if record.get("rotated") else (78, 111)))
+        self.on_board = [self.item_from_record(record) for record in save.board]
+        self.markers = [self.item_from_record(record) for record in save.markers]
+        self.ex_deck = Deck()
+        self.resources = dict(self.resources, **save.resources)
+        if "life_points" in save.header:
+            self._apply_op({"op": "lp", "value": save.header["life_points"]})
+        if "random" in save.header:
+            self.random.restore(save.header["random"])
+        self._rebuild_indexes()
+        try:
+            for ops in replay:
+                for op in ops:
+                    self._apply_op(op)
+        except (KeyError, ValueError) as e:
+            print(f"Warning: Autosave journal replay stopped early: {e}")
+        self.compact_journal()
+
+    def save(self, file, **header_fields):
+        write_board_save(file, self.resources, self.deck, self.on_board, self.markers,
+                         life_points=self.life_points, random=self.random.state(), **header_fields)
+
+    def compact_journal(self):
+        if self.journal is None:
+            return
+        try:
+            self.journal.compact(lambda file, generation: self.save(file, generation=generation))
+        except OSError as e:
+            print(f"Warning: Could not write autosave snapshot: {e}")
+            self.journal.close()
@@ -1,12 +1,24 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from PIL import Image, ImageTk
 import os
+import argparse
 import datetime
-import random # For Gacha feature
+import math
+import random
+import re
+from array import array
+from collections import Counter
+from itertools import product
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from ShuffleMyriad_Core import RandomStreams, CardCatalog, CARD_LIST_CSV
+from ShuffleMyriad_Assets import ThumbnailCache, THUMBNAIL_VARIANTS
+from ShuffleMyriad_Widgets import VirtualList
 
 # --- Constants ---
-CARD_LIST_CSV = "CardList.csv"
 CARD_IMG_DIR = "card-img"
 RESOURCE_DIR = "resource"
 DECK_DIR = "deck"
@@ -14,17 +26,148 @@ DEFAULT_REVERSE_CARD = "reverse.png"
 DEFAULT_PLAYMAT = "playmat.png"
 NO_IMAGE_FILE = os.path.join(RESOURCE_DIR, "noimage.png")
 CARD_PREVIEW_SIZE = (390, 555)
+DEFAULT_HAND_SIZE = 5
+PROBABILITY_DEBOUNCE_MS = 150
+SEARCH_DEBOUNCE_MS = 120
+SEARCH_NGRAM = 3
+MC_TRIALS = 1000000 if np is not None else 20000
+MC_BATCH = 50000 if np is not None else 2000
+MC_BATCH_ELEMENTS = 2000000 # Random keys per numpy batch (16 MB), so a batch stays short for any deck size
+
+# --- Draw probability ---
+def parse_draw_conditions(text, catalog):
+    """Parses one condition per line: card ids or names (any of them), optionally followed by ">=k"
+    (spaces around ">=" are allowed). Returns ([(ids, minimum, label)], unknown_tokens)."""
+    conditions, unknown = [], []
+    for line in text.splitlines():
+        tokens = re.sub(r"\s*>=\s*", " >=", line.replace(",", " ")).split()
+        minimum = 1
+        if tokens and tokens[-1].startswith(">="):
+            try:
+                minimum = max(0, int(tokens.pop()[2:]))
+            except ValueError:
+                unknown.append(line.strip())
+                continue
+        ids = set()
+        for token in tokens:
+            if token in catalog:
+                ids.add(token)
+            elif catalog.ids_for_name(token):
+                ids.update(catalog.ids_for_name(token))
+            else:
+                unknown.append(token)
+        if ids:
+            conditions.append((frozenset(ids), minimum, line.strip()))
+    return conditions, unknown
+
+def exact_draw_probability(deck_size, draws, group_sizes, minimums):
+    """Multivariate hypergeometric P(at least minimums[i] cards of each disjoint group in `draws` cards)."""
+    draws = min(draws, deck_size)
+    rest = deck_size - sum(group_sizes)
+    if rest < 0:
+        raise ValueError("groups are larger than the deck")
+    ranges = [range(minimum, min(size, draws) + 1) for size, minimum in zip(group_sizes, minimums)]
+    hits = 0
+    for counts in product(*ranges):
+        taken = sum(counts)
+        if taken > draws:
+            continue
+        ways = math.comb(rest, draws - taken)
+        for size, count in zip(group_sizes, counts):
+            ways *= math.comb(size, count)
+        hits += ways
+    return hits / math.comb(deck_size, draws)
+
+def simulate_draws(deck, draws, conditions, trials=MC_TRIALS, batch=MC_BATCH, seed=None):
+    """Monte Carlo estimate of every condition holding at once. Yields (hits, done) after each batch.
+    With numpy, each batch is a matrix of shuffles: the `draws` smallest of a row of random keys are
+    a uniformly random hand."""
+    draws = min(draws, len(deck))
+    minimums = [minimum for _, minimum, _ in conditions]
+    done = hits = 0
+    if np is not None:
+        batch = max(1, min(batch, MC_BATCH_ELEMENTS // max(1, len(deck))))
+        rng = np.random.default_rng(seed)
+        masks = np.array([[card_id in ids for card_id in deck] for ids, _, _ in conditions], dtype=np.int8)
+        minimums = np.array(minimums)[:, None]
+        while done < trials:
+            size = min(batch, trials - done)
+            keys = rng.random((size, len(deck)))
+            if 0 < draws < len(deck):
+                hands = np.argpartition(keys, draws - 1, axis=1)[:, :draws]
+            else:
+                hands = np.broadcast_to(np.arange(draws), (size, draws))
+            counts = masks[:, hands].sum(axis=2)
+            hits += int((counts >= minimums).all(axis=0).sum())
+            done += size
+            yield hits, done
+    else:
+        rng = random.Random(seed)
+        while done < trials:
+            size = min(batch, trials - done)
+            for _ in range(size):
+                hand = Counter(rng.sample(deck, draws))
+                if all(sum(hand[card_id] for card_id in ids) >= minimum for ids, minimum, _ in conditions):
+                    hits += 1
+            done += size
+            yield hits, done
+
+
+# --- Search ---
+class CardSearchIndex:
+    """Case-insensitive substring search over the display texts, in list order.
+
+    Each text is indexed by its character trigrams; a query only scans the rows
+    of its rarest trigram. A query that contains the previous query only scans
+    the previous result, so typing narrows the result set incrementally.
+    """
+    def __init__(self, texts):
+        self.texts = [text.lower() for text in texts]
+        self.postings = {}
+        for row, text in enumerate(self.texts):
+            for gram in {text[i:i + SEARCH_NGRAM] for i in range(len(text) - SEARCH_NGRAM + 1)}:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array("I")
+                posting.append(row)
+        self.last_query = ""
+        self.last_rows = range(len(self.texts))
+
+    def search(self, query):
+        """Returns the ascending row numbers whose text contains query."""
+        query = query.lower()
+        if not query:
+            rows = range(len(self.texts))
+        else:
+            candidates = range(len(self.texts))
+            if self.last_query and self.last_query in query:
+                candidates = self.last_rows
+            if len(query) >= SEARCH_NGRAM:
+                grams = {query[i:i + SEARCH_NGRAM] for i in range(len(query) - SEARCH_NGRAM + 1)}
+                rarest = min((self.postings.get(gram, ()) for gram in grams), key=len)
+                if len(rarest) < len(candidates):
+                    candidates = rarest
+            texts = self.texts
+            rows = [row for row in candidates if query in texts[row]]
+        self.last_query, self.last_rows = query, rows
+        return rows
+
 
 class DeckEditorApp:
-    def __init__(self, root_window):
+    def __init__(self, root_window, seed=None):
         self.root = root_window
         try:
             self.root.geometry("1280x800")
         except tk.TclError:
              print("初期ウィンドウサイズを設定できませんでした。デフォルトサイズを使用します。") # Japanese
 
+        self.catalog = CardCatalog(CARD_LIST_CSV)
         self.card_definitions = {}
+        self.thumbnails = ThumbnailCache(CARD_IMG_DIR)
         self.available_cards_display = [] # Now stores (f"{card_id} - {card_name}", card_id)
+        self._available_ids = [] # Card id of each row of available_cards_display
+        self.search_index = CardSearchIndex([])
+        self._search_job = None
 
         self.main_deck = []
         self.ex_deck = []
@@ -33,12 +176,17 @@ class DeckEditorApp:
         self.reverse_card_name = tk.StringVar(value=DEFAULT_REVERSE_CARD)
         self.playmat_name = tk.StringVar(value=DEFAULT_PLAYMAT)
         self.unsaved_changes = False
+        self._probability_job = None
+        self._simulation_job = None
+        self.random = RandomStreams(seed) # For Gacha feature
+        self.deck_comments = [] # "#" lines of the deck file, e.g. the seed of a gacha deck
 
         self._create_missing_dirs()
         self._load_card_definitions()
         self._load_no_image_placeholder()
         self._setup_ui()
         self._update_all_displays()
+        self.root.bind("<FocusIn>", self._reload_card_definitions_if_changed, add="+")
         self._update_window_title()
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
 
@@ -77,32 +225,35 @@ class DeckEditorApp:
             print(f"{NO_IMAGE_FILE} の読み込みエラー: {e}") # Japanese
 
     def _load_card_definitions(self):
-        self.card_definitions = {}
-        self.available_cards_display = []
         try:
-            with open(CARD_LIST_CSV, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    parts = line.split(",", 2)
-                    if len(parts) >= 2:
-                        card_id, card_name = parts[0].strip(), parts[1].strip()
-                        ex_type = "0"
-                        if len(parts) > 2:
-                            val = parts[2].strip()
-                            if val == "1":
-                                ex_type = "1"
-
-                        self.card_definitions[card_id] = {"name": card_name, "ex": ex_type}
-                        self.available_cards_display.append((f"{card_id} - {card_name}", card_id))
-                    else:
-                        print(f"{CARD_LIST_CSV} 内の不正な行をスキップします: {line}") # Japanese
-            self.available_cards_display.sort()
+            self.catalog.refresh()
         except FileNotFoundError:
             messagebox.showerror("エラー", f"{CARD_LIST_CSV} が見つかりません！") # Japanese
         except Exception as e:
             messagebox.showerror("エラー", f"{CARD_LIST_CSV} の読み込みエラー: {e}") # Japanese
+        self._apply_card_definitions()
+
+    def _reload_card_definitions_if_changed(self, event=None):
+        """Picks up edits to CardList.csv made while the editor is open; one stat when nothing changed."""
+        try:
+            changed = self.catalog.refresh()
+        except FileNotFoundError:
+            return # Already reported at startup
+        except Exception as e:
+            print(f"{CARD_LIST_CSV} の再読み込みエラー: {e}") # Japanese
+            return
+        if changed:
+            self._apply_card_definitions()
+            self._update_all_displays()
+
+    def _apply_card_definitions(self):
+        for line in self.catalog.skipped:
+            print(f"{CARD_LIST_CSV} 内の不正な行をスキップします: {line}") # Japanese
+        self.card_definitions = self.catalog.cards
+        self.available_cards_display = sorted((f"{card_id} - {props['name']}", card_id)
+                                              for card_id, props in self.card_definitions.items())
+        self._available_ids = [card_id for _, card_id in self.available_cards_display]
+        self.search_index = CardSearchIndex([display_text for display_text, _ in self.available_cards_display])
 
     def _setup_ui(self):
         menubar = tk.Menu(self.root)
@@ -114,6 +265,7 @@ class DeckEditorApp:
         filemenu.add_command(label="名前を付けてデッキを保存...", command=self.save_deck_as) # Japanese
         filemenu.add_separator()
         filemenu.add_command(label="ガチャデッキ生成 (100枚)", command=self.generate_gacha_deck_action) # Japanese
+        filemenu.add_command(label="ガチャのシードを指定...", command=self.set_gacha_seed_action) # Japanese
         filemenu.add_separator()
         filemenu.add_command(label="終了", command=self._on_closing) # Japanese
         menubar.add_cascade(label="ファイル", menu=filemenu) # Japanese
@@ -129,15 +281,12 @@ class DeckEditorApp:
         available_frame.pack(side="left", fill="both", expand=True, padx=5)
 
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", lambda *args: self._filter_available_cards())
+        self.search_var.trace_add("write", lambda *args: self._schedule_filter())
         search_entry = ttk.Entry(available_frame, textvariable=self.search_var, width=30)
         search_entry.pack(fill="x", pady=(0,5))
 
-        self.available_listbox = tk.Listbox(available_frame, exportselection=False, width=40)
+        self.available_listbox = self._create_card_list(available_frame)
         self.available_listbox.pack(side="left", fill="both", expand=True)
-        available_scrollbar = ttk.Scrollbar(available_frame, orient="vertical", command=self.available_listbox.yview)
-        available_scrollbar.pack(side="right", fill="y")
-        self.available_listbox.config(yscrollcommand=available_scrollbar.set)
         self.available_listbox.bind("<<ListboxSelect>>", lambda e: self._on_listbox_select(self.available_listbox))
 
         add_buttons_frame = tk.Frame(main_frame, padx=10)
@@ -150,14 +299,30 @@ class DeckEditorApp:
         deck_frame = tk.Frame(main_frame)
         deck_frame.pack(side="left", fill="both", expand=True, padx=5)
 
+        probability_frame = ttk.LabelFrame(deck_frame, text="ドロー確率 (メインデッキ)", padding=5) # Japanese
+        probability_frame.pack(side="bottom", fill="x", pady=(5,0))
+        draw_count_frame = tk.Frame(probability_frame)
+        draw_count_frame.pack(fill="x")
+        self.hand_size_var = tk.StringVar(value=str(DEFAULT_HAND_SIZE))
+        self.turn_var = tk.StringVar(value="1")
+        ttk.Label(draw_count_frame, text="初期手札:").pack(side="left") # Japanese
+        ttk.Spinbox(draw_count_frame, from_=0, to=60, width=4, textvariable=self.hand_size_var).pack(side="left", padx=(0,10))
+        ttk.Label(draw_count_frame, text="ターン:").pack(side="left") # Japanese
+        ttk.Spinbox(draw_count_frame, from_=1, to=60, width=4, textvariable=self.turn_var).pack(side="left")
+        self.hand_size_var.trace_add("write", self._schedule_probability_update)
+        self.turn_var.trace_add("write", self._schedule_probability_update)
+        ttk.Label(probability_frame, text="条件 (1行に1つ: カードIDまたは名前をスペース区切り、末尾に >=枚数 で枚数指定)").pack(anchor="w", pady=(5,0)) # Japanese
+        self.condition_text = tk.Text(probability_frame, height=3, width=40)
+        self.condition_text.pack(fill="x")
+        self.condition_text.bind("<KeyRelease>", self._schedule_probability_update)
+        self.probability_label = ttk.Label(probability_frame, justify="left", anchor="w")
+        self.probability_label.pack(fill="x", pady=(5,0))
+
         main_deck_frame = ttk.LabelFrame(deck_frame, text="メインデッキ (0)", padding=5) # Japanese
         main_deck_frame.pack(fill="both", expand=True, pady=(0,5))
         self.main_deck_label = main_deck_frame
-        self.main_deck_listbox = tk.Listbox(main_deck_frame, exportselection=False, width=40)
+        self.main_deck_listbox = self._create_card_list(main_deck_frame)
         self.main_deck_listbox.pack(side="left", fill="both", expand=True)
-        main_deck_scrollbar = ttk.Scrollbar(main_deck_frame, orient="vertical", command=self.main_deck_listbox.yview)
-        main_deck_scrollbar.pack(side="right", fill="y")
-        self.main_deck_listbox.config(yscrollcommand=main_deck_scrollbar.set)
         self.main_deck_listbox.bind("<<ListboxSelect>>", lambda e: self._on_listbox_select(self.main_deck_listbox))
         ttk.Button(main_deck_frame, text="ソート", command=lambda: self._sort_deck(self.main_deck, self.main_deck_listbox)).pack(side="bottom", fill="x", pady=(5,0)) # Japanese
 
@@ -165,11 +330,8 @@ class DeckEditorApp:
         ex_deck_frame = ttk.LabelFrame(deck_frame, text="EXデッキ (0)", padding=5) # Japanese
         ex_deck_frame.pack(fill="both", expand=True, pady=(5,0))
         self.ex_deck_label = ex_deck_frame
-        self.ex_deck_listbox = tk.Listbox(ex_deck_frame, exportselection=False, width=40)
+        self.ex_deck_listbox = self._create_card_list(ex_deck_frame)
         self.ex_deck_listbox.pack(side="left", fill="both", expand=True)
-        ex_deck_scrollbar = ttk.Scrollbar(ex_deck_frame, orient="vertical", command=self.ex_deck_listbox.yview)
-        ex_deck_scrollbar.pack(side="right", fill="y")
-        self.ex_deck_listbox.config(yscrollcommand=ex_deck_scrollbar.set)
         self.ex_deck_listbox.bind("<<ListboxSelect>>", lambda e: self._on_listbox_select(self.ex_deck_listbox))
         ttk.Button(ex_deck_frame, text="ソート", command=lambda: self._sort_deck(self.ex_deck, self.ex_deck_listbox)).pack(side="bottom", fill="x", pady=(5,0)) # Japanese
 
@@ -191,26 +353,29 @@ class DeckEditorApp:
         self.status_bar = ttk.Label(self.root, text="新規デッキ", relief="sunken", anchor="w", padding=2) # Japanese
         self.status_bar.pack(side="bottom", fill="x")
 
+    def _create_card_list(self, parent):
+        return VirtualList(parent, text=self._card_label, width=40, height=4,
+                           thumbnail=lambda card_id: self.thumbnails.get(card_id, "list"),
+                           thumbnail_key=lambda card_id: card_id, thumbnail_size=THUMBNAIL_VARIANTS["list"][0])
+
+    def _card_label(self, card_id):
+        name = self.card_definitions.get(card_id, {}).get("name", "不明なカード") # Japanese
+        return f"{card_id} - {name}"
+
+    def _schedule_filter(self):
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._filter_available_cards)
+
     def _filter_available_cards(self):
-        current_selection_indices = self.available_listbox.curselection()
-        selected_text_to_restore = None
-        if current_selection_indices:
-            selected_text_to_restore = self.available_listbox.get(current_selection_indices[0])
-
-        filter_text = self.search_var.get().lower()
-        self.available_listbox.delete(0, tk.END)
-        new_selection_index = -1
-        current_idx = 0
-        for display_text, card_id in self.available_cards_display:
-            if filter_text in display_text.lower():
-                self.available_listbox.insert(tk.END, display_text)
-                if selected_text_to_restore and display_text == selected_text_to_restore:
-                    new_selection_index = current_idx
-                current_idx +=1
-
-        if new_selection_index != -1:
-            self.available_listbox.selection_set(new_selection_index)
-            self.available_listbox.see(new_selection_index)
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        rows = self.search_index.search(self.search_var.get())
+        self.available_listbox.set_items([self._available_ids[row] for row in rows], keep_selection=True)
+        selection = self.available_listbox.curselection()
+        if selection:
+            self.available_listbox.see(selection[0])
 
     def _on_listbox_select(self, listbox_widget):
         for lb in [self.available_listbox, self.main_deck_listbox, self.ex_deck_listbox]:
@@ -222,14 +387,7 @@ class DeckEditorApp:
             self._update_card_preview(None)
             return
 
-        selected_item_text = listbox_widget.get(selection_indices[0])
-
-        card_id = None
-        parts = selected_item_text.split(" - ", 1)
-        if len(parts) > 0:
-            card_id = parts[0]
-
-        self._update_card_preview(card_id)
+        self._update_card_preview(listbox_widget.get(selection_indices[0]))
 
     def _update_card_preview(self, card_id):
         if not card_id or card_id not in self.card_definitions:
@@ -239,18 +397,17 @@ class DeckEditorApp:
                 self.card_preview_label.config(image='', text="画像なし") # Japanese
             return
 
-        image_path = os.path.join(CARD_IMG_DIR, f"{card_id}.png")
         try:
-            img = Image.open(image_path)
-            img = img.resize(CARD_PREVIEW_SIZE, Image.Resampling.LANCZOS)
+            img = self.thumbnails.get(card_id, "preview")
+            if img is None:
+                if self.no_image_photo:
+                    self.card_preview_label.config(image=self.no_image_photo)
+                else:
+                    self.card_preview_label.config(image='', text="画像不明") # Japanese
+                return
             photo_img = ImageTk.PhotoImage(img)
             self.card_preview_label.image = photo_img
             self.card_preview_label.config(image=photo_img)
-        except FileNotFoundError:
-            if self.no_image_photo:
-                self.card_preview_label.config(image=self.no_image_photo)
-            else:
-                self.card_preview_label.config(image='', text="画像不明") # Japanese
         except Exception as e:
             print(f"カードID {card_id} のプレビュー読み込みエラー: {e}") # Japanese
             if self.no_image_photo:
@@ -259,14 +416,62 @@ class DeckEditorApp:
                 self.card_preview_label.config(image='', text="読込エラー") # Japanese
 
     def _update_listbox_from_deck(self, listbox, deck_list_ref):
-        listbox.delete(0, tk.END)
-        for card_id in deck_list_ref:
-            name = self.card_definitions.get(card_id, {}).get("name", "不明なカード") # Japanese
-            listbox.insert(tk.END, f"{card_id} - {name}")
+        listbox.set_items(deck_list_ref) # Rows are drawn from the list itself when they scroll into view
 
     def _update_deck_counts(self):
         self.main_deck_label.config(text=f"メインデッキ ({len(self.main_deck)})") # Japanese
         self.ex_deck_label.config(text=f"EXデッキ ({len(self.ex_deck)})") # Japanese
+        self._schedule_probability_update()
+
+    def _schedule_probability_update(self, *args):
+        if self._probability_job is not None:
+            self.root.after_cancel(self._probability_job)
+        self._probability_job = self.root.after(PROBABILITY_DEBOUNCE_MS, self._update_probabilities)
+
+    def _update_probabilities(self):
+        self._probability_job = None
+        if self._simulation_job is not None:
+            self.root.after_cancel(self._simulation_job)
+            self._simulation_job = None
+
+        try:
+            draws = int(self.hand_size_var.get()) + int(self.turn_var.get()) - 1
+        except ValueError:
+            self.probability_label.config(text="初期手札とターンには数値を入力してください。") # Japanese
+            return
+        deck = list(self.main_deck)
+        draws = max(0, min(draws, len(deck)))
+        conditions, unknown = parse_draw_conditions(self.condition_text.get("1.0", tk.END), self.catalog)
+
+        lines = [f"ターン{self.turn_var.get()}までに見る枚数: {draws} / {len(deck)}"] # Japanese
+        if unknown:
+            lines.append(f"不明なカード: {', '.join(unknown)}") # Japanese
+        if not deck or not conditions:
+            self.probability_label.config(text="\n".join(lines))
+            return
+
+        counts = Counter(deck)
+        group_sizes = [sum(counts[card_id] for card_id in ids) for ids, _, _ in conditions]
+        for (ids, minimum, label), size in zip(conditions, group_sizes):
+            lines.append(f"{label}: {exact_draw_probability(len(deck), draws, [size], [minimum]):.2%}")
+
+        if len(conditions) > 1:
+            all_ids = [card_id for ids, _, _ in conditions for card_id in ids]
+            if len(all_ids) == len(set(all_ids)):
+                exact = exact_draw_probability(len(deck), draws, group_sizes, [minimum for _, minimum, _ in conditions])
+                lines.append(f"すべて満たす: {exact:.2%}") # Japanese
+            else:
+                lines.append("すべて満たす: 条件が重複しているためシミュレーションのみ") # Japanese
+            self._probability_lines = lines
+            self._simulation = simulate_draws(deck, draws, conditions)
+            self._simulation_job = self.root.after(1, self._step_simulation)
+        self.probability_label.config(text="\n".join(lines))
+
+    def _step_simulation(self):
+        hits, done = next(self._simulation)
+        result = f"シミュレーション: {hits / done:.2%} ({done:,}回)" # Japanese
+        self.probability_label.config(text="\n".join(self._probability_lines + [result]))
+        self._simulation_job = self.root.after(1, self._step_simulation) if done < MC_TRIALS else None
 
     def _update_status_bar(self):
         file_name = os.path.basename(self.current_file_path) if self.current_file_path else "新規デッキ" # Japanese
@@ -292,11 +497,7 @@ class DeckEditorApp:
     def _get_selected_card_id_from_available(self):
         selection_indices = self.available_listbox.curselection()
         if not selection_indices: return None
-        selected_item_text = self.available_listbox.get(selection_indices[0])
-        parts = selected_item_text.split(" - ", 1)
-        if len(parts) > 0:
-            return parts[0]
-        return None
+        return self.available_listbox.get(selection_indices[0])
 
 
     def _add_auto(self):
@@ -384,23 +585,18 @@ class DeckEditorApp:
         current_selection_indices = listbox_widget.curselection()
         selected_card_id_to_restore = None
         if current_selection_indices:
-            selected_text = listbox_widget.get(current_selection_indices[0])
-            parts = selected_text.split(" - ", 1)
-            if len(parts) > 0:
-                selected_card_id_to_restore = parts[0]
+            selected_card_id_to_restore = listbox_widget.get(current_selection_indices[0])
 
         deck_list_ref.sort()
         self._update_listbox_from_deck(listbox_widget, deck_list_ref)
         self.set_unsaved_changes(True)
 
         if selected_card_id_to_restore:
-            for i, item_text_in_listbox in enumerate(listbox_widget.get(0, tk.END)):
-                listbox_item_parts = item_text_in_listbox.split(" - ", 1)
-                if len(listbox_item_parts) > 0 and listbox_item_parts[0] == selected_card_id_to_restore:
-                    listbox_widget.selection_set(i)
-                    listbox_widget.see(i)
-                    self._on_listbox_select(listbox_widget)
-                    return
+            i = deck_list_ref.index(selected_card_id_to_restore)
+            listbox_widget.selection_set(i)
+            listbox_widget.see(i)
+            self._on_listbox_select(listbox_widget)
+            return
 
         if listbox_widget.size() > 0:
             listbox_widget.selection_set(0)
@@ -417,6 +613,7 @@ class DeckEditorApp:
 
         self.main_deck = []
         self.ex_deck = []
+        self.deck_comments = []
         self.current_file_path = None
         self.reverse_card_name.set(DEFAULT_REVERSE_CARD)
         self.playmat_name.set(DEFAULT_PLAYMAT)
@@ -437,10 +634,11 @@ class DeckEditorApp:
 
         try:
             with open(file_path, "r", encoding="utf-8") as f: lines = [line.strip() for line in f]
-            new_main_deck, new_ex_deck, resource_lines, current_section = [], [], [], "main"
+            new_main_deck, new_ex_deck, resource_lines, comments, current_section = [], [], [], [], "main"
             for line in lines:
                 if not line: continue
-                if line == "[EX]": current_section = "ex"
+                if line.startswith("#"): comments.append(line)
+                elif line == "[EX]": current_section = "ex"
                 elif line == "[Resource]": current_section = "resource"
                 elif current_section == "main":
                     if line in self.card_definitions: new_main_deck.append(line)
@@ -450,7 +648,7 @@ class DeckEditorApp:
                     else: print(f"警告: EXデッキのカードID '{line}' は {CARD_LIST_CSV} に存在しません。スキップします。") # Japanese
                 elif current_section == "resource": resource_lines.append(line)
 
-            self.main_deck, self.ex_deck = new_main_deck, new_ex_deck
+            self.main_deck, self.ex_deck, self.deck_comments = new_main_deck, new_ex_deck, comments
             self.reverse_card_name.set(resource_lines[0] if len(resource_lines) > 0 else DEFAULT_REVERSE_CARD)
             self.playmat_name.set(resource_lines[1] if len(resource_lines) > 1 else DEFAULT_PLAYMAT)
             self.current_file_path = file_path
@@ -473,6 +671,8 @@ class DeckEditorApp:
                 f.write("[Resource]\n")
                 f.write(f"{self.reverse_card_name.get() or DEFAULT_REVERSE_CARD}\n")
                 f.write(f"{self.playmat_name.get() or DEFAULT_PLAYMAT}\n")
+                # After the resource lines, where older versions of both apps ignore them
+                for comment in self.deck_comments: f.write(f"{comment}\n")
             self.current_file_path = file_path
             self.set_unsaved_changes(False)
             self._update_status_bar()
@@ -515,7 +715,9 @@ class DeckEditorApp:
             return
 
         new_main_deck, new_ex_deck = [], []
-        temp_gacha_pull = random.choices(gacha_eligible_cards, k=100)
+        gacha_count = self.random.next_count("gacha")
+        temp_gacha_pull = self.random.at("gacha", gacha_count).choices(sorted(gacha_eligible_cards), k=100)
+        self.random.advance("gacha", gacha_count)
         for card_id in temp_gacha_pull:
             props = self.card_definitions.get(card_id)
             if props and props.get("ex") == "1": new_ex_deck.append(card_id)
@@ -523,13 +725,27 @@ class DeckEditorApp:
 
         new_main_deck.sort(); new_ex_deck.sort()
         self.main_deck, self.ex_deck = new_main_deck, new_ex_deck
+        # Written into the deck file, so the same pull can be made again from the seed
+        self.deck_comments = [f"# gacha seed={self.random.seed} pull={gacha_count + 1}"]
+        print(f"Gacha deck: seed {self.random.seed}, pull {gacha_count + 1}")
         self.current_file_path = None # Gacha deck is a new unsaved deck
         self.reverse_card_name.set(DEFAULT_REVERSE_CARD)
         self.playmat_name.set(DEFAULT_PLAYMAT)
         self.set_unsaved_changes(True)
         self._update_all_displays()
+        self.status_bar.config(text=f"{self.status_bar.cget('text')} | ガチャ: シード {self.random.seed} / {gacha_count + 1}回目") # Japanese
         messagebox.showinfo("ガチャデッキ", "100枚のガチャデッキが正常に生成されました！") # Japanese
 
+    def set_gacha_seed_action(self):
+        seed = simpledialog.askinteger(
+            "ガチャのシード", f"現在のシード: {self.random.seed}\n" # Japanese
+                            "新しいシードを入力してください (同じシードとCardList.csvから同じ順番でガチャデッキを再現できます)", # Japanese
+            parent=self.root, minvalue=0)
+        if seed is not None:
+            self.random = RandomStreams(seed)
+            self._update_status_bar()
+            self.status_bar.config(text=f"{self.status_bar.cget('text')} | ガチャ: シード {seed}") # Japanese
+
     def _on_closing(self):
         if self.unsaved_changes:
             response = messagebox.askyesnocancel("終了", "未保存の変更があります。終了する前に保存しますか？") # Japanese
@@ -545,6 +761,9 @@ class DeckEditorApp:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ShuffleMyriad Deck Editor")
+    parser.add_argument("--seed", type=int, help="seed of the gacha deck generator (random if omitted)")
+    args = parser.parse_args()
     root = tk.Tk()
-    app = DeckEditorApp(root)
+    app = DeckEditorApp(root, seed=args.seed)
     root.mainloop()
\ No newline at end of file
@@ -2,26 +2,56 @@ import tkinter as tk
 from tkinter import messagebox, filedialog, simpledialog
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import os
-import random
 import sys
+import argparse
+import csv
+import json
+import queue
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time
+from ShuffleMyriad_Core import GameState, BoardJournal, CardCatalog, items_bounds, read_board_save
+from ShuffleMyriad_Assets import ThumbnailCache, THUMBNAIL_VARIANTS
+from ShuffleMyriad_Widgets import VirtualList
 
 # --- Helper Functions (can be outside classes or static methods) ---
+DEFAULT_CONFIG = {
+    "opponent_refresh_rate": 120,
+    "profiler": 0, # 1 starts with the profiler overlay on (F12 toggles it, Shift+F12 writes the samples)
+}
+
 def load_config(config_file="config.cfg"):
-    default_opponent_refresh_rate = 120
+    """Returns DEFAULT_CONFIG updated with the key=value lines of config_file."""
+    config = dict(DEFAULT_CONFIG)
     if not os.path.exists(config_file):
-        print(f"{config_file} not found. Using default refresh rate: {default_opponent_refresh_rate}")
-        return default_opponent_refresh_rate
+        print(f"{config_file} not found. Using default settings: {config}")
+        return config
     try:
         with open(config_file, "r") as f:
             for line in f:
-                if line.startswith("opponent_refresh_rate"):
-                    _, value = line.strip().split("=")
-                    return int(value)
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, value = (part.strip() for part in line.split("=", 1))
+                if key not in DEFAULT_CONFIG:
+                    print(f"Warning: Unknown setting '{key}' in {config_file}")
+                    continue
+                try:
+                    config[key] = int(value)
+                except ValueError:
+                    print(f"Warning: Setting '{key}' in {config_file} must be a number, using {config[key]}")
     except Exception as e:
-        print(f"Error reading {config_file}: {e}. Using default refresh rate: {default_opponent_refresh_rate}")
-    return default_opponent_refresh_rate
+        print(f"Error reading {config_file}: {e}. Using default settings: {config}")
+    return config
+
+DRAG_FRAME_MS = 16 # Drag updates are coalesced to about one per display frame
+DECK_PREFETCH = 10 # Cards from the top of the deck decoded ahead of being drawn
+PROFILER_INPUT_TAG = "ProfilerInput" # Bind tag put in front of every widget's own tags while profiling
+PROFILER_OVERLAY_MS = 500
 
 def center_tk_window(parent_root, window, width, height):
     """Centers a Tkinter window relative to its parent or screen."""
@@ -57,23 +87,647 @@ def draw_text_with_outline(draw, position, text, font, text_color, outline_color
                 draw.text((text_x + dx, text_y + dy), text, font=font, fill=outline_color)
     draw.text((text_x, text_y), text, font=font, fill=text_color)
 
+CHIP_COLORS = {
+    "red": (220, 53, 69, 220),
+    "blue": (13, 110, 253, 220),
+    "yellow": (255, 193, 7, 220),
+    "green": (25, 135, 84, 220),
+    "white": (245, 245, 245, 230),
+}
+
+_FONT_CACHE = {}
+
+def get_font(size):
+    """Loads YuGothB.ttc at the given size once per process (default font if it is missing)."""
+    font = _FONT_CACHE.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("YuGothB.ttc", size)
+        except IOError:
+            font = ImageFont.load_default()
+        _FONT_CACHE[size] = font
+    return font
+
+_MEASURE_DRAW = None
+
+@lru_cache(maxsize=1024)
+def measure_text(text, size=14):
+    global _MEASURE_DRAW
+    if _MEASURE_DRAW is None:
+        _MEASURE_DRAW = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    try:
+        bbox = _MEASURE_DRAW.textbbox((0, 0), text, font=get_font(size))
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    except Exception as e:
+        print(f"Could not get textbbox for marker text '{text}': {e}")
+        return 0, 0
+
+def layout_marker(marker):
+    """Updates the marker's size fields from its text and returns the sprite margin."""
+    text = marker.text
+    text_width, text_height = measure_text(text) if text else (0, 0)
+    marker.text_width = text_width
+    marker.text_height = text_height
+    if marker.type != "chip":
+        marker.width = max(text_width + 20, 120)
+        marker.height = max(text_height + 10, 50)
+    # Text on small chips may overflow the chip, so the sprite gets a transparent margin.
+    if not text:
+        return 0
+    return max(0, (text_width - marker.width) // 2, (text_height - marker.height) // 2) + 8
+
+def render_marker_sprite(marker_type, text, chip_color_name, mw, mh, text_width, text_height, pad):
+    font = get_font(14)
+    sprite = Image.new("RGBA", (mw + 1 + 2 * pad, mh + 1 + 2 * pad), (255, 255, 255, 0))
+    draw_pil = ImageDraw.Draw(sprite)
+    if marker_type == "chip":
+        chip_fill = CHIP_COLORS.get(chip_color_name, CHIP_COLORS["white"])
+        draw_pil.ellipse([pad, pad, pad + mw, pad + mh], fill=chip_fill, outline=(60, 60, 60, 255), width=2)
+        if text:
+            text_color = "black" if chip_color_name in ["yellow", "white"] else "white"
+            draw_text_with_outline(draw_pil, (pad, pad), text, font,
+                                   text_color, "black", 1,
+                                   mw, mh, text_width, text_height)
+    else:
+        draw_pil.rectangle([pad, pad, pad + mw, pad + mh], fill=(128, 128, 128, 128))
+        if text:
+            draw_text_with_outline(draw_pil, (pad, pad), text, font,
+                                   "black", "white", 2,
+                                   mw, mh, text_width, text_height)
+    return sprite
+
+
+def decode_resource_images(reverse_path, playmat_path):
+    """Opens and resizes the reverse and playmat images. Safe to run on a worker thread.
+
+    Returns a dict with the PIL images that could be loaded; missing files are left out.
+    """
+    decoded = {}
+    try:
+        reverse_pil = Image.open(reverse_path).resize((78, 111))
+        decoded["reverse"] = reverse_pil
+        decoded["reverse_rotated"] = reverse_pil.rotate(90, expand=True).resize((111, 78))
+    except FileNotFoundError:
+        print(f"Warning: Reverse card image not found at {reverse_path}")
+    try:
+        decoded["playmat"] = Image.open(playmat_path).resize((960, 720))
+    except FileNotFoundError:
+        print(f"Warning: Playmat image not found at {playmat_path}")
+    return decoded
+
+
+def decode_placeholder_images(noimage_path, unknown_path):
+    """Decodes the stand-ins for missing and unrevealed cards. Safe to run on a worker thread."""
+    decoded = {}
+    try:
+        decoded["noimage"] = Image.open(noimage_path).resize((78, 111))
+        decoded["noimage_large"] = decoded["noimage"].resize((390, 555))
+    except FileNotFoundError:
+        print("Warning: 'noimage.png' not found in resource folder.")
+    try:
+        decoded["unknown"] = Image.open(unknown_path).resize((390, 555))
+    except FileNotFoundError:
+        print("Warning: 'unknown.png' not found in resource folder.")
+    return decoded
+
+
+class CardImageEntry:
+    """Board images of one card id, read from the thumbnail cache the first time they are needed.
+
+    Loading normally happens on a CardImageStore worker thread; asking for a
+    board image on the Tk thread before the worker is done waits for it
+    instead of loading twice. The 390x555 preview is only read on request.
+    """
+    def __init__(self, card_id, thumbnails):
+        self.card_id = card_id
+        self.thumbnails = thumbnails
+        self.missing = False
+        self.future = None
+        self._board_images = None # {rotated: PIL image}
+        self._preview = None
+
+    @property
+    def ready(self):
+        return self._board_images is not None or self.missing
+
+    def board_image(self, rotated):
+        future = self.future
+        if future is not None:
+            future.result()
+        if not self.ready:
+            self._decode()
+        return None if self.missing else self._board_images[rotated]
+
+    def preview_image(self):
+        if self._preview is None and not self.missing:
+            try:
+                self._preview = self.thumbnails.get(self.card_id, "preview")
+            except Exception as e:
+                print(f"Error decoding card image {self.card_id}: {e}")
+        return self._preview
+
+    def _decode(self):
+        try:
+            images = self.thumbnails.get_many(self.card_id, ("board", "board_rotated"))
+        except Exception as e:
+            print(f"Error decoding card image {self.thumbnails.source_path(self.card_id)}: {e}")
+            images = None
+        if images is None:
+            self.missing = True
+        else:
+            self._board_images = {False: images["board"], True: images["board_rotated"]}
+
+    def load_in_worker(self):
+        self._decode()
+
+
+class CardImageStore:
+    """One CardImageEntry per card id, shared by every copy of that card.
+
+    prefetch() decodes entries on a thread pool. Finished entries are queued
+    and handed back to the Tk thread by take_completed(), which the app polls
+    with after(). At most max_entries ids keep their decoded images; the least
+    recently used are dropped and read from the thumbnail cache again if needed.
+    """
+    def __init__(self, image_dir="card-img", max_workers=4, max_entries=512):
+        self.image_dir = image_dir
+        self.thumbnails = ThumbnailCache(image_dir)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="card-img")
+        self.completed = queue.SimpleQueue()
+
+    def entry(self, card_id):
+        entry = self.entries.get(card_id)
+        if entry is not None:
+            self.entries.move_to_end(card_id)
+            return entry
+        entry = CardImageEntry(card_id, self.thumbnails)
+        self.entries[card_id] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False) # A worker still decoding it keeps its own reference
+        return entry
+
+    def prefetch(self, card_ids):
+        """Schedules decoding of the given ids and returns how many new jobs were queued."""
+        scheduled = 0
+        for card_id in card_ids:
+            entry = self.entry(card_id)
+            if entry.ready or entry.future is not None:
+                continue
+            entry.future = self.executor.submit(self._load, entry)
+            scheduled += 1
+        return scheduled
+
+    def _load(self, entry):
+        try:
+            entry.load_in_worker()
+        finally:
+            self.completed.put(entry)
+
+    def take_completed(self):
+        done = []
+        while True:
+            try:
+                entry = self.completed.get_nowait()
+            except queue.Empty:
+                return done
+            entry.future = None
+            done.append(entry)
+
+
+class SpriteCache:
+    """Shared LRU cache of card PhotoImages.
+
+    Keys are (card_id, rotated, face_up, variant), so every copy of a card on the
+    board, in the opponent mirror and in the preview windows reuses one bitmap.
+    Entries are evicted least recently used first once the cached pixel count
+    exceeds max_pixels. Callers that keep showing an image hold their own
+    reference, so eviction never blanks an item that is still on screen.
+    """
+    def __init__(self, max_pixels=16_000_000):
+        self.max_pixels = max_pixels
+        self.entries = OrderedDict()  # key -> (PhotoImage, pixel count)
+        self.pixels = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        photo = build()
+        if photo is not None:
+            cost = photo.width() * photo.height()
+            self.entries[key] = (photo, cost)
+            self.pixels += cost
+            while self.pixels > self.max_pixels and len(self.entries) > 1:
+                _, (_, evicted_cost) = self.entries.popitem(last=False)
+                self.pixels -= evicted_cost
+        return photo
+
+    def clear(self):
+        self.entries.clear()
+        self.pixels = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "pixels": self.pixels}
+
+
+class FrameProfiler:
+    """Timings of redraw phases and of input-to-paint latency.
+
+    Code under test is wrapped in `with profiler.phase(name):`; while the
+    profiler is off that is a shared no-op context. Samples go to a bounded
+    ring buffer for export, and the last few per name feed the overlay.
+    """
+    def __init__(self, max_samples=50000, recent=120):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.samples = deque(maxlen=max_samples) # (name, category, start, end) in perf_counter seconds
+        self.recent = {}
+        self.recent_size = recent
+        self.pending_input = None # (name, start) of the oldest input not painted yet
+        self._idle = nullcontext()
+
+    def phase(self, name, category="render"):
+        if not self.enabled:
+            return self._idle
+        return _ProfiledPhase(self, name, category)
+
+    def record(self, name, category, start, end):
+        self.samples.append((name, category, start, end))
+        recent = self.recent.get(name)
+        if recent is None:
+            recent = self.recent[name] = deque(maxlen=self.recent_size)
+        recent.append(end - start)
+
+    def mark_input(self, name):
+        """Returns True if this input starts a new latency measurement."""
+        if not self.enabled or self.pending_input is not None:
+            return False
+        self.pending_input = (name, time.perf_counter())
+        return True
+
+    def input_painted(self):
+        if self.pending_input is not None:
+            name, start = self.pending_input
+            self.pending_input = None
+            self.record(f"input:{name}", "input", start, time.perf_counter())
+
+    def summary(self, name):
+        """(p50, p95, max) in milliseconds of the recent samples of name, or None."""
+        return _latency_summary(self.recent.get(name, ()))
+
+    def input_summary(self):
+        return _latency_summary(chain.from_iterable(
+            values for name, values in self.recent.items() if name.startswith("input:")))
+
+    def write_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "category", "start_ms", "duration_ms"])
+            for name, category, start, end in self.samples:
+                writer.writerow([name, category, f"{(start - self.origin) * 1000:.3f}", f"{(end - start) * 1000:.3f}"])
+
+    def write_chrome_trace(self, path):
+        """Writes the samples as complete events for chrome://tracing or Perfetto."""
+        events = [
+            {"name": name, "cat": category, "ph": "X", "pid": 1, "tid": 2 if category == "input" else 1,
+             "ts": round((start - self.origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+            for name, category, start, end in self.samples
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _latency_summary(durations):
+    ordered = sorted(durations)
+    if not ordered:
+        return None
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+    return pick(0.5), pick(0.95), ordered[-1] * 1000
+
+
+class _ProfiledPhase:
+    __slots__ = ("profiler", "name", "category", "start")
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter())
+        return False
+
+
+class RenderedItem:
+    """Canvas items and last drawn state for one card or marker."""
+    def __init__(self, ref, image_item):
+        self.ref = ref
+        self.image_item = image_item
+        self.outline_item = None
+        self.sprite_key = None
+        self.photo = None
+        self.offset = (0, 0)
+        self.position = None
+        self.outline = None
+
+
+class BoardChanges:
+    """Items touched by a render pass, to be replayed by another view (the opponent mirror)."""
+    def __init__(self):
+        self.updated = {}    # (kind, id(ref)) -> ref, kind is "card" or "marker"
+        self.removed = set() # (kind, id(ref))
+        self.restacked = False
+
+    def __bool__(self):
+        return bool(self.updated or self.removed or self.restacked)
+
+    def merge(self, other):
+        for key in other.removed:
+            self.updated.pop(key, None)
+            self.removed.add(key)
+        for key, ref in other.updated.items():
+            self.updated[key] = ref
+            self.removed.discard(key)
+        self.restacked = self.restacked or other.restacked
+
+
+def ordered_markers(markers):
+    # Chips are always drawn above normal markers.
+    return [m for m in markers if m.type != "chip"] + \
+           [m for m in markers if m.type == "chip"]
+
+
+class BoardRenderer:
+    """Retained-mode renderer for the board canvas.
+
+    Keeps one canvas item per card and marker. Each render pass compares the
+    state of every item with what was drawn last time and only issues
+    coords/itemconfig/tag_raise calls for the items that are dirty. The pass
+    returns a BoardChanges describing what it touched.
+    """
+    def __init__(self, canvas, width=960, height=720):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.playmat_item = None
+        self.playmat_photo = None
+        self.items = {"card": {}, "marker": {}}  # kind -> id(ref) -> RenderedItem
+        self.order = []         # (kind, id(ref)) from bottom to top, as last rendered
+        self.stacking = []      # canvas item ids from bottom to top, as last raised
+
+    @property
+    def card_items(self):
+        return self.items["card"]
+
+    @property
+    def marker_items(self):
+        return self.items["marker"]
+
+    def set_playmat(self, photo):
+        if photo is self.playmat_photo and self.playmat_item is not None:
+            return
+        self.playmat_photo = photo
+        if self.playmat_item is None:
+            self.playmat_item = self.canvas.create_image(0, 0, image=photo or "", anchor="nw")
+            self.canvas.tag_lower(self.playmat_item)
+        else:
+            self.canvas.itemconfig(self.playmat_item, image=photo or "")
+
+    def invalidate_sprites(self, card_ids=None):
+        # Forces items to fetch their sprite again on the next pass (e.g. new reverse image,
+        # or a card image that finished loading). Without card_ids every item is invalidated.
+        if card_ids is None:
+            for item in list(self.card_items.values()) + list(self.marker_items.values()):
+                item.sprite_key = None
+            return
+        for item in self.card_items.values():
+            if item.ref.id in card_ids:
+                item.sprite_key = None
+
+    def card_sprite_key(self, card_data):
+        return (card_data.id, bool(card_data.rotated), bool(card_data.face_up))
+
+    def marker_sprite_key(self, marker):
+        sprite_key = (marker.type, marker.text, marker.chip_color)
+        if marker.type == "chip":
+            sprite_key += (marker.width, marker.height)
+        return sprite_key
+
+    def item_position(self, ref, offset):
+        return (ref.x + offset[0], ref.y + offset[1])
+
+    def render(self, cards, markers, selected_card, selected_cards, card_sprite, marker_sprite):
+        """Brings the canvas in line with the given board state and returns the BoardChanges.
+
+        card_sprite(card_data) and marker_sprite(marker) return the PhotoImage for an
+        item and its (dx, dy) offset from the item position. They are only called
+        when the item's sprite key changed.
+        """
+        changes = BoardChanges()
+        selected_ids = {id(card_data) for card_data in selected_cards}
+
+        order = []
+        for card_data in cards:
+            key = id(card_data)
+            if card_data is selected_card:
+                outline = ("red", 3)
+            elif key in selected_ids:
+                outline = ("blue", 2)
+            else:
+                outline = None
+            self._sync_item("card", card_data, card_sprite, outline, changes)
+            order.append(("card", key))
+
+        for marker in ordered_markers(markers):
+            outline = ("red", 3) if marker is selected_card else None
+            self._sync_item("marker", marker, marker_sprite, outline, changes)
+            order.append(("marker", id(marker)))
+
+        seen = set(order)
+        for kind, items in self.items.items():
+            for key in [key for key in items if (kind, key) not in seen]:
+                self._drop_item(kind, key)
+                changes.removed.add((kind, key))
+
+        if order != self.order:
+            changes.restacked = True
+            self.order = order
+        self._restack_order()
+        return changes
+
+    def apply_changes(self, changes, cards, markers, card_sprite, marker_sprite):
+        """Updates only the items named in changes, e.g. the main board's last render passes."""
+        for kind, key in changes.removed:
+            self._drop_item(kind, key)
+        created = False
+        for (kind, key), ref in changes.updated.items():
+            created = created or key not in self.items[kind]
+            self._sync_item(kind, ref, card_sprite if kind == "card" else marker_sprite, None, None)
+        if changes.restacked or created:
+            self.order = [("card", id(card_data)) for card_data in cards] + \
+                         [("marker", id(marker)) for marker in ordered_markers(markers)]
+            self._restack_order()
+
+    def _sync_item(self, kind, ref, sprite_fn, outline, changes):
+        items = self.items[kind]
+        key = id(ref)
+        item = items.get(key)
+        changed = False
+        if item is None:
+            item = RenderedItem(ref, self.canvas.create_image(0, 0, anchor="nw"))
+            items[key] = item
+            changed = True
+        item.ref = ref
+
+        sprite_key = self.card_sprite_key(ref) if kind == "card" else self.marker_sprite_key(ref)
+        if item.sprite_key != sprite_key:
+            photo, item.offset = sprite_fn(ref)
+            item.sprite_key = sprite_key
+            changed = True
+            if photo is not item.photo:
+                item.photo = photo
+                self.canvas.itemconfig(item.image_item, image=photo or "")
+
+        position = self.item_position(ref, item.offset)
+        if item.position != position:
+            item.position = position
+            self.canvas.coords(item.image_item, *position)
+            changed = True
+
+        x, y = ref.x, ref.y
+        bounds = (x, y, x + ref.width, y + ref.height)
+        if outline is None:
+            if item.outline_item is not None:
+                self.canvas.delete(item.outline_item)
+                item.outline_item = None
+                item.outline = None
+        elif item.outline_item is None:
+            item.outline_item = self.canvas.create_rectangle(*bounds, outline=outline[0], width=outline[1])
+            item.outline = (outline, bounds)
+        elif item.outline != (outline, bounds):
+            self.canvas.coords(item.outline_item, *bounds)
+            self.canvas.itemconfig(item.outline_item, outline=outline[0], width=outline[1])
+            item.outline = (outline, bounds)
+
+        if changed and changes is not None:
+            changes.updated[(kind, key)] = ref
+        return item
+
+    def move_items(self, refs, dx, dy):
+        """Shifts the canvas items of the given cards/markers without a render pass."""
+        for ref in refs:
+            item = self.card_items.get(id(ref)) or self.marker_items.get(id(ref))
+            if item is None:
+                continue
+            self.canvas.move(item.image_item, dx, dy)
+            item.position = (item.position[0] + dx, item.position[1] + dy)
+            if item.outline_item is not None:
+                self.canvas.move(item.outline_item, dx, dy)
+                outline, (left, top, right, bottom) = item.outline
+                item.outline = (outline, (left + dx, top + dy, right + dx, bottom + dy))
+
+    def _drop_item(self, kind, key):
+        item = self.items[kind].pop(key, None)
+        if item is None:
+            return
+        self.canvas.delete(item.image_item)
+        if item.outline_item is not None:
+            self.canvas.delete(item.outline_item)
+
+    def _restack_order(self):
+        stacking = []
+        for kind, key in self.order:
+            item = self.items[kind].get(key)
+            if item is None:
+                continue
+            stacking.append(item.image_item)
+            if item.outline_item is not None:
+                stacking.append(item.outline_item)
+        self._restack(stacking)
+
+    def _restack(self, stacking):
+        if stacking == self.stacking:
+            return
+        # Items that kept their place at the bottom (or the top) of the stack are left alone;
+        # only the rest is raised (or lowered) again.
+        current = set(stacking)
+        previous = [canvas_item for canvas_item in self.stacking if canvas_item in current]
+        limit = min(len(stacking), len(previous))
+        prefix = 0
+        while prefix < limit and stacking[prefix] == previous[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and stacking[-1 - suffix] == previous[-1 - suffix]:
+            suffix += 1
+        if suffix > prefix:
+            for canvas_item in reversed(stacking[:len(stacking) - suffix]):
+                self.canvas.tag_lower(canvas_item)
+            if self.playmat_item is not None:
+                self.canvas.tag_lower(self.playmat_item)
+        else:
+            for canvas_item in stacking[prefix:]:
+                self.canvas.tag_raise(canvas_item)
+        self.stacking = stacking
+
+
+class MirrorRenderer(BoardRenderer):
+    """Renderer for the opponent's point-mirrored view of the board.
+
+    Cards in the hand area (y > 440) are shown face down, and selection
+    outlines are never drawn.
+    """
+    def __init__(self, canvas, image_store, width=960, height=720):
+        super().__init__(canvas, width, height)
+        self.image_store = image_store
+
+    def card_sprite_key(self, card_data):
+        face_up = bool(card_data.face_up) and not self.is_hidden_in_hand(card_data)
+        ready = self.image_store.entry(card_data.id).ready
+        return (card_data.id, bool(card_data.rotated), face_up and ready)
+
+    def is_hidden_in_hand(self, card_data):
+        return card_data.y > 440
+
+    def item_position(self, ref, offset):
+        mirrored_x = self.width - (ref.x + ref.width)
+        mirrored_y = self.height - (ref.y + ref.height)
+        return (mirrored_x + offset[0], mirrored_y + offset[1])
+
+
 class ShuffleMyriadApp:
-    def __init__(self, root):
+    def __init__(self, root, started_at=None, seed=None):
         self.root = root
-        self.opponent_refresh_rate = load_config()
-
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.config = load_config()
+        self.opponent_refresh_rate = self.config["opponent_refresh_rate"]
+        self.profiler = FrameProfiler()
+        self.profiler_label = None
+
+        # The whole game state lives in the GUI-independent core; this class is a view on it
+        self.state = GameState(journal=BoardJournal("save"), seed=seed)
+        self.state.on_life_points_changed = self._show_life_points
         self._setup_main_window()
 
-        self.deck = []
-        self.ex_deck = []
-        self.on_board = []
-        self.markers = []
         self.selected_card = None
         self.selected_cards = []
         self.is_dragging = False
         self.is_selecting = False
-        self.drag_offset_x = 0
-        self.drag_offset_y = 0
+        self.drag_items = []        # Items moved by the current drag (one card/marker or the selected group)
+        self.drag_start = None      # Pointer position at the start of the drag
+        self.drag_pointer = None    # Latest pointer position, applied once per frame
+        self.drag_applied = (0, 0)  # Offset already applied to the canvas items
+        self.drag_frame_job = None
         self.selection_start = None
         self.selection_end = None
         self.selection_rect_id = None
@@ -81,7 +735,17 @@ class ShuffleMyriadApp:
 
         self.last_displayed_image = None # For InfoWindow
         self.life_points = tk.IntVar(value=0)
-
+        self.life_points.trace_add("write", self._on_life_points_changed)
+
+        self.card_images = CardImageStore("card-img")
+        self.card_catalog = CardCatalog() # Read when a window first needs card names
+        self.sprite_cache = SpriteCache()
+        self.resource_future = None
+        self.placeholder_future = None
+        self._placeholder_images = None
+        self.image_loads_total = 0
+        self.image_loads_done = 0
+        self.load_poll_scheduled = False
         self._load_default_images()
         self._setup_ui_elements()
         self._bind_events()
@@ -92,7 +756,11 @@ class ShuffleMyriadApp:
         self.marker_edit_window_instance = None
         
         self.draw_cards()
-        self.root.after(100, self._show_initial_windows)
+        if self.config["profiler"]:
+            self.toggle_profiler()
+        self._log_startup("main window built")
+        # Runs once the main window has been laid out and painted
+        self.root.after_idle(self._on_first_frame)
 
 
     def _setup_main_window(self):
@@ -102,56 +770,18 @@ class ShuffleMyriadApp:
         self.root.resizable(False, False)
         self.canvas = tk.Canvas(self.root, width=960, height=720, bg="white")
         self.canvas.pack()
+        self.board_renderer = BoardRenderer(self.canvas)
 
     def _load_default_images(self):
-        self.playmat_path = os.path.join("resource", "playmat.png")
-        try:
-            self.playmat_image_pil = Image.open(self.playmat_path).resize((960, 720))
-            self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
-        except FileNotFoundError:
-            self.playmat_image_pil = Image.new("RGB", (960,720), "lightgrey")
-            self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
-            print(f"Warning: Playmat image not found at {self.playmat_path}")
-
-
-        self.reverse_image_path = os.path.join("resource", "reverse.png")
-        try:
-            self.reverse_image_pil = Image.open(self.reverse_image_path).resize((78, 111))
-            self.reverse_photo_image = ImageTk.PhotoImage(self.reverse_image_pil)
-            self.reverse_rotated_image_pil = self.reverse_image_pil.rotate(90, expand=True).resize((111, 78))
-            self.reverse_rotated_photo_image = ImageTk.PhotoImage(self.reverse_rotated_image_pil)
-        except FileNotFoundError:
-            self.reverse_image_pil = None
-            self.reverse_photo_image = None
-            self.reverse_rotated_image_pil = None
-            self.reverse_rotated_photo_image = None
-            print(f"Warning: Reverse card image not found at {self.reverse_image_path}")
-
-        noimage_path = os.path.join("resource", "noimage.png")
-        try:
-            self.noimage_pil = Image.open(noimage_path).resize((78, 111))
-            self.noimage_photo_image = ImageTk.PhotoImage(self.noimage_pil)
-            self.noimage_large_pil = self.noimage_pil.resize((390, 555))
-            self.noimage_large_photo_image = ImageTk.PhotoImage(self.noimage_large_pil)
-        except FileNotFoundError:
-            self.noimage_pil = None
-            self.noimage_photo_image = None
-            self.noimage_large_pil = None
-            self.noimage_large_photo_image = None
-            print(f"Warning: 'noimage.png' not found in resource folder.")
-
-
-        unknown_image_path = os.path.join("resource", "unknown.png")
-        try:
-            self.unknown_image_pil = Image.open(unknown_image_path).resize((390, 555))
-            self.unknown_photo_image = ImageTk.PhotoImage(self.unknown_image_pil)
-        except FileNotFoundError:
-            self.unknown_image_pil = None
-            self.unknown_photo_image = None
-            print(f"Warning: 'unknown.png' not found in resource folder.")
-            if self.noimage_large_photo_image: # Fallback to noimage if unknown is missing
-                 self.unknown_photo_image = self.noimage_large_photo_image
-
+        # Nothing is decoded here: the playmat and card back arrive from the worker pool right after
+        # the first frame, noimage/unknown are decoded in the background or on first use.
+        self.playmat_image_pil = None
+        self.playmat_photo = None
+        self.reverse_image_pil = None
+        self.reverse_photo_image = None
+        self.reverse_rotated_image_pil = None
+        self.reverse_rotated_photo_image = None
+        self._load_resource_images_async(os.path.join("resource", "reverse.png"), os.path.join("resource", "playmat.png"))
 
         # Buttons that appear on card selection
         self.reverse_button = None
@@ -182,13 +812,16 @@ class ShuffleMyriadApp:
         )
         life_spinbox.pack(side="top", padx=5, pady=2)
 
-        self.deck_count_label = tk.Label(bottom_left_frame, text=f"デッキ: {len(self.deck)}枚", font=("Arial", 10))
+        self.deck_count_label = tk.Label(bottom_left_frame, text=f"デッキ: {len(self.state.deck)}枚", font=("Arial", 10))
         self.deck_count_label.pack(side="top", padx=5, pady=2)
 
+        self.load_progress_label = tk.Label(bottom_left_frame, text="", font=("Arial", 9), fg="gray25")
+        self.load_progress_label.pack(side="top", padx=5)
+
         gacha_button_frame = tk.Frame(bottom_left_frame)
         gacha_button_frame.pack(side="top", padx=5, pady=2)
         
-        gacha_buttons_config = [("コイントス", self.coin_toss), ("6面ダイス", self.roll_dice)]
+        gacha_buttons_config = [("コイントス", self.coin_toss), ("6面ダイス", self.roll_dice), ("シード", self.change_seed)]
         for i, (text, command) in enumerate(gacha_buttons_config):
             btn = tk.Button(gacha_button_frame, text=text, command=command)
             btn.grid(row=0, column=i, padx=2, pady=2)
@@ -251,10 +884,75 @@ class ShuffleMyriadApp:
         self.root.bind("<Control-f>", lambda event: self.bring_to_front())
         self.root.bind("<Control-r>", lambda event: self.send_to_back())
         self.root.bind("<Control-c>", self._copy_card_id_to_clipboard)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Z>", lambda event: self.redo())
+        self.root.bind("<F12>", lambda event: self.toggle_profiler())
+        self.root.bind("<Shift-F12>", lambda event: self.dump_profile())
+        for sequence, name in (("<ButtonPress>", "press"), ("<B1-Motion>", "drag"),
+                               ("<ButtonRelease>", "release"), ("<KeyPress>", "key")):
+            self.root.bind_class(PROFILER_INPUT_TAG, sequence, lambda event, name=name: self._on_profiled_input(name))
+
+    # --- Startup ---
+    def _log_startup(self, stage):
+        now = time.perf_counter()
+        self.profiler.record(f"startup:{stage}", "startup", self.started_at, now)
+        print(f"Startup: {stage} at {(now - self.started_at) * 1000:.0f} ms")
+
+    def _on_first_frame(self):
+        self._log_startup("first interactive frame")
+        self.placeholder_future = self.card_images.executor.submit(
+            decode_placeholder_images, os.path.join("resource", "noimage.png"), os.path.join("resource", "unknown.png"))
+        # One step per idle turn, so input between them is handled right away
+        self.root.after_idle(self._show_initial_windows)
 
     def _show_initial_windows(self):
-        self.open_info_window()
-        self.open_opponent_window()
+        self._start_autosave()
+        self._log_startup("autosave ready")
+        self.root.after_idle(self._open_initial_window, [self.open_info_window, self.open_opponent_window])
+
+    def _open_initial_window(self, openers):
+        openers[0]()
+        if openers[1:]:
+            self.root.after_idle(self._open_initial_window, openers[1:])
+        else:
+            self._log_startup("secondary windows open")
+
+    def _placeholders(self):
+        """noimage/unknown images; waits for the background decode if it has not finished yet."""
+        if self._placeholder_images is None:
+            if self.placeholder_future is not None:
+                decoded = self.placeholder_future.result()
+            else:
+                decoded = decode_placeholder_images(os.path.join("resource", "noimage.png"),
+                                                    os.path.join("resource", "unknown.png"))
+            noimage = decoded.get("noimage")
+            images = {
+                "noimage_pil": noimage,
+                "noimage_photo_image": ImageTk.PhotoImage(noimage) if noimage else None,
+                "noimage_large_photo_image": ImageTk.PhotoImage(decoded["noimage_large"]) if noimage else None,
+            }
+            unknown = decoded.get("unknown")
+            # Fallback to noimage if unknown is missing
+            images["unknown_photo_image"] = ImageTk.PhotoImage(unknown) if unknown else images["noimage_large_photo_image"]
+            self._placeholder_images = images
+        return self._placeholder_images
+
+    @property
+    def noimage_pil(self):
+        return self._placeholders()["noimage_pil"]
+
+    @property
+    def noimage_photo_image(self):
+        return self._placeholders()["noimage_photo_image"]
+
+    @property
+    def noimage_large_photo_image(self):
+        return self._placeholders()["noimage_large_photo_image"]
+
+    @property
+    def unknown_photo_image(self):
+        return self._placeholders()["unknown_photo_image"]
 
     def _update_dynamic_buttons_visibility(self):
         # Hide existing buttons first
@@ -278,8 +976,9 @@ class ShuffleMyriadApp:
                     text="選択カードをまとめてシャッフル",
                     command=lambda: self.gather_selected_cards(shuffle=True)
                 )
+                if self.profiler.enabled: self._instrument_inputs(self.root)
 
-            bounds = self._get_cards_bounds(self.selected_cards)
+            bounds = items_bounds(self.selected_cards)
             if bounds:
                 min_x, _, max_x, max_y = bounds
                 if self.multi_action_anchor is None:
@@ -301,14 +1000,15 @@ class ShuffleMyriadApp:
                     current_x += button.winfo_reqwidth() + padding
             return
 
-        if self.selected_card and self.selected_card not in self.markers and not self.is_dragging:
+        if self.selected_card and self.selected_card not in self.state.markers and not self.is_dragging:
             if not self.reverse_button: # Create if not exists
                 self.reverse_button = tk.Button(self.root, text="リバース", command=self.reverse_card)
                 self.bring_to_front_button = tk.Button(self.root, text="最前面", command=self.bring_to_front)
                 self.send_to_back_button = tk.Button(self.root, text="最背面", command=self.send_to_back)
+                if self.profiler.enabled: self._instrument_inputs(self.root)
 
-            button_x = self.selected_card["x"] + self.selected_card["width"] // 2 - 22 # Approx center
-            button_y = self.selected_card["y"] + self.selected_card["height"] + 5
+            button_x = self.selected_card.x + self.selected_card.width // 2 - 22 # Approx center
+            button_y = self.selected_card.y + self.selected_card.height + 5
 
             self.reverse_button.place(x=button_x, y=button_y)
             self.bring_to_front_button.place(x=button_x - 50, y=button_y) # Adjust relative positions as needed
@@ -316,135 +1016,205 @@ class ShuffleMyriadApp:
 
 
     def draw_cards(self):
-        self.canvas.delete("all")
-        if self.playmat_photo:
-            self.canvas.create_image(0, 0, image=self.playmat_photo, anchor="nw")
-
-        # Draw cards
-        for card_data in self.on_board:
-            x = max(0, min(card_data.get("x", 0), 960 - card_data.get("width", 78)))
-            y = max(0, min(card_data.get("y", 0), 720 - card_data.get("height", 111)))
-            card_data["x"], card_data["y"] = x, y # Update stored position
-
-            img_to_draw = None
-            if card_data.get("face_up", True):
-                if card_data.get("original_image"): # PIL Image
-                    current_pil_image = card_data["original_image"]
-                    if card_data.get("rotated"):
-                        rotated_pil_image = current_pil_image.rotate(90, expand=True).resize((111, 78))
-                        card_data["image"] = ImageTk.PhotoImage(rotated_pil_image) # Update TkImage
-                        card_data["width"], card_data["height"] = 111, 78
-                    else:
-                        resized_pil_image = current_pil_image.resize((78, 111))
-                        card_data["image"] = ImageTk.PhotoImage(resized_pil_image) # Update TkImage
-                        card_data["width"], card_data["height"] = 78, 111
-                    img_to_draw = card_data["image"]
-                elif self.noimage_photo_image: 
-                    img_to_draw = self.noimage_photo_image 
-                    card_data["width"], card_data["height"] = (111,78) if card_data.get("rotated") else (78,111)
-
-
-            else: # Face down
-                if card_data.get("rotated"):
-                    img_to_draw = self.reverse_rotated_photo_image
-                    card_data["width"], card_data["height"] = 111, 78
-                else:
-                    img_to_draw = self.reverse_photo_image
-                    card_data["width"], card_data["height"] = 78, 111
-            
-            if img_to_draw:
-                self.canvas.create_image(x, y, image=img_to_draw, anchor="nw")
-            
-            if card_data == self.selected_card:
-                self.canvas.create_rectangle(x, y, x + card_data["width"], y + card_data["height"], outline="red", width=3)
-            elif card_data in self.selected_cards:
-                self.canvas.create_rectangle(x, y, x + card_data["width"], y + card_data["height"], outline="blue", width=2)
+        with self.profiler.phase("draw_cards"):
+            self._draw_cards()
+
+    def _draw_cards(self):
+        profiler = self.profiler
+        self.board_renderer.set_playmat(self.playmat_photo)
+
+        with profiler.phase("draw_cards.render"):
+            changes = self.board_renderer.render(
+                self.state.on_board, self.state.markers, self.selected_card, self.selected_cards,
+                self._card_sprite, self._marker_sprite
+            )
+        if self.is_dragging and self.drag_items and self.drag_applied != (0, 0):
+            # The render put the dragged items back at their board positions (e.g. an image
+            # finished loading mid-drag); the drag offset is applied again so they stay under the pointer
+            self.board_renderer.move_items(self.drag_items, *self.drag_applied)
+
+        # Marker sizes depend on their text and are only known once their sprite is laid out
+        for (kind, _), ref in changes.updated.items():
+            if kind == "marker":
+                self.state.reindex(ref)
+        if self.selection_rect_id:
+            self.canvas.tag_raise(self.selection_rect_id)
 
-        self._update_dynamic_buttons_visibility()
+        with profiler.phase("draw_cards.buttons"):
+            self._update_dynamic_buttons_visibility()
+            self.update_deck_count_display()
+        if self.info_window_instance:
+            with profiler.phase("info_window.update_display"):
+                self.info_window_instance.update_display()
+        if self.opponent_window_instance and self.opponent_window_instance.is_active():
+            self.opponent_window_instance.queue_changes(changes)
+
+    def _card_sprite(self, card_data):
+        rotated = bool(card_data.rotated)
+        face_up = bool(card_data.face_up)
+        if face_up and not self.card_images.entry(card_data.id).ready:
+            # Placeholder back until the worker pool has decoded the card
+            self._prefetch_card_images([card_data.id])
+            face_up = False
+        card_id = card_data.id if face_up else None # All face-down cards share one back sprite
+        return self.sprite_cache.get((card_id, rotated, face_up, "board"),
+                                     lambda: self._build_card_sprite(card_data, rotated, face_up)), (0, 0)
+
+    def _build_card_sprite(self, card_data, rotated, face_up):
+        if not face_up:
+            return self.reverse_rotated_photo_image if rotated else self.reverse_photo_image
+        with self.profiler.phase("card_sprite"):
+            board_image = self.card_images.entry(card_data.id).board_image(rotated)
+            if not board_image:
+                return self.noimage_photo_image
+            return ImageTk.PhotoImage(board_image)
+
+    def get_preview_sprite(self, card_id):
+        """Returns the 390x555 preview image of a card, or None if neither it nor noimage.png exists."""
+        def build():
+            preview_pil = self.card_images.entry(card_id).preview_image()
+            if preview_pil is None:
+                return self.noimage_large_photo_image
+            return ImageTk.PhotoImage(preview_pil)
+        return self.sprite_cache.get((card_id, False, True, "preview"), build)
+
+    def get_marker_sprite(self, marker):
+        """Returns the shared PhotoImage for a marker or chip and its margin around the marker box."""
+        pad = layout_marker(marker)
+        marker_type = marker.type
+        text = marker.text
+        chip_color = marker.chip_color if marker_type == "chip" else ""
+        mw, mh = marker.width, marker.height
+        key = ("marker", marker_type, text, chip_color, mw, mh)
+        def build():
+            with self.profiler.phase("marker_sprite"):
+                return ImageTk.PhotoImage(render_marker_sprite(
+                    marker_type, text, chip_color, mw, mh, marker.text_width, marker.text_height, pad))
+        return self.sprite_cache.get(key, build), pad
+
+    def _marker_sprite(self, marker):
+        photo, pad = self.get_marker_sprite(marker)
+        return photo, (-pad, -pad)
+
+    # --- Profiler ---
+    def toggle_profiler(self):
+        profiler = self.profiler
+        profiler.enabled = not profiler.enabled
+        profiler.pending_input = None
+        if profiler.enabled:
+            self._instrument_inputs(self.root)
+            self.profiler_label = tk.Label(self.root, font=("Courier", 9), justify="left", anchor="nw",
+                                           bg="black", fg="lime")
+            self.profiler_label.place(x=4, y=4)
+            self._refresh_profiler_overlay()
+        elif self.profiler_label:
+            self.profiler_label.destroy()
+            self.profiler_label = None
+
+    def _instrument_inputs(self, widget):
+        tags = widget.bindtags()
+        if PROFILER_INPUT_TAG not in tags:
+            widget.bindtags((PROFILER_INPUT_TAG,) + tags)
+        for child in widget.winfo_children():
+            self._instrument_inputs(child)
+
+    def _on_profiled_input(self, name):
+        # Runs before the widget's own bindings. Idle callbacks queued while handling the event
+        # (canvas redisplay included) run first; the nested after_idle runs once they are done.
+        if self.profiler.mark_input(name):
+            self.root.after_idle(lambda: self.root.after_idle(self.profiler.input_painted))
+
+    def _refresh_profiler_overlay(self):
+        if not self.profiler.enabled or not self.profiler_label:
+            return
+        lines = []
+        for label, summary in (("draw", self.profiler.summary("draw_cards")),
+                               ("mirror", self.profiler.summary("mirror._draw_view")),
+                               ("info", self.profiler.summary("info_window.update_display")),
+                               ("input", self.profiler.input_summary())):
+            if summary:
+                lines.append(f"{label:6} p50 {summary[0]:6.1f}  p95 {summary[1]:6.1f}  max {summary[2]:6.1f} ms")
+        lines.append(f"samples {len(self.profiler.samples)}  Shift+F12: dump")
+        self.profiler_label.config(text="\n".join(lines))
+        self.profiler_label.lift()
+        self.root.after(PROFILER_OVERLAY_MS, self._refresh_profiler_overlay)
+
+    def dump_profile(self):
+        if not self.profiler.samples:
+            messagebox.showinfo("プロファイラ", "記録されたサンプルがありません。F12でプロファイラを有効にしてください。")
+            return
+        folder = "profile"
+        base = os.path.join(folder, f"profile_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+        try:
+            os.makedirs(folder, exist_ok=True)
+            self.profiler.write_csv(base + ".csv")
+            self.profiler.write_chrome_trace(base + ".trace.json")
+            messagebox.showinfo("プロファイラ", f"サンプルを保存しました！\n{base}.csv\n{base}.trace.json")
+        except OSError as e:
+            messagebox.showerror("エラー", f"プロファイルの保存中にエラーが発生しました:\n{e}")
+
+    # --- Game state glue ---
+    def undo(self):
+        if self.state.undo():
+            self._after_history_step()
+
+    def redo(self):
+        if self.state.redo():
+            self._after_history_step()
+
+    def _after_history_step(self):
+        # Undoing a removal recreates the item, so held references may be stale
+        self.selected_card = None
+        self.selected_cards = []
+        self.multi_action_anchor = None
+        self.draw_cards()
 
-        if self.markers:
-            marker_layer_pil = Image.new("RGBA", (self.canvas.winfo_width(), self.canvas.winfo_height()), (255, 255, 255, 0))
-            draw_pil = ImageDraw.Draw(marker_layer_pil)
-            
+    def _show_life_points(self, value):
+        if self._life_points_input() != value:
+            self.life_points.set(value)
+        if self.opponent_window_instance and self.opponent_window_instance.is_active():
+            self.opponent_window_instance.request_refresh()
+
+    def _life_points_input(self):
+        try:
+            return self.life_points.get()
+        except tk.TclError:
+            return None # Empty while the user is typing
+
+    def _on_life_points_changed(self, *args):
+        value = self._life_points_input()
+        if value is not None:
+            self.state.set_life_points(value)
+
+    def _start_autosave(self):
+        journal = self.state.journal
+        if journal.exists():
             try:
-                font = ImageFont.truetype("YuGothB.ttc", 14) 
-            except IOError:
-                font = ImageFont.load_default()
+                save, batches = journal.read()
+            except Exception as e:
+                print(f"Warning: Could not read autosave: {e}")
+                save, batches = None, []
+            if save and (save.deck or save.board or save.markers or batches) and \
+                    messagebox.askyesno("復元", "前回のセッションの盤面が残っています。復元しますか？"):
+                self._load_state(save, batches)
+                return
+        self.state.compact_journal()
 
+    def _load_state(self, save, batches=()):
+        self.state.load(save, batches)
+        self.selected_card = None
+        self.selected_cards = []
+        self.multi_action_anchor = None
 
-            chip_colors = {
-                "red": (220, 53, 69, 220),
-                "blue": (13, 110, 253, 220),
-                "yellow": (255, 193, 7, 220),
-                "green": (25, 135, 84, 220),
-                "white": (245, 245, 245, 230),
-            }
+        resources = self.state.resources
+        new_rev_path = os.path.join("resource", resources["reverse"])
+        new_pm_path = os.path.join("resource", resources["playmat"])
+        if new_rev_path != self.reverse_image_path or new_pm_path != self.playmat_path:
+            self._load_resource_images_async(new_rev_path, new_pm_path)
 
-            normal_markers = [m for m in self.markers if m.get("type", "marker") != "chip"]
-            chip_markers = [m for m in self.markers if m.get("type") == "chip"]
-
-            for marker in normal_markers + chip_markers:
-                mx, my = marker["x"], marker["y"]
-                marker_type = marker.get("type", "marker")
-
-                if marker_type == "chip":
-                    marker["width"] = marker.get("width", 18)
-                    marker["height"] = marker.get("height", 18)
-                    mw, mh = marker["width"], marker["height"]
-                    chip_color_name = marker.get("chip_color", "white")
-                    chip_fill = chip_colors.get(chip_color_name, chip_colors["white"])
-                    outline_color = (60, 60, 60, 255)
-                    draw_pil.ellipse([mx, my, mx + mw, my + mh], fill=chip_fill, outline=outline_color, width=2)
-
-                    chip_text = marker.get("text", "")
-                    if chip_text:
-                        try:
-                            bbox = draw_pil.textbbox((0, 0), chip_text, font=font)
-                            text_width = bbox[2] - bbox[0]
-                            text_height = bbox[3] - bbox[1]
-                        except Exception:
-                            text_width, text_height = 0, 0
-                        marker["text_width"] = text_width
-                        marker["text_height"] = text_height
-                        text_color = "black" if chip_color_name in ["yellow", "white"] else "white"
-                        draw_text_with_outline(draw_pil, (mx, my), chip_text, font,
-                                               text_color, "black", 1,
-                                               mw, mh, text_width, text_height)
-                else:
-                    text_width, text_height = 0, 0
-                    if marker["text"]:
-                        try:
-                            bbox = draw_pil.textbbox((0,0), marker["text"], font=font)
-                            text_width = bbox[2] - bbox[0]
-                            text_height = bbox[3] - bbox[1]
-                        except Exception as e:
-                            print(f"Could not get textbbox for marker text '{marker['text']}': {e}")
-
-                    marker["text_width"] = text_width
-                    marker["text_height"] = text_height
-                    marker["width"] = max(marker["text_width"] + 20, 120)
-                    marker["height"] = max(marker["text_height"] + 10, 50)
-                    mw, mh = marker["width"], marker["height"]
-
-                    translucent_color_pil = (128, 128, 128, 128) # RGBA
-                    draw_pil.rectangle([mx, my, mx + mw, my + mh], fill=translucent_color_pil)
-
-                    if marker["text"]:
-                        draw_text_with_outline(draw_pil, (mx, my), marker["text"], font,
-                                               "black", "white", 2,
-                                               mw, mh, text_width, text_height)
-
-                if marker == self.selected_card:
-                    self.canvas.create_rectangle(mx, my, mx + marker["width"], my + marker["height"], outline="red", width=3)
-
-            self.marker_layer_tk = ImageTk.PhotoImage(marker_layer_pil)
-            self.canvas.create_image(0,0, image=self.marker_layer_tk, anchor="nw")
-
-        self.update_deck_count_display()
-        if self.info_window_instance:
-            self.info_window_instance.update_display()
-        if self.opponent_window_instance and self.opponent_window_instance.is_active():
-            self.opponent_window_instance.needs_redraw = True
+        # Layout first with placeholders; images are decoded afterwards, board before deck
+        self.draw_cards()
+        self._prefetch_upcoming_cards()
 
     def _clear_selection_rectangle(self):
         if self.selection_rect_id:
@@ -461,100 +1231,28 @@ class ShuffleMyriadApp:
         if abs(x2 - x1) < 5 or abs(y2 - y1) < 5:
             return []
 
-        selected = []
-        for card_data in self.on_board:
-            card_left = card_data["x"]
-            card_top = card_data["y"]
-            card_right = card_left + card_data["width"]
-            card_bottom = card_top + card_data["height"]
-            intersects = not (card_right < x1 or card_left > x2 or card_bottom < y1 or card_top > y2)
-            if intersects:
-                selected.append(card_data)
-        return selected
-
-    def _get_cards_bounds(self, cards):
-        if not cards:
-            return None
-        min_x = min(card["x"] for card in cards)
-        min_y = min(card["y"] for card in cards)
-        max_x = max(card["x"] + card["width"] for card in cards)
-        max_y = max(card["y"] + card["height"] for card in cards)
-        return min_x, min_y, max_x, max_y
-
-    def _toggle_card_rotation(self, card_data):
-        cx = card_data["x"] + card_data["width"] / 2
-        cy = card_data["y"] + card_data["height"] / 2
-        card_data["rotated"] = not card_data["rotated"]
-        if card_data["rotated"]:
-            card_data["width"], card_data["height"] = 111, 78
-        else:
-            card_data["width"], card_data["height"] = 78, 111
-        card_data["x"] = int(cx - card_data["width"] / 2)
-        card_data["y"] = int(cy - card_data["height"] / 2)
+        return self.state.card_index.query_rect(x1, y1, x2, y2)
 
     def rotate_selected_cards(self):
-        for card_data in self.selected_cards:
-            self._toggle_card_rotation(card_data)
+        self.state.rotate(self.selected_cards)
         self.draw_cards()
 
-    def _unrotate_card(self, card_data):
-        if not card_data.get("rotated"):
-            return
-        cx = card_data["x"] + card_data["width"] / 2
-        cy = card_data["y"] + card_data["height"] / 2
-        card_data["rotated"] = False
-        card_data["width"], card_data["height"] = 78, 111
-        card_data["x"] = int(cx - card_data["width"] / 2)
-        card_data["y"] = int(cy - card_data["height"] / 2)
-
     def unrotate_selected_cards(self):
-        for card_data in self.selected_cards:
-            self._unrotate_card(card_data)
+        self.state.unrotate(self.selected_cards)
         self.draw_cards()
 
     def face_down_selected_cards(self):
-        for card_data in self.selected_cards:
-            card_data["face_up"] = False
-            card_data["revealed"] = False
+        self.state.set_face(self.selected_cards, False)
         self.draw_cards()
 
     def face_up_selected_cards(self):
-        for card_data in self.selected_cards:
-            card_data["face_up"] = True
-            card_data["revealed"] = True
+        self.state.set_face(self.selected_cards, True)
         self.draw_cards()
 
     def gather_selected_cards(self, shuffle=False):
         if not self.selected_cards:
             return
-        cards = list(self.selected_cards)
-        if shuffle:
-            random.shuffle(cards)
-        bounds = self._get_cards_bounds(cards)
-        if not bounds:
-            return
-
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        if self.multi_action_anchor:
-            anchor_x, anchor_y = self.multi_action_anchor
-            center_x = anchor_x
-        else:
-            min_x, min_y, max_x, max_y = bounds
-            center_x = int((min_x + max_x) / 2)
-            center_y = int((min_y + max_y) / 2)
-
-        for card_data in cards:
-            target_x = center_x - card_data["width"] // 2
-            if self.multi_action_anchor:
-                target_y = anchor_y - 5 - card_data["height"]
-            else:
-                target_y = center_y - card_data["height"] // 2
-            card_data["x"] = max(0, min(target_x, canvas_width - card_data["width"]))
-            card_data["y"] = max(0, min(target_y, canvas_height - card_data["height"]))
-        if shuffle:
-            remaining = [card for card in self.on_board if card not in cards]
-            self.on_board = remaining + cards
+        self.state.gather(self.selected_cards, self.multi_action_anchor, shuffle)
         self.draw_cards()
 
     def load_deck(self):
@@ -577,7 +1275,7 @@ class ShuffleMyriadApp:
 
         try:
             with open(file_path, "r", encoding="utf-8") as file:
-                lines = [line.strip() for line in file if line.strip()]
+                lines = [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
 
             resource_section_content = []
             if "[Resource]" in lines:
@@ -588,84 +1286,112 @@ class ShuffleMyriadApp:
             new_reverse_path = os.path.join("resource", resource_section_content[0]) if len(resource_section_content) > 0 else os.path.join("resource", "reverse.png")
             new_playmat_path = os.path.join("resource", resource_section_content[1]) if len(resource_section_content) > 1 else os.path.join("resource", "playmat.png")
 
-            if new_reverse_path != self.reverse_image_path or not self.reverse_image_pil:
-                self.reverse_image_path = new_reverse_path
-                try:
-                    self.reverse_image_pil = Image.open(self.reverse_image_path).resize((78, 111))
-                    self.reverse_photo_image = ImageTk.PhotoImage(self.reverse_image_pil)
-                    self.reverse_rotated_image_pil = self.reverse_image_pil.rotate(90, expand=True).resize((111, 78))
-                    self.reverse_rotated_photo_image = ImageTk.PhotoImage(self.reverse_rotated_image_pil)
-                except FileNotFoundError:
-                    print(f"Warning: Custom reverse image not found at {self.reverse_image_path}, using default or none.")
-                    if not os.path.exists(self.reverse_image_path): 
-                        self.reverse_image_pil = None
-                        self.reverse_photo_image = None
-                        self.reverse_rotated_image_pil = None
-                        self.reverse_rotated_photo_image = None
-
-
-            if new_playmat_path != self.playmat_path or not self.playmat_image_pil:
-                self.playmat_path = new_playmat_path
-                try:
-                    self.playmat_image_pil = Image.open(self.playmat_path).resize((960, 720))
-                    self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
-                except FileNotFoundError:
-                    print(f"Warning: Custom playmat image not found at {self.playmat_path}, using default or none.")
-                    if not os.path.exists(self.playmat_path): 
-                        self.playmat_image_pil = Image.new("RGB", (960,720), "lightgrey")
-                        self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
-
+            if new_reverse_path != self.reverse_image_path or new_playmat_path != self.playmat_path \
+                    or not self.reverse_image_pil:
+                self._load_resource_images_async(new_reverse_path, new_playmat_path)
 
-            self.deck = []
-            self.ex_deck = []
-            
-            main_deck_lines = lines
+            main_deck_lines, ex_deck_lines = lines, []
             if "[EX]" in lines:
                 ex_index = lines.index("[EX]")
                 main_deck_lines = lines[:ex_index]
                 ex_deck_lines = lines[ex_index + 1:]
-                for card_id in ex_deck_lines:
-                    self.ex_deck.append(self._create_card_dict(card_id, face_up=True, revealed=True))
-            
-            for card_id in main_deck_lines:
-                self.deck.append(self._create_card_dict(card_id, face_up=True, revealed=True))
-
-            x, y = 20, 600
-            for card_data in self.ex_deck:
-                card_data["x"], card_data["y"] = x, y
-                self.on_board.append(card_data) 
-                x += 15
-                if x > 900: x, y = 20, y + 10
-            
+            self.state.load_deck(main_deck_lines, ex_deck_lines)
+
+            self._prefetch_upcoming_cards()
             self.draw_cards()
-            messagebox.showinfo("成功", f"デッキを読み込みました！カード数: {len(self.deck)}, EXデッキカード数: {len(self.ex_deck)}")
+            messagebox.showinfo("成功", f"デッキを読み込みました！カード数: {len(self.state.deck)}, EXデッキカード数: {len(self.state.ex_deck)}")
         except Exception as e:
             messagebox.showerror("エラー", f"デッキの読み込み中にエラーが発生しました:\n{e}")
 
 
-    def _create_card_dict(self, card_id, x=0, y=0, rotated=False, face_up=True, revealed=True):
-        card_data = {
-            "id": card_id, "width": 78, "height": 111,
-            "rotated": rotated, "face_up": face_up, "revealed": revealed,
-            "image": None, "original_image": None, 
-            "x": x, "y": y
-        }
-        image_path = os.path.join("card-img", f"{card_id}.png")
-        try:
-            pil_img = Image.open(image_path) 
-            card_data["original_image"] = pil_img
-        except FileNotFoundError:
-            if self.noimage_pil:
-                card_data["original_image"] = self.noimage_pil.copy() 
-        return card_data
+    def _load_resource_images_async(self, reverse_path, playmat_path):
+        self.reverse_image_path = reverse_path
+        self.playmat_path = playmat_path
+        self.state.resources = {"reverse": os.path.basename(reverse_path), "playmat": os.path.basename(playmat_path)}
+        # A newer request simply replaces the pending one; its result is never applied
+        self.resource_future = self.card_images.executor.submit(decode_resource_images, reverse_path, playmat_path)
+        self._schedule_load_poll()
+
+    def _apply_resource_images(self, decoded):
+        if "reverse" in decoded:
+            self.reverse_image_pil = decoded["reverse"]
+            self.reverse_photo_image = ImageTk.PhotoImage(self.reverse_image_pil)
+            self.reverse_rotated_image_pil = decoded["reverse_rotated"]
+            self.reverse_rotated_photo_image = ImageTk.PhotoImage(self.reverse_rotated_image_pil)
+        if "playmat" not in decoded and self.playmat_image_pil is None:
+            decoded["playmat"] = Image.new("RGB", (960, 720), "lightgrey")
+        if "playmat" in decoded:
+            self.playmat_image_pil = decoded["playmat"]
+            self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
+        self.sprite_cache.clear()
+        self.board_renderer.invalidate_sprites()
+        if self.opponent_window_instance and self.opponent_window_instance.is_active():
+            self.opponent_window_instance._load_resources()
+
+    def _prefetch_upcoming_cards(self):
+        # Cards on the board first, then the top of the deck so draws are ready in time.
+        # The rest of the deck is decoded when it becomes visible.
+        deck_top = islice(self.state.deck, DECK_PREFETCH)
+        self._prefetch_card_images([card_data.id for card_data in chain(self.state.on_board, deck_top)])
+
+    def _prefetch_card_images(self, card_ids):
+        scheduled = self.card_images.prefetch(card_ids)
+        if scheduled:
+            self.image_loads_total += scheduled
+            self._update_load_progress()
+            self._schedule_load_poll()
+
+    def _schedule_load_poll(self):
+        if not self.load_poll_scheduled:
+            self.load_poll_scheduled = True
+            self.root.after(30, self._poll_background_loads)
+
+    def _poll_background_loads(self):
+        self.load_poll_scheduled = False
+        changed = False
+        if self.resource_future is not None and self.resource_future.done():
+            future, self.resource_future = self.resource_future, None
+            self._apply_resource_images(future.result())
+            changed = True
+
+        done = self.card_images.take_completed()
+        if done:
+            self.board_renderer.invalidate_sprites({entry.card_id for entry in done})
+            self.image_loads_done += len(done)
+            changed = True
+        if changed:
+            self.draw_cards()
+
+        if self.image_loads_done < self.image_loads_total or self.resource_future is not None:
+            self._schedule_load_poll()
+        else:
+            self.image_loads_done = self.image_loads_total = 0
+        self._update_load_progress()
+
+    def _update_load_progress(self):
+        if self.image_loads_total:
+            self.load_progress_label.config(text=f"画像読み込み中: {self.image_loads_done}/{self.image_loads_total}")
+        else:
+            self.load_progress_label.config(text="")
 
     def shuffle_deck(self):
-        if not self.deck:
+        if not self.state.deck:
             messagebox.showinfo("エラー", "デッキが空です！")
             return
-        random.shuffle(self.deck)
+        self.state.shuffle()
+        self._prefetch_upcoming_cards()
         self._show_temporary_message("シャッフル")
 
+    def change_seed(self):
+        seed = simpledialog.askinteger(
+            "シード", f"現在のシード: {self.state.random.seed}\n"
+                     "新しいシードを入力してください (同じシードと同じ操作でシャッフルやダイスの結果を再現できます)",
+            parent=self.root, minvalue=0)
+        if seed is None:
+            return
+        self.state.reseed(seed)
+        self._show_temporary_message(f"シード: {seed}")
+
     def _show_temporary_message(self, message_text):
         self.dice_label.config(text=message_text)
         self.dice_label.place(relx=0.5, rely=0.5, anchor="center")
@@ -681,78 +1407,18 @@ class ShuffleMyriadApp:
             messagebox.showinfo("エラー", "指定したIDのカード画像が見つかりません（noimage.pngもありません）！")
             return
 
-        card_data = self._create_card_dict(card_id, x=600, y=500, face_up=True, revealed=True)
-        self._adjust_card_position(card_data)
-        self.on_board.append(card_data)
-        self.selected_card = card_data 
+        self.selected_card = self.state.add_card(card_id, 600, 500)
         self.draw_cards()
 
-    def _adjust_card_position(self, new_card):
-        offset_x_orig, offset_y_orig = 10, 2
-        offset_x, offset_y = offset_x_orig, offset_y_orig
-        max_attempts = 100
-        attempts = 0
-        
-        while attempts < max_attempts:
-            overlap = False
-            for card in self.on_board:
-                if card is new_card: continue 
-                if abs(card["x"] - new_card["x"]) == 0 and abs(card["y"] - new_card["y"]) == 0:
-                    new_card["x"] += offset_x
-                    new_card["y"] += offset_y
-
-                    if new_card["x"] + new_card.get("width", 78) > 960 or new_card["x"] < 0:
-                        new_card["x"] -= 2 * offset_x 
-                        offset_x *= -1 
-                    if new_card["y"] + new_card.get("height", 111) > 720 or new_card["y"] < 0:
-                        new_card["y"] -= 2 * offset_y
-                        offset_y *= -1
-
-                    new_card["x"] = max(0, min(new_card["x"], 960 - new_card.get("width", 78)))
-                    new_card["y"] = max(0, min(new_card["y"], 720 - new_card.get("height", 111)))
-                    
-                    overlap = True
-                    break 
-            if not overlap:
-                return 
-            attempts += 1
-            if attempts % 10 == 0: 
-                offset_x, offset_y = offset_x_orig, offset_y_orig
-                new_card["x"] += random.randint(-5,5) 
-                new_card["y"] += random.randint(-5,5)
-
-
-        if attempts >= max_attempts:
-            print("Warning: Max attempts reached for card position adjustment. Card may overlap.")
-
     def add_marker(self):
-        marker = {
-            "type": "marker",
-            "x": self.canvas.winfo_width() // 2 - 60,
-            "y": int(self.canvas.winfo_height() * 0.9),
-            "width": 120, "height": 50,
-            "text": "", "selected": False, 
-            "text_width": 0, "text_height": 0 
-        }
-        self.markers.append(marker)
-        self.selected_card = marker 
+        self.selected_card = self.state.add_marker(self.canvas.winfo_width() // 2 - 60,
+                                                   int(self.canvas.winfo_height() * 0.9))
         self.draw_cards()
 
     def add_chip(self, color_name):
         chip_size = 18
-        marker = {
-            "type": "chip",
-            "x": self.canvas.winfo_width() // 2 - chip_size // 2,
-            "y": int(self.canvas.winfo_height() * 0.9),
-            "width": chip_size,
-            "height": chip_size,
-            "text": "",
-            "chip_color": color_name,
-            "text_width": 0,
-            "text_height": 0,
-        }
-        self.markers.append(marker)
-        self.selected_card = marker
+        self.selected_card = self.state.add_chip(color_name, self.canvas.winfo_width() // 2 - chip_size // 2,
+                                                 int(self.canvas.winfo_height() * 0.9), chip_size)
         self.draw_cards()
 
     def _on_canvas_click(self, event):
@@ -764,29 +1430,27 @@ class ShuffleMyriadApp:
         self.selection_start = None
         self.selection_end = None
         self.selected_card = None
-        for marker in reversed(self.markers): 
-            if marker["x"] <= event.x < marker["x"] + marker["width"] and \
-               marker["y"] <= event.y < marker["y"] + marker["height"]:
-                self.selected_card = marker
-                self.selected_cards = []
-                self.multi_action_anchor = None
-                self.is_dragging = True
-                self.drag_offset_x = event.x - marker["x"]
-                self.drag_offset_y = event.y - marker["y"]
-                self.draw_cards()
-                return 
+        marker = self.state.marker_index.hit(event.x, event.y)
+        if marker is not None:
+            self.selected_card = marker
+            self.selected_cards = []
+            self.multi_action_anchor = None
+            self._begin_drag([marker], event)
+            self.draw_cards()
+            return 
 
-        for card_data in reversed(self.on_board): 
-            if card_data["x"] <= event.x < card_data["x"] + card_data["width"] and \
-               card_data["y"] <= event.y < card_data["y"] + card_data["height"]:
+        card_data = self.state.card_index.hit(event.x, event.y)
+        if card_data is not None:
+            if len(self.selected_cards) > 1 and card_data in self.selected_cards:
+                # Dragging a card of the current selection moves the whole group
+                self._begin_drag(list(self.selected_cards), event)
+            else:
                 self.selected_card = card_data
                 self.selected_cards = []
                 self.multi_action_anchor = None
-                self.is_dragging = True
-                self.drag_offset_x = event.x - card_data["x"]
-                self.drag_offset_y = event.y - card_data["y"]
-                self.draw_cards()
-                return 
+                self._begin_drag([card_data], event)
+            self.draw_cards()
+            return 
         
         self.is_dragging = False
         self.selected_cards = []
@@ -812,13 +1476,30 @@ class ShuffleMyriadApp:
             self.selection_end = (event.x, event.y)
             self.canvas.coords(self.selection_rect_id, start_x, start_y, event.x, event.y)
             return
-        if self.selected_card and self.is_dragging:
-            new_x = event.x - self.drag_offset_x
-            new_y = event.y - self.drag_offset_y
-            
-            self.selected_card["x"] = new_x
-            self.selected_card["y"] = new_y
-            self.draw_cards()
+        if self.is_dragging and self.drag_items:
+            # Motion events are coalesced: only the latest position is applied, once per frame
+            self.drag_pointer = (event.x, event.y)
+            if self.drag_frame_job is None:
+                self.drag_frame_job = self.root.after(DRAG_FRAME_MS, self._apply_drag_frame)
+
+    def _begin_drag(self, items, event):
+        self.is_dragging = True
+        self.drag_items = items
+        self.drag_start = (event.x, event.y)
+        self.drag_pointer = (event.x, event.y)
+        self.drag_applied = (0, 0)
+
+    def _apply_drag_frame(self):
+        # Fast path: only the dragged canvas items move, the board state is untouched until release
+        self.drag_frame_job = None
+        if not self.is_dragging or not self.drag_items:
+            return
+        dx = self.drag_pointer[0] - self.drag_start[0]
+        dy = self.drag_pointer[1] - self.drag_start[1]
+        applied_x, applied_y = self.drag_applied
+        if (dx, dy) != (applied_x, applied_y):
+            self.board_renderer.move_items(self.drag_items, dx - applied_x, dy - applied_y)
+            self.drag_applied = (dx, dy)
 
     def _on_canvas_release(self, event):
         if self.is_selecting:
@@ -830,120 +1511,93 @@ class ShuffleMyriadApp:
             self.selected_card = None
             self.draw_cards()
             return
+        if self.drag_frame_job is not None:
+            self.root.after_cancel(self.drag_frame_job)
+            self.drag_frame_job = None
+        if self.is_dragging and self.drag_items:
+            self._commit_drag(event.x - self.drag_start[0], event.y - self.drag_start[1], event)
         self.is_dragging = False
-        if self.selected_card: 
-            w, h = self.selected_card["width"], self.selected_card["height"]
-            self.selected_card["x"] = max(0, min(self.selected_card["x"], self.canvas.winfo_width() - w))
-            self.selected_card["y"] = max(0, min(self.selected_card["y"], self.canvas.winfo_height() - h))
+        self.drag_items = []
         self.draw_cards() 
 
+    def _commit_drag(self, dx, dy, event):
+        items = self.drag_items
+        if (dx, dy) == (0, 0):
+            if len(items) > 1:
+                # A click on a card of the group without moving selects just that card
+                self.selected_card = self.state.card_index.hit(event.x, event.y)
+                self.selected_cards = []
+                self.multi_action_anchor = None
+            return
+        # The whole group is shifted by the same amount so it keeps its shape at the edges
+        self.state.move_items(items, dx, dy)
+        if len(items) > 1:
+            self.multi_action_anchor = None
+
     def _on_canvas_right_click(self, event):
         self.root.focus_set()
         self._dice_label_forget()
-        clicked_on_card = None
-        for card_data in reversed(self.on_board):
-            if card_data["x"] <= event.x < card_data["x"] + card_data["width"] and \
-               card_data["y"] <= event.y < card_data["y"] + card_data["height"]:
-                clicked_on_card = card_data
-                break
+        clicked_on_card = self.state.card_index.hit(event.x, event.y)
         
         if clicked_on_card:
             if self.selected_card != clicked_on_card:
                 self.selected_card = clicked_on_card
             self.selected_cards = []
             self.multi_action_anchor = None
-            self._toggle_card_rotation(self.selected_card)
+            self.state.rotate([self.selected_card])
 
             self.draw_cards()
 
     def _on_canvas_double_click(self, event):
-        if self.selected_card and self.selected_card.get("type") == "marker":
+        if self.selected_card and self.selected_card.type == "marker":
             self.open_marker_edit_window()
 
     def _on_delete_key(self, event=None):
         if self.selected_card:
-            if self.selected_card in self.on_board:
-                self.on_board.remove(self.selected_card)
-            elif self.selected_card in self.markers:
-                self.markers.remove(self.selected_card)
+            self.state.remove(self.selected_card)
             self.selected_card = None
             self.draw_cards()
 
     def reverse_card(self):
-        if not self.selected_card or self.selected_card.get("type") == "marker":
+        if not self.selected_card or self.selected_card.type == "marker":
             messagebox.showinfo("エラー", "リバースするカードを選択してください！")
             return
-        self.selected_card["face_up"] = not self.selected_card["face_up"]
-        if self.selected_card["face_up"]:
-            self.selected_card["revealed"] = True
+        self.state.flip(self.selected_card)
         self.draw_cards()
 
     def bring_to_front(self):
         if not self.selected_card: return
-        if self.selected_card in self.on_board:
-            self.on_board.remove(self.selected_card)
-            self.on_board.append(self.selected_card)
-        elif self.selected_card in self.markers: 
-            self.markers.remove(self.selected_card)
-            self.markers.append(self.selected_card)
+        self.state.bring_to_front(self.selected_card)
         self.draw_cards()
 
     def send_to_back(self):
         if not self.selected_card: return
-        if self.selected_card in self.on_board:
-            self.on_board.remove(self.selected_card)
-            self.on_board.insert(0, self.selected_card)
-        elif self.selected_card in self.markers:
-            self.markers.remove(self.selected_card)
-            self.markers.insert(0, self.selected_card)
+        self.state.send_to_back(self.selected_card)
         self.draw_cards()
 
     def move_to_deck_top(self):
-        if not self.selected_card or self.selected_card.get("type") == "marker":
-            return
-        if self.selected_card in self.on_board:
-            card_to_move = self.selected_card
-            self.on_board.remove(card_to_move)
-            card_to_move["face_up"] = True 
-            card_to_move["rotated"] = False
-            card_to_move["revealed"] = True 
-            self.deck.insert(0, card_to_move)
-            self.selected_card = None
-            self.draw_cards()
+        self._return_selected_to_deck(top=True)
 
     def move_to_deck_bottom(self):
-        if not self.selected_card or self.selected_card.get("type") == "marker":
-            return
-        if self.selected_card in self.on_board:
-            card_to_move = self.selected_card
-            self.on_board.remove(card_to_move)
-            card_to_move["face_up"] = True 
-            card_to_move["rotated"] = False
-            card_to_move["revealed"] = True
-            self.deck.append(card_to_move)
+        self._return_selected_to_deck(top=False)
+
+    def _return_selected_to_deck(self, top):
+        if self.selected_card and self.state.return_to_deck(self.selected_card, top):
             self.selected_card = None
             self.draw_cards()
 
     def unrotate_all(self):
-        for card_data in self.on_board:
-            self._unrotate_card(card_data)
+        self.state.unrotate(self.state.on_board)
         self.draw_cards()
 
     def draw_from_deck(self, face_up=True, x=600, y=500):
-        if not self.deck:
+        card_data = self.state.draw(face_up, x, y)
+        if card_data is None:
             messagebox.showinfo("デッキ", "デッキにカードがありません！")
             return
-        card_data = self.deck.pop(0)
-        card_data["x"] = x
-        card_data["y"] = y
-        card_data["rotated"] = False
-        card_data["face_up"] = face_up
-        card_data["revealed"] = face_up
-        
-        self._adjust_card_position(card_data)
-        self.on_board.append(card_data)
         self.selected_card = card_data
         self.draw_cards()
+        self._prefetch_upcoming_cards()
 
     def _dice_label_forget(self):
         self.dice_label.place_forget()
@@ -956,7 +1610,7 @@ class ShuffleMyriadApp:
         if self.dice_label.winfo_ismapped():
             self._dice_label_forget()
         else:
-            result = random.randint(1, 6)
+            result = self.state.roll_dice(6)
             self._display_animated_result(result, "1D6", "1D6...")
             
     def coin_toss(self):
@@ -965,8 +1619,7 @@ class ShuffleMyriadApp:
         if self.dice_label.winfo_ismapped():
             self._dice_label_forget()
         else:
-            result_val = random.randint(1, 2)
-            result_text = "表" if result_val == 1 else "裏"
+            result_text = "表" if self.state.coin_toss() else "裏"
             self._display_animated_result(result_text, "コイントス", "コイントス...")
 
     def _display_animated_result(self, final_result, base_message, animated_message_stem):
@@ -1002,36 +1655,11 @@ class ShuffleMyriadApp:
                 messagebox.showerror("エラー", f"{save_folder}フォルダの作成に失敗しました: {e}")
                 return
 
-        output_filename_base = f"save_{datetime.now().strftime('%Y%m%d%H%M%S')}.txt"
+        output_filename_base = f"save_{datetime.now().strftime('%Y%m%d%H%M%S')}.jsonl"
         output_filename = os.path.join(save_folder, output_filename_base) 
         try:
             with open(output_filename, "w", encoding="utf-8") as file:
-                file.write("[Resource]\n")
-                reverse_rel_path = os.path.basename(self.reverse_image_path) if self.reverse_image_path else "reverse.png"
-                playmat_rel_path = os.path.basename(self.playmat_path) if self.playmat_path else "playmat.png"
-                file.write(f"{reverse_rel_path}\n")
-                file.write(f"{playmat_rel_path}\n")
-
-                file.write("[Deck]\n")
-                for card_data in self.deck: file.write(f"{card_data['id']}\n")
-
-                file.write("[Board]\n")
-                for card_data in self.on_board:
-                    if card_data.get("type") == "marker": continue 
-                    file.write(
-                        f"{card_data['id']},{card_data['x']},{card_data['y']},"
-                        f"{int(card_data['rotated'])},{int(card_data['face_up'])},{int(card_data['revealed'])}\n"
-                    )
-                
-                file.write("[Markers]\n")
-                for marker in self.markers:
-                    text_escaped = marker['text'].replace('\n', '\\n')
-                    marker_type = marker.get('type', 'marker')
-                    chip_color = marker.get('chip_color', '')
-                    file.write(
-                        f"{marker_type},{text_escaped},{marker['x']},{marker['y']},"
-                        f"{marker['width']},{marker['height']},{chip_color}\n"
-                    )
+                self.state.save(file)
             messagebox.showinfo("成功", f"盤面を保存しました！\nファイル名: {output_filename}")
         except Exception as e:
             messagebox.showerror("エラー", f"保存中にエラーが発生しました:\n{e}")
@@ -1048,7 +1676,7 @@ class ShuffleMyriadApp:
                 print(f"Warning: Could not create {save_folder_path} for initialdir: {e}")
         
         file_path = filedialog.askopenfilename(
-            filetypes=[("テキストファイル", "*.txt"), ("すべてのファイル", "*.*")],
+            filetypes=[("盤面データ", "*.jsonl *.txt"), ("すべてのファイル", "*.*")],
             title="盤面の読み込み",
             initialdir=save_folder_path 
         )
@@ -1056,85 +1684,17 @@ class ShuffleMyriadApp:
 
         try:
             with open(file_path, "r", encoding="utf-8") as file:
-                lines = [line.strip() for line in file]
-
-            self.deck, self.on_board, self.markers = [], [], []
-            self.ex_deck = [] 
-            self.selected_card = None
-
-            section = None
-            resource_lines_from_file = []
-
-            for line_content in lines:
-                if not line_content: continue
-                if line_content == "[Resource]": section = "resource"; resource_lines_from_file = []; continue
-                elif line_content == "[Deck]": section = "deck"; continue
-                elif line_content == "[Board]": section = "board"; continue
-                elif line_content == "[Markers]": section = "markers"; continue
-
-                if section == "resource":
-                    resource_lines_from_file.append(line_content)
-                elif section == "deck":
-                    self.deck.append(self._create_card_dict(line_content))
-                elif section == "board":
-                    parts = line_content.split(",")
-                    if len(parts) == 6:
-                        card_id, x, y, rotated, face_up, revealed = parts
-                        self.on_board.append(self._create_card_dict(
-                            card_id, int(x), int(y), bool(int(rotated)),
-                            bool(int(face_up)), bool(int(revealed))
-                        ))
-                elif section == "markers":
-                    parts = line_content.split(",")
-                    if len(parts) >= 7:
-                        marker_type, text, x, y, width, height, chip_color = parts[:7]
-                    elif len(parts) == 5:
-                        marker_type = "marker"
-                        text, x, y, width, height = parts
-                        chip_color = ""
-                    else:
-                        continue
-
-                    self.markers.append({
-                        "type": marker_type or "marker",
-                        "text": text.replace('\\n', '\n'),
-                        "x": int(x), "y": int(y),
-                        "width": int(width), "height": int(height),
-                        "chip_color": chip_color,
-                        "selected": False, "text_width":0, "text_height":0
-                    })
-            
-            if len(resource_lines_from_file) >= 1:
-                 new_rev_path = os.path.join("resource", resource_lines_from_file[0])
-                 if new_rev_path != self.reverse_image_path or not self.reverse_image_pil:
-                    self.reverse_image_path = new_rev_path
-                    try:
-                        self.reverse_image_pil = Image.open(self.reverse_image_path).resize((78, 111))
-                        self.reverse_photo_image = ImageTk.PhotoImage(self.reverse_image_pil)
-                        self.reverse_rotated_image_pil = self.reverse_image_pil.rotate(90, expand=True).resize((111, 78))
-                        self.reverse_rotated_photo_image = ImageTk.PhotoImage(self.reverse_rotated_image_pil)
-                    except FileNotFoundError: print(f"Loaded board reverse image not found: {self.reverse_image_path}")
-
-
-            if len(resource_lines_from_file) >= 2:
-                new_pm_path = os.path.join("resource", resource_lines_from_file[1])
-                if new_pm_path != self.playmat_path or not self.playmat_image_pil:
-                    self.playmat_path = new_pm_path
-                    try:
-                        self.playmat_image_pil = Image.open(self.playmat_path).resize((960, 720))
-                        self.playmat_photo = ImageTk.PhotoImage(self.playmat_image_pil)
-                    except FileNotFoundError: print(f"Loaded board playmat image not found: {self.playmat_path}")
-
+                save = read_board_save(file)
 
-            self.draw_cards()
+            self._load_state(save)
             messagebox.showinfo("成功", "盤面を読み込みました！")
         except Exception as e:
             messagebox.showerror("エラー", f"読み込み中にエラーが発生しました:\n{e}")
 
 
     def _copy_card_id_to_clipboard(self, event=None):
-        if self.selected_card and "id" in self.selected_card: 
-            card_id = self.selected_card["id"]
+        if self.selected_card and self.selected_card.type == "card":
+            card_id = self.selected_card.id
             self.root.clipboard_clear()
             self.root.clipboard_append(card_id)
             self.root.update() 
@@ -1148,7 +1708,7 @@ class ShuffleMyriadApp:
 
     def update_deck_count_display(self):
         if hasattr(self, 'deck_count_label') and self.deck_count_label.winfo_exists():
-            self.deck_count_label.config(text=f"デッキ: {len(self.deck)}枚")
+            self.deck_count_label.config(text=f"デッキ: {len(self.state.deck)}枚")
 
     # --- Window Openers ---
     def open_info_window(self):
@@ -1172,7 +1732,7 @@ class ShuffleMyriadApp:
 
 
     def open_marker_edit_window(self):
-        if self.selected_card and self.selected_card.get("type") == "marker":
+        if self.selected_card and self.selected_card.type == "marker":
             if self.marker_edit_window_instance is None or not self.marker_edit_window_instance.is_active():
                 self.marker_edit_window_instance = MarkerEditWindow(self, self.selected_card)
             else:
@@ -1224,19 +1784,13 @@ class InfoWindow:
         display_photo = None
         display_text = ""
 
-        if self.app.selected_card and "id" in self.app.selected_card: 
-            if not self.app.selected_card.get("revealed", False) and self.app.unknown_photo_image:
+        if self.app.selected_card and self.app.selected_card.type == "card":
+            if not self.app.selected_card.revealed and self.app.unknown_photo_image:
                 display_photo = self.app.unknown_photo_image
             else:
-                image_path = os.path.join("card-img", f"{self.app.selected_card['id']}.png")
-                try:
-                    pil_img = Image.open(image_path).resize((390, 555))
-                    display_photo = ImageTk.PhotoImage(pil_img)
-                except FileNotFoundError:
-                    if self.app.noimage_large_photo_image:
-                         display_photo = self.app.noimage_large_photo_image
-                    else: 
-                         display_text = "画像が見つかりません"
+                display_photo = self.app.get_preview_sprite(self.app.selected_card.id)
+                if not display_photo:
+                    display_text = "画像が見つかりません"
             if display_photo: self.app.last_displayed_image = display_photo
 
 
@@ -1278,12 +1832,17 @@ class OpponentWindow:
         self.dice_label = tk.Label(self.window, text="", font=("YuGothB.ttc", 24), bg="white")
         
         self.playmat_photo_opponent = None 
-        self.card_images_opponent = {} 
-        self.marker_layer_opponent_tk = None 
-
-        self.needs_redraw = True 
+        self.renderer = MirrorRenderer(self.canvas, self.app.card_images)
+        self.pending_changes = BoardChanges() # Main board changes not applied to the mirror yet
+        self.full_sync_needed = True
+        self.info_item = None
+        self.info_texts = None
+        self.refresh_job = None
+        self.last_refresh = 0.0
+
+        # Redrawn when something changes instead of polling; nothing is drawn while minimized
+        self.window.bind("<Map>", self._on_map)
         self._load_resources()
-        self._refresh_view_loop()
 
 
     def _load_resources(self):
@@ -1293,7 +1852,11 @@ class OpponentWindow:
                 self.playmat_photo_opponent = ImageTk.PhotoImage(flipped_playmat_pil)
             except Exception as e:
                 print(f"Error creating opponent playmat: {e}")
-                self.playmat_photo_opponent = None 
+                self.playmat_photo_opponent = None
+        # Face-down sprite keys do not change with the reverse image, so the mirror has to fetch every sprite again
+        self.renderer.invalidate_sprites()
+        self.full_sync_needed = True
+        self.request_refresh()
 
     def _disable_close(self):
         pass
@@ -1327,117 +1890,110 @@ class OpponentWindow:
             self.dice_label.place_forget()
 
     def _get_opponent_card_image(self, card_data, is_hidden_hand):
-        state_key = f"{card_data['id']}_{card_data.get('rotated',False)}_{card_data.get('face_up',True)}_{is_hidden_hand}"
+        rotated = bool(card_data.rotated)
+        face_up = bool(card_data.face_up) and not is_hidden_hand and self.app.card_images.entry(card_data.id).ready
+        card_id = card_data.id if face_up else None
+        return self.app.sprite_cache.get((card_id, rotated, face_up, "mirror"),
+                                         lambda: self._build_opponent_card_image(card_data, rotated, face_up))
 
-        if state_key in self.card_images_opponent:
-            return self.card_images_opponent[state_key]
+    def _build_opponent_card_image(self, card_data, rotated, face_up):
+        with self.app.profiler.phase("mirror_sprite"):
+            return self._transform_opponent_card_image(card_data, rotated, face_up)
 
+    def _transform_opponent_card_image(self, card_data, rotated, face_up):
         pil_image_to_transform = None
-        target_size = (111, 78) if card_data.get('rotated') else (78, 111)
+        target_size = (111, 78) if rotated else (78, 111)
 
-        if is_hidden_hand:
-            pil_image_to_transform = self.app.reverse_rotated_image_pil if card_data.get('rotated') else self.app.reverse_image_pil
-        elif not card_data.get('face_up', True): 
-            pil_image_to_transform = self.app.reverse_rotated_image_pil if card_data.get('rotated') else self.app.reverse_image_pil
+        if not face_up:
+            pil_image_to_transform = self.app.reverse_rotated_image_pil if rotated else self.app.reverse_image_pil
         else: 
-            source_pil = card_data.get("original_image")
-            if source_pil: 
-                if card_data.get('rotated'):
-                    pil_image_to_transform = source_pil.rotate(90, expand=True).resize(target_size)
-                else:
-                    pil_image_to_transform = source_pil.resize(target_size)
+            board_pil = self.app.card_images.entry(card_data.id).board_image(rotated)
+            if board_pil: 
+                pil_image_to_transform = board_pil
             elif self.app.noimage_pil: 
-                 pil_image_to_transform = self.app.noimage_pil.rotate(90, expand=True).resize(target_size) if card_data.get('rotated') else self.app.noimage_pil.resize(target_size)
+                 pil_image_to_transform = self.app.noimage_pil.rotate(90, expand=True).resize(target_size) if rotated else self.app.noimage_pil.resize(target_size)
 
 
         if pil_image_to_transform:
             try:
                 transformed_pil = pil_image_to_transform.transpose(Image.FLIP_TOP_BOTTOM).transpose(Image.FLIP_LEFT_RIGHT)
-                tk_image = ImageTk.PhotoImage(transformed_pil)
-                self.card_images_opponent[state_key] = tk_image 
-                return tk_image
+                return ImageTk.PhotoImage(transformed_pil)
             except Exception as e:
-                print(f"Error transforming image for opponent: {card_data['id']} - {e}")
+                print(f"Error transforming image for opponent: {card_data.id} - {e}")
         
         return None 
 
-    def _draw_view(self):
-        if not self.is_active(): return
-        self.canvas.delete("all")
+    def queue_changes(self, changes):
+        self.pending_changes.merge(changes)
+        if changes or self._info_texts() != self.info_texts:
+            self.request_refresh()
 
-        if self.playmat_photo_opponent:
-            self.canvas.create_image(0, 0, image=self.playmat_photo_opponent, anchor="nw")
-        
-        for card_data in self.app.on_board:
-            original_x, original_y = card_data.get("x",0), card_data.get("y",0)
-            original_w, original_h = card_data.get("width",78), card_data.get("height",111)
+    def request_refresh(self):
+        """Schedules a redraw, at most one per opponent_refresh_rate ms."""
+        if self.refresh_job is not None or not self.is_active():
+            return
+        wait = self.last_refresh + self.app.opponent_refresh_rate / 1000 - time.perf_counter()
+        self.refresh_job = self.window.after(max(0, int(wait * 1000)), self._refresh_view)
 
-            opp_x = 960 - (original_x + original_w)
-            opp_y = 720 - (original_y + original_h)
+    def _refresh_view(self):
+        self.refresh_job = None
+        if not self.is_active() or self.window.state() == "iconic":
+            return # Changes stay queued until <Map>
+        self.last_refresh = time.perf_counter()
+        self._draw_view()
 
-            is_hidden_in_hand = original_y > 440 
-            
-            img_to_draw = self._get_opponent_card_image(card_data, is_hidden_in_hand)
+    def _on_map(self, event):
+        if event.widget is self.window:
+            self.request_refresh()
 
-            if img_to_draw:
-                self.canvas.create_image(opp_x, opp_y, image=img_to_draw, anchor="nw")
-        
-        if self.app.markers:
-            marker_layer_pil_opp = Image.new("RGBA", (self.canvas.winfo_width(), self.canvas.winfo_height()), (255, 255, 255, 0))
-            draw_pil_opp = ImageDraw.Draw(marker_layer_pil_opp)
-            
-            try:
-                font_opp = ImageFont.truetype("YuGothB.ttc", 14)
-            except IOError:
-                font_opp = ImageFont.load_default()
-
-            chip_colors = {
-                "red": (220, 53, 69, 220),
-                "blue": (13, 110, 253, 220),
-                "yellow": (255, 193, 7, 220),
-                "green": (25, 135, 84, 220),
-                "white": (245, 245, 245, 230),
-            }
+    def _card_sprite(self, card_data):
+        return self._get_opponent_card_image(card_data, self.renderer.is_hidden_in_hand(card_data)), (0, 0)
 
-            normal_markers = [m for m in self.app.markers if m.get("type", "marker") != "chip"]
-            chip_markers = [m for m in self.app.markers if m.get("type") == "chip"]
-
-            for marker in normal_markers + chip_markers:
-                ox, oy, ow, oh = marker["x"], marker["y"], marker["width"], marker["height"]
-                opp_marker_x = 960 - (ox + ow)
-                opp_marker_y = 720 - (oy + oh)
-
-                if marker.get("type") == "chip":
-                    chip_color_name = marker.get("chip_color", "white")
-                    chip_fill = chip_colors.get(chip_color_name, chip_colors["white"])
-                    draw_pil_opp.ellipse([opp_marker_x, opp_marker_y, opp_marker_x + ow, opp_marker_y + oh], fill=chip_fill, outline=(60, 60, 60, 255), width=2)
-                    if marker.get("text"):
-                        text_color = "black" if chip_color_name in ["yellow", "white"] else "white"
-                        draw_text_with_outline(draw_pil_opp, (opp_marker_x, opp_marker_y), marker["text"], font_opp,
-                                               text_color, "black", 1,
-                                               ow, oh, marker.get("text_width", 0), marker.get("text_height", 0))
-                else:
-                    translucent_color_pil = (128, 128, 128, 128)
-                    draw_pil_opp.rectangle([opp_marker_x, opp_marker_y, opp_marker_x + ow, opp_marker_y + oh], fill=translucent_color_pil)
-
-                    if marker["text"]:
-                        draw_text_with_outline(draw_pil_opp, (opp_marker_x, opp_marker_y), marker["text"], font_opp,
-                                               "black", "white", 2,
-                                               ow, oh, marker["text_width"], marker["text_height"])
-            
-            self.marker_layer_opponent_tk = ImageTk.PhotoImage(marker_layer_pil_opp)
-            self.canvas.create_image(0,0, image=self.marker_layer_opponent_tk, anchor="nw")
+    def _marker_sprite(self, marker):
+        # Marker text stays readable, so the mirror reuses the main window's sprites
+        photo, pad = self.app.get_marker_sprite(marker)
+        return photo, (-pad, -pad)
 
-        lp_deck_info_pil = Image.new("RGBA", (self.canvas.winfo_width(), self.canvas.winfo_height()), (255,255,255,0))
-        draw_info_pil = ImageDraw.Draw(lp_deck_info_pil)
-        try:
-            font_info = ImageFont.truetype("YuGothB.ttc", 20)
-        except IOError:
-            font_info = ImageFont.load_default()
-        
-        lp_text = f"LP: {self.app.life_points.get()}"
-        deck_count_text = f"Deck: {len(self.app.deck)}"
-        
+    def _draw_view(self):
+        if not self.is_active(): return
+        profiler = self.app.profiler
+        self.renderer.set_playmat(self.playmat_photo_opponent)
+        if not (self.full_sync_needed or self.pending_changes):
+            # Idle refreshes are not worth a sample; only the overlay text may change
+            self._update_info_overlay(False)
+            return
+        with profiler.phase("mirror._draw_view"):
+            if self.full_sync_needed:
+                with profiler.phase("mirror.render"):
+                    self.renderer.render(self.app.state.on_board, self.app.state.markers, None, [], self._card_sprite, self._marker_sprite)
+                self.full_sync_needed = False
+            else:
+                with profiler.phase("mirror.apply_changes"):
+                    self.renderer.apply_changes(self.pending_changes, self.app.state.on_board, self.app.state.markers,
+                                                self._card_sprite, self._marker_sprite)
+            self.pending_changes = BoardChanges()
+            with profiler.phase("mirror.overlay"):
+                self._update_info_overlay(True)
+
+    def _info_texts(self):
+        return (f"LP: {self.app.state.life_points}", f"Deck: {len(self.app.state.deck)}")
+
+    def _update_info_overlay(self, board_changed):
+        texts = self._info_texts()
+        if texts != self.info_texts:
+            self.info_texts = texts
+            self.lp_deck_info_tk = self.app.sprite_cache.get(("info",) + texts,
+                                                             lambda: ImageTk.PhotoImage(self._render_info_overlay(*texts)))
+            if self.info_item is None:
+                self.info_item = self.canvas.create_image(0, 0, image=self.lp_deck_info_tk, anchor="nw")
+            else:
+                self.canvas.itemconfig(self.info_item, image=self.lp_deck_info_tk)
+        if board_changed:
+            # New or restacked board items may have been raised above the overlay
+            self.canvas.tag_raise(self.info_item)
+
+    def _render_info_overlay(self, lp_text, deck_count_text):
+        font_info = get_font(20)
         lp_text_w, lp_text_h = font_info.getsize(lp_text) if hasattr(font_info, "getsize") else (80, 20)
         deck_text_w, deck_text_h = font_info.getsize(deck_count_text) if hasattr(font_info, "getsize") else (80, 20)
 
@@ -1449,24 +2005,16 @@ class OpponentWindow:
         dummy_box_w = max(lp_text_w, deck_text_w) + 20 
         dummy_box_h = lp_text_h 
 
+        # Only as large as the text block instead of a full-canvas layer
+        lp_deck_info_pil = Image.new("RGBA", (lp_x_opp + dummy_box_w + 10, deck_y_opp + dummy_box_h + 10), (255,255,255,0))
+        draw_info_pil = ImageDraw.Draw(lp_deck_info_pil)
         draw_text_with_outline(draw_info_pil, (lp_x_opp, lp_y_opp), lp_text, font_info, "Black", "White", 1, 
                                dummy_box_w, dummy_box_h, lp_text_w, lp_text_h)
         draw_text_with_outline(draw_info_pil, (deck_x_opp, deck_y_opp), deck_count_text, font_info, "Black", "White", 1,
                                dummy_box_w, dummy_box_h, deck_text_w, deck_text_h)
-
-        self.lp_deck_info_tk = ImageTk.PhotoImage(lp_deck_info_pil)
-        self.canvas.create_image(0,0, image=self.lp_deck_info_tk, anchor="nw")
+        return lp_deck_info_pil
 
 
-        self.needs_redraw = False 
-
-
-    def _refresh_view_loop(self):
-        if self.is_active():
-            if self.needs_redraw: 
-                self._draw_view()
-            self.window.after(self.app.opponent_refresh_rate, self._refresh_view_loop)
-
 
 class DeckContentsWindow:
     def __init__(self, app_ref):
@@ -1480,7 +2028,13 @@ class DeckContentsWindow:
 
         self.window.protocol("WM_DELETE_WINDOW", self.destroy_window)
 
-        self.card_mapping = self._load_card_list_names() 
+        self.catalog = self.app.card_catalog
+        try:
+            self.catalog.refresh()
+        except FileNotFoundError:
+            messagebox.showerror("エラー", f"{self.catalog.path}が見つかりません！", parent=self.window)
+        except Exception as e:
+            messagebox.showerror("エラー", f"{self.catalog.path}の読み込みエラー: {e}", parent=self.window)
         self.current_photo_image = None 
 
         main_frame = tk.Frame(self.window)
@@ -1489,16 +2043,14 @@ class DeckContentsWindow:
         list_frame = tk.Frame(main_frame)
         list_frame.pack(side="left", fill="y", padx=10, pady=10)
 
-        self.listbox = tk.Listbox(list_frame, width=50, height=30) 
+        thumbnails = self.app.card_images.thumbnails
+        self.listbox = VirtualList(list_frame, width=50, height=13,
+                                   text=lambda card_data: self.catalog.name(card_data.id, card_data.id),
+                                   thumbnail=lambda card_data: thumbnails.get(card_data.id, "list"),
+                                   thumbnail_key=lambda card_data: card_data.id,
+                                   thumbnail_size=THUMBNAIL_VARIANTS["list"][0])
         self.listbox.pack(side="left", fill="y")
-        
-        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.listbox.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.listbox.config(yscrollcommand=scrollbar.set)
-
-        for card_data in self.app.deck:
-            display_name = self.card_mapping.get(card_data["id"], card_data["id"])
-            self.listbox.insert(tk.END, display_name)
+        self.listbox.set_items(list(self.app.state.deck))
 
         self.listbox.bind("<<ListboxSelect>>", self._show_card_image)
 
@@ -1517,66 +2069,35 @@ class DeckContentsWindow:
 
         self._show_card_image() 
 
-    def _load_card_list_names(self):
-        mapping = {}
-        # MODIFIED: Load CardList.csv from script's directory (root)
-        card_list_path = "CardList.csv"
-
-        try:
-            with open(card_list_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        parts = line.split(",", 2)
-                        if len(parts) >= 2: 
-                            card_id, display_name = parts[0], parts[1]
-                            mapping[card_id] = display_name
-        except FileNotFoundError:
-            messagebox.showerror("エラー", f"{card_list_path}が見つかりません！", parent=self.window)
-        return mapping
-    
     def _show_card_image(self, event=None):
         selected_indices = self.listbox.curselection()
         if not selected_indices:
-            if self.app.deck: 
-                first_card_id_in_deck = self.app.deck[0]['id']
-                self._display_image_for_id(first_card_id_in_deck)
+            top_card = self.app.state.deck.top()
+            if top_card: 
+                self._display_image_for_id(top_card.id)
             else: 
                 self.image_label.config(image='', text="カードを選択してください")
                 self.current_photo_image = None
             return
 
-        selected_display_name = self.listbox.get(selected_indices[0])
-        
-        selected_card_id = None
-        for c_id, d_name in self.card_mapping.items():
-            if d_name == selected_display_name:
-                if selected_indices[0] < len(self.app.deck) and self.app.deck[selected_indices[0]]['id'] == c_id:
-                     selected_card_id = c_id
-                     break
-        if not selected_card_id and selected_indices[0] < len(self.app.deck): 
-            selected_card_id = self.app.deck[selected_indices[0]]['id']
-
-
-        if selected_card_id:
-            self._display_image_for_id(selected_card_id)
+        card_data = self._card_at_row(selected_indices[0])
+        if card_data:
+            self._display_image_for_id(card_data.id)
         else:
             self.image_label.config(image='', text="ID不明のカードです")
             self.current_photo_image = None
 
+    def _card_at_row(self, row):
+        if row >= self.listbox.size():
+            return None
+        return self.app.state.deck.get(self.listbox.get(row).uid)
+
     def _display_image_for_id(self, card_id):
-        image_path = os.path.join("card-img", f"{card_id}.png")
-        try:
-            pil_img = Image.open(image_path).resize((390, 555))
-            self.current_photo_image = ImageTk.PhotoImage(pil_img)
+        self.current_photo_image = self.app.get_preview_sprite(card_id)
+        if self.current_photo_image:
             self.image_label.config(image=self.current_photo_image, text="")
-        except FileNotFoundError:
-            if self.app.noimage_large_photo_image:
-                self.current_photo_image = self.app.noimage_large_photo_image
-                self.image_label.config(image=self.current_photo_image, text="")
-            else:
-                self.image_label.config(image='', text="画像が見つかりません")
-                self.current_photo_image = None
+        else:
+            self.image_label.config(image='', text="画像が見つかりません")
 
 
     def _select_card_from_deck(self):
@@ -1585,18 +2106,9 @@ class DeckContentsWindow:
             messagebox.showinfo("エラー", "カードを選択してください！", parent=self.window)
             return
         
-        selected_listbox_index = selected_indices[0]
-        
-        if selected_listbox_index < len(self.app.deck):
-            card_to_move = self.app.deck.pop(selected_listbox_index) 
-            
-            card_to_move["x"], card_to_move["y"] = 600, 500 
-            card_to_move["face_up"] = True 
-            card_to_move["revealed"] = True
-            card_to_move["rotated"] = False
-
-            self.app._adjust_card_position(card_to_move)
-            self.app.on_board.append(card_to_move)
+        card_to_move = self._card_at_row(selected_indices[0])
+        if card_to_move:
+            self.app.state.take_from_deck(card_to_move, 600, 500)
             self.app.selected_card = card_to_move 
             
             self.app.draw_cards() 
@@ -1639,7 +2151,7 @@ class MarkerEditWindow:
         self.window.protocol("WM_DELETE_WINDOW", self.destroy_window)
 
         self.text_box = tk.Text(self.window, width=text_widget_width, height=text_widget_height, wrap="word")
-        self.text_box.insert(tk.END, self.marker.get("text", ""))
+        self.text_box.insert(tk.END, self.marker.text)
         self.text_box.pack(pady=10, padx=10, expand=True, fill="both")
 
         save_button = tk.Button(self.window, text="保存", command=self._save_text)
@@ -1650,7 +2162,7 @@ class MarkerEditWindow:
 
     def _save_text(self):
         new_text = self.text_box.get("1.0", tk.END).strip()
-        self.marker["text"] = new_text 
+        self.app.state.set_marker_text(self.marker, new_text)
         self.app.draw_cards() 
         self.destroy_window()
 
@@ -1669,6 +2181,10 @@ class MarkerEditWindow:
 
 
 if __name__ == "__main__":
+    started_at = time.perf_counter()
+    parser = argparse.ArgumentParser(description="ShuffleMyriad Simulator")
+    parser.add_argument("--seed", type=int, help="seed of the shuffle, dice and coin streams (random if omitted)")
+    args = parser.parse_args()
     main_root = tk.Tk()
-    app = ShuffleMyriadApp(main_root)
+    app = ShuffleMyriadApp(main_root, started_at, seed=args.seed)
     main_root.mainloop()
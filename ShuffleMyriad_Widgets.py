@@ -0,0 +1,272 @@
+"""Tk widgets shared by the simulator and the deck editor."""
+import queue
+import sys
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from PIL import ImageTk
+
+THUMBNAIL_POLL_MS = 30
+THUMBNAIL_CACHE_SIZE = 1024
+THUMBNAIL_WORKERS = 2
+WHEEL_ROWS = 3
+ROW_PADDING = 4
+SELECT_BACKGROUND = "#3875d7"
+SELECT_FOREGROUND = "white"
+
+
+class VirtualList(tk.Frame):
+    """Listbox-like list with its own scrollbar that only creates canvas items for the visible rows.
+
+    items is any sequence and text(item) gives a row's label, so a list of tens
+    of thousands of card ids costs nothing until rows scroll into view. With
+    thumbnail (called on a worker thread, returns a PIL image no larger than
+    thumbnail_size, or None) each visible row also shows a small image, loaded
+    in the background and cached by thumbnail_key(item).
+
+    Selection is a single row as in a Listbox with exportselection=False:
+    curselection, selection_set, selection_clear, see, size and get(index)
+    behave the same, except that get returns the item, not its text.
+    Clicks and arrow keys generate <<ListboxSelect>>.
+    """
+    def __init__(self, master, text=str, thumbnail=None, thumbnail_key=None, thumbnail_size=(0, 0),
+                 width=40, height=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.text = text
+        self.thumbnail = thumbnail
+        self.thumbnail_key = thumbnail_key or text
+        self.thumbnail_size = thumbnail_size if thumbnail else (0, 0)
+        font = tkfont.nametofont("TkDefaultFont")
+        self.row_height = max(font.metrics("linespace"), self.thumbnail_size[1]) + ROW_PADDING
+        self.canvas = tk.Canvas(self, width=font.measure("0") * width + self.thumbnail_size[0] + 2 * ROW_PADDING,
+                                height=self.row_height * height, bg="white", takefocus=1,
+                                highlightthickness=1, borderwidth=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.items = []
+        self.selected = None
+        self.offset = 0 # Pixels scrolled from the top
+        self.slots = [] # (background, image, text) canvas items, reused for whichever rows are visible
+        self.photos = OrderedDict() # thumbnail key -> PhotoImage or None, least recently shown first
+        self.pending = set()
+        self.wanted = frozenset() # Keys of the visible rows; read by the workers
+        self.results = queue.SimpleQueue()
+        self.executor = None
+        self._poll_job = None
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self._scroll_pixels(-WHEEL_ROWS * self.row_height))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll_pixels(WHEEL_ROWS * self.row_height))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page_up"), ("<Next>", "page_down"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.canvas.bind(key, lambda e, step=step: self._on_key(step))
+        self.bind("<Destroy>", self._on_destroy)
+
+    # --- Listbox-compatible API ---
+    def set_items(self, items, keep_selection=False):
+        """Shows items. With keep_selection, the selected item stays selected if it is still present."""
+        selected_item = self.items[self.selected] if keep_selection and self.selected is not None else None
+        self.items = items
+        self.selected = None
+        if selected_item is not None:
+            try:
+                self.selected = items.index(selected_item)
+            except ValueError:
+                pass
+        self.offset = min(self.offset, self._max_offset())
+        self._render()
+
+    def size(self):
+        return len(self.items)
+
+    def get(self, index):
+        return self.items[index]
+
+    def curselection(self):
+        return () if self.selected is None else (self.selected,)
+
+    def selection_set(self, index):
+        if 0 <= index < len(self.items):
+            self.selected = index
+            self._render()
+
+    def selection_clear(self, *args):
+        if self.selected is not None:
+            self.selected = None
+            self._render()
+
+    def see(self, index):
+        top = index * self.row_height
+        view_height = self._view_height()
+        if top < self.offset:
+            self._scroll_to(top)
+        elif top + self.row_height > self.offset + view_height:
+            self._scroll_to(top + self.row_height - view_height)
+
+    def yview(self, *args):
+        if not args:
+            total = max(1, len(self.items) * self.row_height)
+            return self.offset / total, min(1.0, (self.offset + self._view_height()) / total)
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.items) * self.row_height))
+        elif args[0] == "scroll":
+            step = self._view_height() if args[2] == "pages" else self.row_height
+            self._scroll_pixels(int(args[1]) * step)
+
+    # --- Scrolling ---
+    def _view_height(self):
+        height = self.canvas.winfo_height()
+        return height if height > 1 else self.canvas.winfo_reqheight() # 1 until the canvas is first mapped
+
+    def _max_offset(self):
+        return max(0, len(self.items) * self.row_height - self._view_height())
+
+    def _scroll_to(self, offset):
+        offset = max(0, min(offset, self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _on_configure(self, event):
+        self.offset = min(self.offset, self._max_offset())
+        self._render()
+
+    def _scroll_pixels(self, pixels):
+        self._scroll_to(self.offset + pixels)
+
+    def _on_wheel(self, event):
+        if sys.platform == "darwin": # Small deltas per wheel tick
+            self._scroll_pixels(-event.delta * self.row_height)
+        else:
+            self._scroll_pixels(-event.delta * WHEEL_ROWS * self.row_height // 120)
+
+    # --- Selection input ---
+    def _select(self, index):
+        index = max(0, min(index, len(self.items) - 1))
+        self.selected = index
+        self.see(index)
+        self._render()
+        self.event_generate("<<ListboxSelect>>")
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = (event.y + self.offset) // self.row_height
+        if row < len(self.items):
+            self._select(row)
+
+    def _on_key(self, step):
+        if not self.items:
+            return
+        current = self.selected if self.selected is not None else -1
+        page = max(1, self._view_height() // self.row_height - 1)
+        target = {"page_up": current - page, "page_down": current + page,
+                  "home": 0, "end": len(self.items) - 1}.get(step)
+        self._select(current + step if target is None else target)
+        return "break"
+
+    # --- Drawing ---
+    def _render(self):
+        canvas = self.canvas
+        view_width = canvas.winfo_width()
+        view_height = self._view_height()
+        first = self.offset // self.row_height
+        count = max(0, min(len(self.items) - first, view_height // self.row_height + 2))
+        while len(self.slots) < count:
+            self.slots.append((canvas.create_rectangle(0, 0, 0, 0, width=0),
+                               canvas.create_image(0, 0, anchor="w"),
+                               canvas.create_text(0, 0, anchor="w")))
+        text_x = ROW_PADDING + (self.thumbnail_size[0] + ROW_PADDING if self.thumbnail else 0)
+        wanted = {}
+        for n, (background, image, text) in enumerate(self.slots):
+            if n >= count:
+                for canvas_item in (background, image, text):
+                    canvas.itemconfigure(canvas_item, state="hidden")
+                continue
+            row = first + n
+            item = self.items[row]
+            y = row * self.row_height - self.offset
+            middle = y + self.row_height // 2
+            selected = row == self.selected
+            canvas.coords(background, 0, y, view_width, y + self.row_height)
+            canvas.itemconfigure(background, fill=SELECT_BACKGROUND if selected else "", state="normal")
+            if self.thumbnail:
+                key = self.thumbnail_key(item)
+                wanted[key] = item
+                canvas.coords(image, ROW_PADDING, middle)
+                canvas.itemconfigure(image, image=self._photo(key) or "", state="normal")
+            canvas.coords(text, text_x, middle)
+            canvas.itemconfigure(text, text=self.text(item), state="normal",
+                                 fill=SELECT_FOREGROUND if selected else "black")
+        if self.thumbnail:
+            self.wanted = frozenset(wanted)
+            self._request_thumbnails(wanted)
+        total = len(self.items) * self.row_height
+        if total <= view_height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + view_height) / total)
+
+    # --- Thumbnails ---
+    def _photo(self, key):
+        if key not in self.photos:
+            return None
+        self.photos.move_to_end(key)
+        return self.photos[key]
+
+    def _request_thumbnails(self, wanted):
+        for key, item in wanted.items():
+            if key in self.photos or key in self.pending:
+                continue
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+            self.pending.add(key)
+            self.executor.submit(self._load_thumbnail, key, item)
+        if self.pending and self._poll_job is None:
+            self._poll_job = self.after(THUMBNAIL_POLL_MS, self._poll_thumbnails)
+
+    def _load_thumbnail(self, key, item):
+        if key not in self.wanted: # Scrolled away while queued; asked for again if it comes back
+            self.results.put((key, None, False))
+            return
+        try:
+            image = self.thumbnail(item)
+        except Exception as e:
+            print(f"Error loading thumbnail for {key}: {e}")
+            image = None
+        self.results.put((key, image, True))
+
+    def _poll_thumbnails(self):
+        self._poll_job = None
+        redraw = False
+        while True:
+            try:
+                key, image, loaded = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if loaded:
+                self.photos[key] = ImageTk.PhotoImage(image) if image is not None else None
+                redraw = True
+            elif key in self.wanted: # Skipped, but back in view before this poll; rendering asks for it again
+                redraw = True
+        while len(self.photos) > THUMBNAIL_CACHE_SIZE:
+            self.photos.popitem(last=False)
+        if redraw:
+            self._render()
+        if self.pending:
+            self._poll_job = self.after(THUMBNAIL_POLL_MS, self._poll_thumbnails)
+
+    def _on_destroy(self, event):
+        if event.widget is not self:
+            return
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
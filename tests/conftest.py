@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+import tkinter as tk
+
+import pytest
+
+# The modules are flat scripts at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def display():
+    """Starts Xvfb for the Tk tests when there is no display; the tests skip if Tk still cannot open one."""
+    if os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin":
+        yield
+        return
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        yield
+        return
+    number = next(n for n in range(99, 200) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{number}") and time.time() < deadline and process.poll() is None:
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{number}"
+    try:
+        yield
+    finally:
+        del os.environ["DISPLAY"]
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def root(display):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"no display: {e}")
+    yield root
+    root.destroy()
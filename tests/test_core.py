@@ -0,0 +1,489 @@
+import io
+import json
+import os
+import random
+
+import pytest
+from PIL import Image
+
+import ShuffleMyriad_Assets as assets
+from ShuffleMyriad_Assets import CardPack, ThumbnailCache, build_pack
+from ShuffleMyriad_Core import (
+    BoardJournal, CardCatalog, GameState, card_record, marker_record, read_board_save, write_board_save,
+)
+
+
+def snapshot(state):
+    """Everything an op can change, as plain values."""
+    def cards(zone):
+        return [dict(card_record(card_data), width=card_data.width, height=card_data.height) for card_data in zone]
+    return {
+        # Position and face of a card in the deck do not matter and are not saved
+        "deck": [card_record(card_data, "deck") for card_data in state.deck],
+        "ex_deck": [card_record(card_data, "deck") for card_data in state.ex_deck],
+        "board": cards(state.on_board),
+        "markers": [marker_record(marker) for marker in state.markers],
+        "life_points": state.life_points,
+        "uids": sorted(state.items_by_uid),
+    }
+
+
+def assert_indexed(state):
+    """The hit-test grids hold exactly the board items, with their bounds and in stacking order."""
+    for grid, items in ((state.card_index, state.on_board), (state.marker_index, state.markers)):
+        assert set(grid.items) == {id(item) for item in items}
+        assert [grid.items[id(item)][1] for item in items] == \
+               [(item.x, item.y, item.x + item.width, item.y + item.height) for item in items]
+        stacking = [state.stack_z[item.uid] for item in items]
+        assert stacking == sorted(stacking) and len(set(stacking)) == len(stacking)
+    assert set(state.stack_z) == {item.uid for item in state.on_board + state.markers}
+
+
+def play(state):
+    """A short game touching every kind of op."""
+    state.draw()
+    state.take_from_deck(list(state.deck)[3], 300, 300, face_up=False)
+    state.shuffle()
+    state.rotate([state.on_board[-1]])
+    state.move_items([state.on_board[0]], 40, -20)
+    state.add_marker(100, 100, "+1/+1")
+    state.add_chip("red", 200, 200)
+    state.set_life_points(7000)
+    state.roll_dice()
+    state.return_to_deck(state.on_board[-1], top=False)
+
+
+@pytest.fixture
+def state():
+    state = GameState(seed=7)
+    state.load_deck([f"card{i % 4}" for i in range(10)], ex_ids=["ex1"])
+    state.draw()
+    state.draw(face_up=False)
+    state.add_marker(120, 80, "marker")
+    state.add_chip("blue", 220, 80)
+    state.set_life_points(8000)
+    state.clear_history()
+    return state
+
+
+# --- Ops and their inverses ---
+def middle_card(state):
+    return list(state.deck)[4]
+
+
+OP_CASES = {
+    "set": lambda s: [s.set_op(s.on_board[0], face_up=False, revealed=False)],
+    "set_rotation": lambda s: [s.rotation_op(s.on_board[0], True)],
+    "move_deck_middle_to_board": lambda s: s.deal_ops(middle_card(s), 400, 300),
+    "move_board_to_deck_top": lambda s: [s.move_op(s.on_board[0], "deck", 0)],
+    "move_board_to_deck_bottom": lambda s: [s.move_op(s.on_board[0], "deck")],
+    "move_board_to_deck_middle": lambda s: [s.move_op(s.on_board[0], "deck", 5)],
+    "create_card": lambda s: [s.create_op("board", {"kind": "card", "id": "token", "x": 50, "y": 60})],
+    "create_marker": lambda s: [s.create_op("markers", {"kind": "marker", "type": "marker", "x": 5, "y": 5,
+                                                        "width": 40, "height": 20, "text": "new"})],
+    "remove_board_card": lambda s: [{"op": "remove", "uid": s.on_board[0].uid}],
+    "remove_deck_card": lambda s: [{"op": "remove", "uid": middle_card(s).uid}],
+    "remove_marker": lambda s: [{"op": "remove", "uid": s.markers[0].uid}],
+    "order_deck": lambda s: [{"op": "order", "zone": "deck", "uids": [c.uid for c in reversed(list(s.deck))]}],
+    "order_board": lambda s: [{"op": "order", "zone": "board", "uids": [c.uid for c in reversed(s.on_board)]}],
+    "shuffle": lambda s: [{"op": "shuffle", "zone": "deck", "stream": "shuffle",
+                           "count": s.random.next_count("shuffle")}],
+    "rng": lambda s: [{"op": "rng", "stream": "dice", "count": s.random.next_count("dice"), "result": 3}],
+    "lp": lambda s: [{"op": "lp", "value": 1234}],
+}
+
+
+@pytest.mark.parametrize("case", OP_CASES)
+def test_undo_and_redo_restore_state(state, case):
+    ops = OP_CASES[case](state)
+    before = snapshot(state)
+    state.commit(ops)
+    after = snapshot(state)
+    assert after != before or case == "rng"
+    assert_indexed(state)
+
+    assert state.undo()
+    assert snapshot(state) == before
+    assert_indexed(state)
+    assert state.redo()
+    assert snapshot(state) == after
+    assert_indexed(state)
+
+
+def test_rng_counters_never_move_back(state):
+    state.roll_dice()
+    state.shuffle()
+    counters = dict(state.random.counters)
+    state.undo()
+    assert state.random.counters == counters
+
+
+def test_batch_of_ops_undoes_as_one_step(state):
+    before = snapshot(state)
+    play(state)
+    while state.undo():
+        pass
+    assert snapshot(state) == before
+
+
+def test_deck_copy_returns_to_its_position(state):
+    order = [card_data.uid for card_data in state.deck]
+    card_data = middle_card(state)
+    state.take_from_deck(card_data, 300, 300)
+    assert card_data not in state.deck
+    state.undo()
+    assert [c.uid for c in state.deck] == order
+
+
+def test_positions_are_clamped_in_the_op(state):
+    card_data = state.on_board[0]
+    state.commit([state.set_op(card_data, x=-50, y=5000)])
+    assert (card_data.x, card_data.y) == (0, state.board_height - card_data.height)
+    ops, _ = state.undo_stack[-1]
+    assert ops[0]["values"] == {"x": 0, "y": state.board_height - card_data.height}
+
+
+def test_replaying_the_same_ops_gives_the_same_state():
+    first, second = GameState(seed=11), GameState(seed=11)
+    for game in (first, second):
+        game.load_deck([f"card{i}" for i in range(20)])
+        play(game)
+    assert snapshot(first) == snapshot(second)
+
+
+def test_reseed_replays_like_a_new_game_with_that_seed(state, tmp_path):
+    state.shuffle()
+    state.reseed(42)
+    assert not state.undo_stack
+    fresh = GameState(seed=42)
+    fresh.load_deck([card_data.id for card_data in state.deck])
+    state.shuffle()
+    fresh.shuffle()
+    assert [c.id for c in state.deck] == [c.id for c in fresh.deck]
+    assert state.roll_dice() == fresh.roll_dice()
+
+
+def test_reseed_is_recorded_in_the_journal(tmp_path):
+    journal, state = journaled_game(tmp_path)
+    state.reseed(42)
+    state.shuffle()
+    journal.close()
+    recovered, _ = recover(tmp_path)
+    assert recovered.random.state() == state.random.state()
+    assert snapshot(recovered) == snapshot(state)
+
+
+# --- Hit-test indexes ---
+def test_indexes_follow_random_actions_and_undo(state):
+    rng = random.Random(3)
+    for _ in range(300):
+        board = state.on_board
+        action = rng.randrange(6)
+        if action == 0 and state.deck:
+            state.draw(face_up=rng.random() < 0.5, x=rng.randrange(900), y=rng.randrange(700))
+        elif action == 1 and board:
+            state.move_items([rng.choice(board)], rng.randrange(-200, 200), rng.randrange(-200, 200))
+        elif action == 2 and board:
+            rng.choice((state.bring_to_front, state.send_to_back, state.remove))(rng.choice(board))
+        elif action == 3 and state.markers:
+            state.bring_to_front(rng.choice(state.markers))
+        elif action == 4 and board:
+            state.gather(rng.sample(board, min(3, len(board))), shuffle=True)
+        else:
+            state.undo() if rng.random() < 0.7 else state.redo()
+        assert_indexed(state)
+
+
+def test_hit_returns_the_topmost_item(state):
+    first, second = state.on_board[-2:]
+    state.move_items([second], first.x - second.x + 10, first.y - second.y)
+    assert state.card_index.hit(first.x + 20, first.y + 20) is second
+    state.bring_to_front(first)
+    assert state.card_index.hit(first.x + 20, first.y + 20) is first
+
+    marker = state.add_marker(300, 300)
+    chip = state.add_chip("red", 310, 310)
+    state.bring_to_front(marker)
+    assert state.marker_index.hit(315, 315) is chip # Chips are drawn above markers
+
+
+def test_repeated_inserts_at_one_place_renumber_the_zone(state):
+    for card_data in list(state.deck)[:6]:
+        state.take_from_deck(card_data, 300, 300)
+    for _ in range(120): # Halves the gap above on_board[1] until no value fits
+        state.commit([state.move_op(state.on_board[-1], "board", 2)])
+    assert_indexed(state)
+
+
+def test_reindex_picks_up_a_new_marker_size(state):
+    marker = state.markers[0]
+    marker.width += 100 # As the GUI does once the text is laid out
+    state.reindex(marker)
+    assert state.marker_index.hit(marker.x + marker.width - 1, marker.y + 1) is marker
+    assert_indexed(state)
+
+
+# --- Save files ---
+def test_board_save_round_trip(state):
+    play(state)
+    file = io.StringIO()
+    state.save(file)
+    file.seek(0)
+    save = read_board_save(file)
+    assert save.header["life_points"] == 7000
+
+    loaded = GameState()
+    loaded.load(save)
+    expected = snapshot(state)
+    expected["ex_deck"] = [] # EX decks are not part of a board save
+    assert snapshot(loaded) == expected
+    assert_indexed(loaded)
+    assert loaded.random.state() == state.random.state()
+
+
+def test_board_save_counts_mismatch_is_reported(capsys):
+    file = io.StringIO()
+    write_board_save(file, {}, [], [], [])
+    file.write(json.dumps({"kind": "deck", "id": "extra", "uid": 1}) + "\n")
+    file.seek(0)
+    save = read_board_save(file)
+    assert len(save.deck) == 1
+    assert "deck records" in capsys.readouterr().out
+
+
+def test_read_rejects_other_json_files():
+    with pytest.raises(ValueError):
+        read_board_save(io.StringIO('{"format": "something-else"}\n'))
+
+
+LEGACY_SAVE = """[Resource]
+my_reverse.png
+my_playmat.png
+[Deck]
+c1
+c2
+[Board]
+c3,100,200,1,0,1
+c4,5000,-30,0,1,1
+[Markers]
+marker,hello, world,10,20,30,40,
+chip,,5,6,18,18,red
+line1\\nline2,50,60,70,80
+"""
+
+
+def test_legacy_text_save_is_read():
+    save = read_board_save(io.StringIO(LEGACY_SAVE))
+    assert save.version == 0
+    assert save.resources == {"reverse": "my_reverse.png", "playmat": "my_playmat.png"}
+    assert [record["id"] for record in save.deck] == ["c1", "c2"]
+    assert save.board[0] == {"kind": "card", "id": "c3", "x": 100, "y": 200, "rotated": True,
+                             "face_up": False, "revealed": True}
+    texts = [(record["type"], record["text"], record["chip_color"]) for record in save.markers]
+    assert texts == [("marker", "hello, world", ""), ("chip", "", "red"), ("marker", "line1\nline2", "")]
+    assert (save.markers[2]["x"], save.markers[2]["height"]) == (50, 80)
+
+
+def test_legacy_save_loads_onto_the_board():
+    state = GameState()
+    state.load(read_board_save(io.StringIO(LEGACY_SAVE)))
+    rotated, off_board = state.on_board
+    assert (rotated.width, rotated.height) == (111, 78)
+    assert (off_board.x, off_board.y) == (state.board_width - 78, 0)
+    assert [marker.type for marker in state.markers] == ["marker", "chip", "marker"]
+    assert len({item.uid for item in state.items_by_uid.values()}) == len(state.items_by_uid)
+
+
+# --- Card list ---
+def test_card_catalog_reloads_only_when_the_stamp_changes(tmp_path):
+    path = tmp_path / "CardList.csv"
+    path.write_text("c1,Alpha,0\nc2,Beta,1\nbroken\nc1,Gamma\n", encoding="utf-8")
+    catalog = CardCatalog(str(path))
+    assert catalog.refresh()
+    assert catalog.cards == {"c1": {"name": "Gamma", "ex": "0"}, "c2": {"name": "Beta", "ex": "1"}}
+    assert catalog.ids_by_name == {"Beta": ["c2"], "Gamma": ["c1"]}
+    assert catalog.skipped == ["broken"]
+    assert not catalog.refresh()
+
+    # Same size and mtime: the new content is not read
+    stat = os.stat(path)
+    path.write_text("c1,Omega,0\nc2,Beth,1\nbroken\nc1,Gamma\n", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert not catalog.refresh()
+    assert catalog.name("c2") == "Beta"
+
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert catalog.refresh()
+    assert catalog.name("c2") == "Beth"
+
+    # Same mtime, new size
+    stat = os.stat(path)
+    path.write_text("c3,Epsilon,1\n", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert catalog.refresh()
+    assert list(catalog.cards) == ["c3"] and catalog.is_ex("c3") and catalog.skipped == []
+    assert not catalog.refresh()
+
+
+# --- Autosave journal ---
+def journaled_game(folder):
+    journal = BoardJournal(str(folder))
+    state = GameState(journal=journal, seed=5)
+    state.load_deck([f"card{i % 6}" for i in range(30)])
+    return journal, state
+
+
+def recover(folder):
+    save, batches = BoardJournal(str(folder)).read()
+    state = GameState()
+    state.load(save, batches)
+    return state, batches
+
+
+def test_journal_recovers_every_action(tmp_path):
+    journal, state = journaled_game(tmp_path)
+    play(state)
+    state.undo()
+    journal.close()
+
+    recovered, _ = recover(tmp_path)
+    assert snapshot(recovered) == snapshot(state)
+    assert_indexed(recovered)
+
+
+def test_journal_ignores_a_truncated_last_line(tmp_path, capsys):
+    journal, state = journaled_game(tmp_path)
+    play(state)
+    before_last = snapshot(state)
+    state.flip(state.on_board[0])
+    journal.close()
+
+    with open(journal.journal_path, "r+", encoding="utf-8") as f:
+        content = f.read()
+        f.seek(0)
+        f.truncate()
+        f.write(content[:len(content) - 15]) # Cut inside the last entry, as a crash mid-write would
+
+    recovered, batches = recover(tmp_path)
+    assert "incomplete journal entry" in capsys.readouterr().out
+    assert snapshot(recovered) == before_last
+
+
+def test_journal_from_another_generation_is_not_replayed(tmp_path):
+    journal, state = journaled_game(tmp_path)
+    at_snapshot = snapshot(state)
+    play(state)
+    journal.close()
+
+    with open(journal.journal_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    header = json.loads(lines[0])
+    header["generation"] += 1
+    lines[0] = json.dumps(header) + "\n"
+    with open(journal.journal_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+    recovered, batches = recover(tmp_path)
+    assert batches == []
+    assert snapshot(recovered) == at_snapshot
+
+
+def test_journal_compaction_starts_a_new_generation(tmp_path):
+    journal = BoardJournal(str(tmp_path), compact_every=3)
+    state = GameState(journal=journal, seed=5)
+    state.load_deck([f"card{i}" for i in range(10)])
+    for _ in range(7):
+        state.draw()
+    journal.close()
+
+    with open(journal.journal_path, "r", encoding="utf-8") as f:
+        entries = f.read().splitlines()[1:]
+    assert len(entries) == 1 # Two compactions after three actions each
+    recovered, _ = recover(tmp_path)
+    assert snapshot(recovered) == snapshot(state)
+
+
+# --- Card image assets ---
+@pytest.fixture
+def card_images(tmp_path):
+    source = tmp_path / "card-img"
+    source.mkdir()
+    Image.new("RGB", (390, 555), "red").save(source / "a.png")
+    Image.new("RGB", (390, 555), "blue").save(source / "b.png")
+    return ThumbnailCache(str(source), str(tmp_path / "thumbnails"), pack_path=None)
+
+
+def replace_source(cache, card_id, color):
+    path = cache.source_path(card_id)
+    stat = os.stat(path)
+    Image.new("RGB", (400, 560), color).save(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_thumbnail_is_read_from_the_cache_until_the_source_changes(card_images, monkeypatch):
+    board = card_images.get("a", "board")
+    assert board.size == (78, 111) and board.getpixel((10, 10))[:3] == (255, 0, 0)
+    assert os.path.exists(card_images.cache_path("a", "board"))
+
+    render = card_images._render
+    monkeypatch.setattr(card_images, "_render", lambda *args: pytest.fail("rendered a fresh thumbnail"))
+    assert card_images.get("a", "board").getpixel((10, 10))[:3] == (255, 0, 0)
+
+    replace_source(card_images, "a", "green")
+    monkeypatch.setattr(card_images, "_render", render)
+    assert card_images.get("a", "board").getpixel((10, 10))[:3] == (0, 128, 0)
+    assert card_images.get("missing", "board") is None
+
+
+def test_card_pack_round_trip(card_images, tmp_path):
+    pack_path = str(tmp_path / "cards.pack")
+    card_images.build()
+    assert build_pack(card_images, pack_path) == 2
+
+    pack = CardPack.open(pack_path)
+    try:
+        stamp = card_images.source_stamp("b")
+        for variant in assets.PACK_VARIANTS:
+            packed = pack.get("b", variant, stamp)
+            assert packed.tobytes() == card_images.get("b", variant).convert("RGBA").tobytes()
+        del packed # Shares memory with the mapping, which cannot close while it is alive
+        assert pack.get("b", "preview", stamp) is None
+        assert pack.get("b", "board", "stale") is None
+        assert "missing" not in pack
+    finally:
+        pack.close()
+
+
+def test_thumbnail_cache_prefers_a_fresh_pack(card_images, tmp_path, monkeypatch):
+    pack_path = str(tmp_path / "cards.pack")
+    build_pack(card_images, pack_path)
+    cache = ThumbnailCache(card_images.source_dir, card_images.cache_dir, pack_path=pack_path)
+    try:
+        monkeypatch.setattr(cache, "_read_cached", lambda *args: pytest.fail("read a thumbnail file"))
+        assert cache.get("a", "board").getpixel((10, 10))[:3] == (255, 0, 0)
+
+        replace_source(cache, "a", "green") # The packed copy is stale now
+        monkeypatch.setattr(cache, "_read_cached", lambda *args: None)
+        assert cache.get("a", "board").getpixel((10, 10))[:3] == (0, 128, 0)
+    finally:
+        cache.pack.close()
+
+
+def test_card_pack_open_ignores_missing_and_foreign_files(tmp_path):
+    assert CardPack.open(str(tmp_path / "none.pack")) is None
+    (tmp_path / "other.pack").write_bytes(b"not a pack at all, but long enough for a header")
+    assert CardPack.open(str(tmp_path / "other.pack")) is None
+
+
+def test_pack_in_use_is_reported(card_images, tmp_path, monkeypatch, capsys):
+    def replace(source, target):
+        raise PermissionError(13, "The process cannot access the file")
+    monkeypatch.setattr(assets.os, "replace", replace)
+    pack_path = str(tmp_path / "cards.pack")
+    with pytest.raises(PermissionError, match="close the simulator"):
+        build_pack(card_images, pack_path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    args = ["pack", "--source", card_images.source_dir, "--cache", card_images.cache_dir, "--pack", pack_path]
+    assert assets.main(args) == 1
+    assert "close the simulator" in capsys.readouterr().out
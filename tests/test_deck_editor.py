@@ -0,0 +1,128 @@
+import math
+import random
+
+import pytest
+
+import ShuffleMyriad_DeckEditor as editor
+from ShuffleMyriad_Core import CardCatalog
+from ShuffleMyriad_DeckEditor import CardSearchIndex, exact_draw_probability, parse_draw_conditions, simulate_draws
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "CardList.csv"
+    path.write_text("c1,Alpha,0\nc2,Beta,0\nc3,Alpha,0\n", encoding="utf-8")
+    catalog = CardCatalog(str(path))
+    catalog.refresh()
+    return catalog
+
+
+# --- Draw probability ---
+def test_parse_draw_conditions(catalog):
+    text = "Alpha >= 2\nc2\nBeta>=1\nc1, c2 >=3\nc9\nc3 >=x\n\n"
+    conditions, unknown = parse_draw_conditions(text, catalog)
+    assert conditions == [
+        (frozenset({"c1", "c3"}), 2, "Alpha >= 2"),
+        (frozenset({"c2"}), 1, "c2"),
+        (frozenset({"c2"}), 1, "Beta>=1"),
+        (frozenset({"c1", "c2"}), 3, "c1, c2 >=3"),
+    ]
+    assert unknown == ["c9", "c3 >=x"]
+
+
+def hypergeometric_none(deck_size, draws, size):
+    """P(no card of a group of size in draws cards)."""
+    return math.comb(deck_size - size, draws) / math.comb(deck_size, draws)
+
+
+def test_exact_probability_of_one_group():
+    assert exact_draw_probability(40, 5, [3], [1]) == pytest.approx(1 - hypergeometric_none(40, 5, 3))
+    at_least_two = sum(math.comb(3, k) * math.comb(37, 5 - k) for k in (2, 3)) / math.comb(40, 5)
+    assert exact_draw_probability(40, 5, [3], [2]) == pytest.approx(at_least_two)
+    assert exact_draw_probability(40, 5, [3], [0]) == pytest.approx(1)
+    assert exact_draw_probability(5, 10, [3], [3]) == pytest.approx(1) # Draws past the deck take all of it
+
+
+def test_exact_probability_of_two_groups():
+    # Inclusion-exclusion: 1 - P(no A) - P(no B) + P(no A and no B)
+    expected = 1 - hypergeometric_none(40, 5, 3) - hypergeometric_none(40, 5, 4) + hypergeometric_none(40, 5, 7)
+    assert exact_draw_probability(40, 5, [3, 4], [1, 1]) == pytest.approx(expected)
+
+
+def test_exact_probability_rejects_groups_larger_than_the_deck():
+    with pytest.raises(ValueError):
+        exact_draw_probability(5, 3, [4, 4], [1, 1])
+
+
+DECK = ["a"] * 3 + ["b"] * 4 + ["x"] * 33
+CONDITIONS = [(frozenset({"a"}), 1, "a"), (frozenset({"b"}), 1, "b")]
+
+
+def final(simulation):
+    for hits, done in simulation:
+        pass
+    return hits, done
+
+
+@pytest.mark.skipif(editor.np is None, reason="numpy is not installed")
+def test_simulation_matches_the_exact_probability():
+    exact = exact_draw_probability(len(DECK), 5, [3, 4], [1, 1])
+    hits, done = final(simulate_draws(DECK, 5, CONDITIONS, trials=200000, seed=1))
+    assert done == 200000
+    assert hits / done == pytest.approx(exact, abs=0.005)
+    assert final(simulate_draws(DECK, 5, CONDITIONS, trials=200000, seed=1)) == (hits, done)
+
+
+def test_simulation_without_numpy_matches_the_exact_probability(monkeypatch):
+    monkeypatch.setattr(editor, "np", None)
+    exact = exact_draw_probability(len(DECK), 5, [3, 4], [1, 1])
+    hits, done = final(simulate_draws(DECK, 5, CONDITIONS, trials=20000, seed=1))
+    assert done == 20000
+    assert hits / done == pytest.approx(exact, abs=0.02)
+
+
+@pytest.mark.skipif(editor.np is None, reason="numpy is not installed")
+def test_simulation_batches_are_capped_for_large_decks():
+    deck = ["a"] * 100 + ["x"] * 9900
+    _, first_batch = next(simulate_draws(deck, 5, [(frozenset({"a"}), 1, "a")], trials=100000, seed=1))
+    assert first_batch * len(deck) <= editor.MC_BATCH_ELEMENTS
+
+
+# --- Search ---
+def naive_search(texts, query):
+    return [row for row, text in enumerate(texts) if query.lower() in text.lower()]
+
+
+def random_texts(rng, count):
+    alphabet = "abcAB12 -ドラゴン騎士"
+    return [f"id{row:04d} - " + "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 12)))
+            for row in range(count)]
+
+
+def test_search_matches_a_substring_filter_while_typing():
+    rng = random.Random(5)
+    texts = random_texts(rng, 2000)
+    index = CardSearchIndex(texts)
+    # Typing, backspacing, queries under three characters, and an edit in the middle
+    queries = ["d", "dr", "ドラ", "ドラゴ", "ドラゴン", "ドラゴ", "ドラ", "", "a", "ab", "abc", "ab", "aB",
+               "id00", "id001", "id0012", "id00", "ID01", "騎士", "ン騎", "ゴン騎士", "zzz", "zz", "- ", " -",
+               "id1", "xid1", "ab1", "cab1"]
+    for query in queries:
+        assert list(index.search(query)) == naive_search(texts, query), query
+
+
+def test_search_matches_a_substring_filter_for_random_edits():
+    rng = random.Random(9)
+    texts = random_texts(rng, 500)
+    index = CardSearchIndex(texts)
+    query = ""
+    for _ in range(400):
+        if query and rng.random() < 0.3:
+            cut = rng.randrange(len(query))
+            query = query[:cut] + query[cut + 1:] # Backspace anywhere
+        else:
+            cut = rng.randrange(len(query) + 1)
+            query = query[:cut] + rng.choice("abcABドラゴン騎士1 -") + query[cut:]
+        if len(query) > 6:
+            query = query[-3:]
+        assert list(index.search(query)) == naive_search(texts, query), query
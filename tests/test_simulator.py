@@ -0,0 +1,99 @@
+import time
+from itertools import chain, islice
+
+import pytest
+from PIL import Image
+
+import ShuffleMyriad_Simulator as simulator
+
+
+def pump(root, until, timeout=5.0):
+    deadline = time.time() + timeout
+    while not until():
+        assert time.time() < deadline, "timed out"
+        root.update()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def app(root, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for folder in ("card-img", "resource", "save"):
+        (tmp_path / folder).mkdir()
+    for name, size in (("reverse.png", (78, 111)), ("playmat.png", (960, 720)),
+                       ("noimage.png", (78, 111)), ("unknown.png", (390, 555))):
+        Image.new("RGB", size, "grey").save(tmp_path / "resource" / name)
+    Image.new("RGB", (390, 555), "red").save(tmp_path / "card-img" / "c1.png")
+
+    def dialog(title, message, **kwargs):
+        raise AssertionError(f"unexpected dialog: {message}")
+    for name in ("showinfo", "showerror", "askyesno"):
+        monkeypatch.setattr(simulator.messagebox, name, dialog)
+
+    app = simulator.ShuffleMyriadApp(root)
+    root.update()
+    yield app
+    app.state.journal.close()
+
+
+def drag_to(app, root, x, y, offset):
+    app.canvas.event_generate("<B1-Motion>", x=x, y=y)
+    pump(root, lambda: app.drag_applied == offset)
+
+
+def test_render_during_drag_keeps_the_card_under_the_pointer(app, root):
+    app.state.load_deck(["c1", "c1"])
+    card_data = app.state.take_from_deck(app.state.deck.top(), 200, 200)
+    app.draw_cards()
+    root.update()
+    x, y = card_data.x, card_data.y
+    start_x, start_y = x + 10, y + 10
+    canvas = app.canvas
+    item = app.board_renderer.card_items[id(card_data)]
+
+    canvas.event_generate("<Button-1>", x=start_x, y=start_y)
+    drag_to(app, root, start_x + 40, start_y + 30, (40, 30))
+    app.draw_cards() # As when a card image finishes loading mid-drag
+    assert canvas.coords(item.image_item) == [card_data.x + 40, card_data.y + 30]
+    assert canvas.coords(item.outline_item) == [card_data.x + 40, card_data.y + 30,
+                                                 card_data.x + 40 + card_data.width, card_data.y + 30 + card_data.height]
+
+    drag_to(app, root, start_x + 50, start_y + 30, (50, 30))
+    assert canvas.coords(item.image_item) == [card_data.x + 50, card_data.y + 30]
+
+    canvas.event_generate("<ButtonRelease-1>", x=start_x + 50, y=start_y + 30)
+    assert (card_data.x, card_data.y) == (x + 50, y + 30)
+    assert canvas.coords(item.image_item) == [x + 50, y + 30]
+
+
+def test_loading_a_deck_decodes_only_the_board_and_the_top_of_the_deck(app):
+    app.state.load_deck([f"id{i}" for i in range(40)])
+    app.state.take_from_deck(list(app.state.deck)[20], 300, 300)
+    app.draw_cards()
+    app._prefetch_upcoming_cards()
+    expected = {card_data.id for card_data in chain(app.state.on_board, islice(app.state.deck, simulator.DECK_PREFETCH))}
+    assert set(app.card_images.entries) == expected
+
+
+# --- Card images ---
+def test_card_image_store_keeps_the_most_recently_used_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "card-img").mkdir()
+    for card_id in ("a", "b", "c"):
+        Image.new("RGB", (390, 555), "red").save(tmp_path / "card-img" / f"{card_id}.png")
+    store = simulator.CardImageStore("card-img", max_workers=1, max_entries=2)
+    try:
+        first = store.entry("a")
+        assert first.board_image(True).size == (111, 78)
+        store.entry("b")
+        store.entry("a")
+        store.entry("c")
+        assert list(store.entries) == ["a", "c"]
+        assert store.entry("a") is first
+
+        assert store.prefetch(["b"]) == 1
+        store.entry("b").future.result()
+        assert [entry.card_id for entry in store.take_completed()] == ["b"]
+        assert list(store.entries) == ["a", "b"]
+    finally:
+        store.executor.shutdown()
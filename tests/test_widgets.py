@@ -0,0 +1,202 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from ShuffleMyriad_Widgets import VirtualList
+
+
+def visible_texts(widget):
+    canvas = widget.canvas
+    return [canvas.itemcget(text, "text") for _, _, text in widget.slots
+            if canvas.itemcget(text, "state") != "hidden"]
+
+
+def row_visible(widget, index):
+    top = index * widget.row_height
+    return widget.offset <= top and top + widget.row_height <= widget.offset + widget.canvas.winfo_height()
+
+
+def pump(root, until, timeout=5.0):
+    deadline = time.time() + timeout
+    while not until():
+        assert time.time() < deadline, "timed out"
+        root.update()
+        time.sleep(0.01)
+
+
+# --- Before the widget is mapped ---
+def test_render_before_mapping_fills_the_requested_height(root):
+    widget = VirtualList(root, height=5)
+    widget.pack()
+    widget.set_items([f"item{i}" for i in range(100)])
+    assert widget.canvas.winfo_height() == 1
+    assert visible_texts(widget)[:5] == [f"item{i}" for i in range(5)]
+
+    root.update()
+    assert visible_texts(widget)[:5] == [f"item{i}" for i in range(5)]
+    assert widget.yview()[0] == 0
+
+
+def test_see_before_mapping_shows_the_row_once_mapped(root):
+    widget = VirtualList(root, height=5)
+    widget.pack()
+    widget.set_items([f"item{i}" for i in range(100)])
+    widget.selection_set(50)
+    widget.see(50)
+    assert widget.canvas.winfo_height() == 1
+
+    root.update()
+    assert row_visible(widget, 50)
+    assert "item50" in visible_texts(widget)
+
+
+# --- Selection and keyboard ---
+@pytest.fixture
+def mapped(root):
+    widget = VirtualList(root, height=5)
+    widget.pack()
+    widget.set_items([f"item{i}" for i in range(30)])
+    selections = []
+    widget.bind("<<ListboxSelect>>", lambda e: selections.append(widget.curselection()))
+    root.update()
+    widget.canvas.focus_force()
+    root.update()
+    return widget, selections
+
+
+def press(widget, key):
+    widget.canvas.event_generate(key)
+    widget.update()
+
+
+def test_arrow_keys_move_the_selection(mapped):
+    widget, selections = mapped
+    press(widget, "<Down>")
+    assert widget.curselection() == (0,)
+    press(widget, "<Down>")
+    press(widget, "<Down>")
+    assert widget.curselection() == (2,)
+    press(widget, "<Up>")
+    assert selections == [(0,), (1,), (2,), (1,)]
+
+    press(widget, "<Home>")
+    press(widget, "<Up>")
+    assert widget.curselection() == (0,)
+
+
+def test_end_and_page_keys_scroll_the_selection_into_view(mapped):
+    widget, _ = mapped
+    press(widget, "<End>")
+    assert widget.curselection() == (29,)
+    assert row_visible(widget, 29)
+    press(widget, "<Prior>")
+    assert widget.curselection()[0] < 29
+    assert row_visible(widget, widget.curselection()[0])
+    press(widget, "<Home>")
+    assert widget.offset == 0
+
+
+def test_click_selects_the_row_under_the_pointer(mapped):
+    widget, selections = mapped
+    widget.canvas.event_generate("<Button-1>", x=10, y=widget.row_height * 2 + 1)
+    assert widget.curselection() == (2,)
+    assert selections == [(2,)]
+    widget.set_items(["item0"])
+    widget.canvas.event_generate("<Button-1>", x=10, y=widget.row_height * 3)
+    assert selections == [(2,)] # Below the last row
+
+
+def test_set_items_keeps_the_selected_item(mapped):
+    widget, _ = mapped
+    widget.selection_set(4)
+    widget.set_items([f"item{i}" for i in range(2, 30)], keep_selection=True)
+    assert widget.curselection() == (2,)
+    widget.set_items(["other"], keep_selection=True)
+    assert widget.curselection() == ()
+
+
+# --- Thumbnails ---
+class Thumbnails:
+    """Thumbnail loader that records calls and can hold the workers until released."""
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, item):
+        self.calls.append(item)
+        self.gate.wait(5)
+        return Image.new("RGB", (8, 8), "red")
+
+
+def thumbnail_list(root, loader):
+    widget = VirtualList(root, height=5, thumbnail=loader, thumbnail_size=(8, 8))
+    widget.pack()
+    root.update()
+    return widget
+
+
+def shown_images(widget):
+    canvas = widget.canvas
+    return [canvas.itemcget(image, "image") for _, image, text in widget.slots
+            if canvas.itemcget(text, "state") != "hidden"]
+
+
+def test_thumbnails_are_polled_onto_the_rows(root):
+    loader = Thumbnails()
+    widget = thumbnail_list(root, loader)
+    widget.set_items([f"item{i}" for i in range(100)])
+    assert widget.pending and widget._poll_job is not None
+
+    pump(root, lambda: not widget.pending)
+    assert widget._poll_job is None
+    assert all(shown_images(widget))
+    assert sorted(loader.calls) == sorted(widget.wanted)
+
+
+def test_rebuilt_list_skips_thumbnails_no_longer_shown(root):
+    loader = Thumbnails()
+    loader.gate.clear()
+    widget = thumbnail_list(root, loader)
+    old = [f"old{i}" for i in range(100)]
+    widget.set_items(old)
+    widget.set_items([f"new{i}" for i in range(100)])
+    loader.gate.set()
+
+    pump(root, lambda: not widget.pending)
+    started_old = [item for item in loader.calls if item.startswith("old")]
+    assert len(started_old) <= 2 # Only those already on a worker
+    assert all(shown_images(widget))
+
+
+def test_thumbnail_skipped_then_shown_again_is_loaded(root):
+    loader = Thumbnails()
+    loader.gate.clear()
+    widget = thumbnail_list(root, loader)
+    old = [f"old{i}" for i in range(100)]
+    widget.set_items(old)
+    widget.set_items([f"new{i}" for i in range(100)])
+    loader.gate.set()
+    # Let the workers skip the old rows before the poll sees the results
+    deadline = time.time() + 5
+    while widget.results.qsize() < len(widget.pending) and time.time() < deadline:
+        time.sleep(0.01)
+
+    widget.set_items(old)
+    pump(root, lambda: not widget.pending and all(shown_images(widget)))
+
+
+def test_destroy_cancels_polling_and_queued_loads(root):
+    loader = Thumbnails()
+    loader.gate.clear()
+    widget = thumbnail_list(root, loader)
+    widget.set_items([f"item{i}" for i in range(100)])
+    executor = widget.executor
+    widget.destroy()
+    assert widget._poll_job is None
+    loader.gate.set()
+    executor.shutdown(wait=True)
+    assert len(loader.calls) <= 2
+    root.update()